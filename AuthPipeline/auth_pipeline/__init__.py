@@ -0,0 +1,4 @@
+from .jwks import JWKSCache, url_fetcher, file_fetcher
+from .permissions import PermissionSet, VerifiedPayload
+from .pipeline import AuthError, AuthPipeline, StageTimings
+from .token_cache import TokenCache
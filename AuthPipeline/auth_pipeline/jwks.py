@@ -0,0 +1,134 @@
+import json
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+'''
+url_fetcher(url) / file_fetcher(path)
+    build the callables JWKSCache uses to load a key set
+    the url fetcher is what production uses (Auth0 /.well-known/jwks.json)
+    the file fetcher lets tests point the cache at a local jwks.json
+'''
+def url_fetcher(url, timeout=5):
+    def fetch():
+        # urllib.request (http.client, ssl, email) is imported on the first fetch, not at app startup
+        from urllib.request import urlopen
+        with urlopen(url, timeout=timeout) as response:
+            return json.loads(response.read())
+    return fetch
+
+
+def file_fetcher(path):
+    def fetch():
+        with open(path) as f:
+            return json.load(f)
+    return fetch
+
+
+'''
+JWKSCache
+    in-memory cache of the signing keys, keyed by key id (kid)
+
+    - keys are served from memory for `ttl` seconds
+    - `refresh_ahead` seconds before they expire a background thread re-fetches them,
+      requests keep using the cached keys in the meantime
+    - an unknown kid (key rotation) triggers one refetch, concurrent callers wait for
+      the same fetch instead of each hitting the network (single-flight)
+    - unknown kid refetches are rate limited by `min_refetch_interval`
+    - if a fetch fails the previous keys stay in use (stale-while-error)
+
+    EXAMPLE
+        cache = JWKSCache(url_fetcher(f'https://{AUTH0_DOMAIN}/.well-known/jwks.json'))
+        key = cache.get_key(unverified_header['kid'])
+'''
+class JWKSCache:
+    def __init__(self, fetcher, ttl=600, refresh_ahead=60, min_refetch_interval=30, clock=time.monotonic):
+        self.fetcher = fetcher
+        self.ttl = ttl
+        self.refresh_ahead = refresh_ahead
+        self.min_refetch_interval = min_refetch_interval
+        self.clock = clock
+        # bumped every time a new key set is loaded
+        self.version = 0
+        self._keys = {}
+        self._fetched_at = None
+        self._last_attempt = None
+        self._in_flight = None
+        self._lock = threading.Lock()
+
+    '''
+    get_key(kid)
+        returns the jwk dict for kid, or None if the key set does not contain it
+    '''
+    def get_key(self, kid):
+        if self._fetched_at is None:
+            self.refresh()
+        elif self.clock() - self._fetched_at >= self.ttl - self.refresh_ahead:
+            self.refresh_in_background()
+
+        key = self._keys.get(kid)
+        if key is None:
+            key = self._refetch(kid)
+        return key
+
+    '''
+    refresh()
+        fetches the key set, or waits for the fetch already in flight
+        raises the fetch error only when there are no cached keys to fall back on
+    '''
+    def refresh(self):
+        with self._lock:
+            in_flight, leader = self._join_fetch()
+        return self._complete_fetch(in_flight, leader)
+
+    def refresh_in_background(self):
+        with self._lock:
+            if self._in_flight is not None or not self._may_refetch():
+                return
+            in_flight, leader = self._join_fetch()
+        threading.Thread(target=self._complete_fetch, args=(in_flight, leader), daemon=True).start()
+
+    def _refetch(self, kid):
+        with self._lock:
+            if kid in self._keys:
+                return self._keys[kid]
+            if self._in_flight is None and not self._may_refetch():
+                return None
+            in_flight, leader = self._join_fetch()
+        return self._complete_fetch(in_flight, leader).get(kid)
+
+    # callers must hold self._lock
+    def _join_fetch(self):
+        if self._in_flight is not None:
+            return self._in_flight, False
+        self._in_flight = threading.Event()
+        self._last_attempt = self.clock()
+        return self._in_flight, True
+
+    def _complete_fetch(self, in_flight, leader):
+        if not leader:
+            in_flight.wait()
+            return self._keys
+
+        try:
+            jwks = self.fetcher()
+            keys = {key['kid']: key for key in jwks['keys']}
+            with self._lock:
+                self._keys = keys
+                self._fetched_at = self.clock()
+                self.version += 1
+        except Exception:
+            if self._fetched_at is None:
+                raise
+            logger.exception('JWKS refresh failed, keeping %d cached keys', len(self._keys))
+        finally:
+            with self._lock:
+                self._in_flight = None
+            in_flight.set()
+
+        return self._keys
+
+    def _may_refetch(self):
+        return self._last_attempt is None or self.clock() - self._last_attempt >= self.min_refetch_interval
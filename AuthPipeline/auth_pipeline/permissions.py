@@ -0,0 +1,35 @@
+'''
+PermissionSet
+    frozen set of the `action:resource` permissions granted to a token
+    checks cost a few set lookups no matter how long the token's permissions list is
+
+    wildcards are supported at either level
+        '*:drinks'  any action on drinks
+        'get:*'     get on any resource
+        '*:*', '*'  everything
+
+    EXAMPLE
+        PermissionSet(['*:drinks']).allows('patch:drinks')  # True
+'''
+class PermissionSet(frozenset):
+    def allows(self, permission):
+        if permission in self:
+            return True
+
+        action, _, resource = permission.partition(':')
+        return ('*:' + resource) in self \
+            or (action + ':*') in self \
+            or '*:*' in self \
+            or '*' in self
+
+
+'''
+VerifiedPayload
+    a decoded jwt payload (a plain dict for route handlers and jsonify)
+    that also carries the PermissionSet built from its `permissions` claim
+    built once at verification time and cached together with the payload
+'''
+class VerifiedPayload(dict):
+    def __init__(self, payload):
+        super().__init__(payload)
+        self.permission_set = PermissionSet(payload.get('permissions') or ())
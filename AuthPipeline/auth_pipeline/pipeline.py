@@ -0,0 +1,251 @@
+import threading
+import time
+
+from .jwks import JWKSCache, url_fetcher
+from .permissions import PermissionSet, VerifiedPayload
+from .token_cache import TokenCache
+
+## AuthError Exception
+'''
+AuthError Exception
+A standardized way to communicate auth failure modes
+'''
+class AuthError(Exception):
+    def __init__(self, error, status_code):
+        self.error = error
+        self.status_code = status_code
+
+
+'''
+StageTimings
+    per-stage call counters and cumulative wall time of the auth pipeline
+    stages: header (parse the Authorization header), key_lookup (kid -> verifier),
+    verify (token cache lookup and signature/claims check), permission (permission check)
+    EXAMPLE
+        pipeline.timings.snapshot()
+        # {'verify': {'calls': 120, 'total_ms': 3.1, 'avg_us': 25.8}, ...}
+'''
+class StageTimings:
+    STAGES = ('header', 'key_lookup', 'verify', 'permission')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._calls = dict.fromkeys(self.STAGES, 0)
+            self._seconds = dict.fromkeys(self.STAGES, 0.0)
+
+    def add(self, stage, seconds):
+        with self._lock:
+            self._calls[stage] += 1
+            self._seconds[stage] += seconds
+
+    def snapshot(self):
+        with self._lock:
+            return {stage: {
+                'calls': self._calls[stage],
+                'total_ms': self._seconds[stage] * 1000,
+                'avg_us': self._seconds[stage] / self._calls[stage] * 1e6 if self._calls[stage] else 0.0
+            } for stage in self.STAGES}
+
+
+'''
+AuthPipeline
+    the Auth0 bearer token checks shared by every app's requires_auth decorator
+
+    - keys come from a JWKSCache, the jose key object (verifier) for each kid is built once
+      per loaded key set instead of rebuilding the rsa_key dict on every request
+    - verified payloads are kept in a TokenCache until their exp
+    - every stage is timed in `timings`
+
+    EXAMPLE
+        pipeline = AuthPipeline(AUTH0_DOMAIN, API_AUDIENCE)
+        token = pipeline.parse_header(request.headers.get('Authorization'))
+        payload = pipeline.verify(token)
+        pipeline.check_permission('post:drinks', payload)
+'''
+class AuthPipeline:
+    def __init__(self, domain, audience, algorithms=('RS256',), jwks_cache=None, token_cache=None):
+        self.domain = domain
+        self.audience = audience
+        self.algorithms = list(algorithms)
+        self.issuer = 'https://' + domain + '/'
+        if jwks_cache is None:
+            jwks_cache = JWKSCache(url_fetcher(f'https://{domain}/.well-known/jwks.json'))
+        self.jwks_cache = jwks_cache
+        self.token_cache = TokenCache() if token_cache is None else token_cache
+        self.timings = StageTimings()
+        # {kid: (JWKS cache version it was built from, jose key)}
+        self._verifiers = {}
+        self._verifiers_lock = threading.Lock()
+
+    '''
+    parse_header(authorization)
+        returns the token of a 'Bearer <token>' Authorization header value
+    '''
+    def parse_header(self, authorization):
+        start = time.perf_counter()
+        try:
+            if not authorization:
+                raise AuthError({
+                    'code': 'authorization_header_missing',
+                    'description': 'Authorization header is expected.'
+                }, 401)
+
+            parts = authorization.split()
+            if parts[0].lower() != 'bearer':
+                raise AuthError({
+                    'code': 'invalid_header',
+                    'description': 'Authorization header must start with "Bearer".'
+                }, 401)
+
+            elif len(parts) == 1:
+                raise AuthError({
+                    'code': 'invalid_header',
+                    'description': 'Token not found.'
+                }, 401)
+
+            elif len(parts) > 2:
+                raise AuthError({
+                    'code': 'invalid_header',
+                    'description': 'Authorization header must be bearer token.'
+                }, 401)
+
+            return parts[1]
+        finally:
+            self.timings.add('header', time.perf_counter() - start)
+
+    '''
+    get_verifier(kid)
+        the jose key for kid, or None if the key set does not contain it
+        built once per kid and JWKS cache version, i.e. again only after the key set is reloaded
+    '''
+    def get_verifier(self, kid):
+        # read before the key, a key set loaded in between makes the entry look older than
+        # its key and it is rebuilt on the next call, never the other way round
+        version = self.jwks_cache.version
+        key = self.jwks_cache.get_key(kid)
+        if self.jwks_cache.version != version:
+            # loaded by this lookup (e.g. the first fetch), take the key from the new set
+            version = self.jwks_cache.version
+            key = self.jwks_cache.get_key(kid)
+        if key is None:
+            return None
+
+        entry = self._verifiers.get(kid)
+        if entry is None or entry[0] != version:
+            from jose import jwk
+            rsa_key = {
+                'kty': key['kty'],
+                'kid': key['kid'],
+                'use': key['use'],
+                'n': key['n'],
+                'e': key['e']
+            }
+            entry = (version, jwk.construct(rsa_key, self.algorithms[0]))
+            with self._verifiers_lock:
+                # a thread that built from a newer key set meanwhile keeps its entry
+                current = self._verifiers.get(kid)
+                if current is None or current[0] < version:
+                    self._verifiers[kid] = entry
+        return entry[1]
+
+    '''
+    verify(token)
+        returns the decoded payload as a VerifiedPayload (a dict carrying its PermissionSet)
+        tokens verified before are served from the token cache until they expire
+    '''
+    def verify(self, token):
+        start = time.perf_counter()
+        payload = self.token_cache.get(token)
+        if payload is not None:
+            self.timings.add('verify', time.perf_counter() - start)
+            return payload
+
+        # jose (and its crypto backend) is imported on the first uncached token, not at app startup
+        from jose import jwt
+        try:
+            unverified_header = jwt.get_unverified_header(token)
+        except Exception:
+            raise AuthError({
+                'code': 'invalid_header',
+                'description': 'Unable to parse authentication token.'
+            }, 400)
+        if 'kid' not in unverified_header:
+            raise AuthError({
+                'code': 'invalid_header',
+                'description': 'Authorization malformed.'
+            }, 401)
+
+        lookup_start = time.perf_counter()
+        verifier = self.get_verifier(unverified_header['kid'])
+        lookup_done = time.perf_counter()
+        self.timings.add('key_lookup', lookup_done - lookup_start)
+        if verifier is None:
+            raise AuthError({
+                'code': 'invalid_header',
+                'description': 'Unable to find the appropriate key.'
+            }, 400)
+
+        try:
+            payload = jwt.decode(
+                token,
+                verifier,
+                algorithms=self.algorithms,
+                audience=self.audience,
+                issuer=self.issuer
+            )
+
+        except jwt.ExpiredSignatureError:
+            raise AuthError({
+                'code': 'token_expired',
+                'description': 'Token expired.'
+            }, 401)
+
+        except jwt.JWTClaimsError:
+            raise AuthError({
+                'code': 'invalid_claims',
+                'description': 'Incorrect claims. Please, check the audience and issuer.'
+            }, 401)
+        except Exception:
+            raise AuthError({
+                'code': 'invalid_header',
+                'description': 'Unable to parse authentication token.'
+            }, 400)
+        finally:
+            # the token cache lookup and the signature/claims check, without the key lookup
+            self.timings.add('verify', lookup_start - start + time.perf_counter() - lookup_done)
+
+        payload = VerifiedPayload(payload)
+        self.token_cache.put(token, payload)
+        return payload
+
+    '''
+    check_permission(permission, payload)
+        raises an AuthError unless the payload grants the permission, returns True otherwise
+        an empty permission only requires the permissions claim to be present
+    '''
+    def check_permission(self, permission, payload):
+        start = time.perf_counter()
+        try:
+            if 'permissions' not in payload:
+                raise AuthError({
+                    'code': 'invalid_claims',
+                    'description': 'Permissions not included in JWT.'
+                }, 400)
+
+            permission_set = getattr(payload, 'permission_set', None)
+            if permission_set is None:
+                permission_set = PermissionSet(payload['permissions'])
+
+            if permission and not permission_set.allows(permission):
+                raise AuthError({
+                    'code': 'unauthorized',
+                    'description': 'Permission not found.'
+                }, 403)
+
+            return True
+        finally:
+            self.timings.add('permission', time.perf_counter() - start)
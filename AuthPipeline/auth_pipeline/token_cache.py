@@ -0,0 +1,92 @@
+import copy
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+
+def _copy_json(value):
+    if isinstance(value, dict):
+        return {key: _copy_json(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_copy_json(item) for item in value]
+    return value
+
+
+'''
+copy_payload(payload)
+    a copy of a decoded jwt payload that the caller may mutate freely
+    nested claims (dicts and lists) are copied too, a dict subclass keeps its type and
+    attributes, e.g. the (frozen) permission_set of a VerifiedPayload is shared
+'''
+def copy_payload(payload):
+    copied = copy.copy(payload)
+    for key, value in payload.items():
+        if isinstance(value, (dict, list)):
+            copied[key] = _copy_json(value)
+    return copied
+
+'''
+TokenCache
+    bounded LRU cache of verified jwt payloads
+    a bearer token seen before is accepted without re-running the RS256 signature check
+
+    - entries are keyed by the sha256 of the token, the raw token is never stored
+    - an entry expires at the token's `exp` claim, tokens without `exp` are not cached
+    - once `maxsize` entries are held the least recently used one is evicted
+    - maxsize=0 disables the cache
+    - put() stores and get() returns copies (see copy_payload), a request that mutates its
+      payload does not change what later requests with the same token get
+
+    EXAMPLE
+        payload = token_cache.get(token)
+        if payload is None:
+            payload = jwt.decode(token, ...)
+            token_cache.put(token, payload)
+'''
+class TokenCache:
+    def __init__(self, maxsize=1024, clock=time.time):
+        self.maxsize = maxsize
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._payloads = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(token):
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token):
+        key = self._key(token)
+        with self._lock:
+            entry = self._payloads.get(key)
+            if entry is not None:
+                payload, expires_at = entry
+                if self.clock() < expires_at:
+                    self._payloads.move_to_end(key)
+                    self.hits += 1
+                    return copy_payload(payload)
+                del self._payloads[key]
+
+            self.misses += 1
+            return None
+
+    def put(self, token, payload):
+        if self.maxsize <= 0 or 'exp' not in payload:
+            return
+
+        key = self._key(token)
+        payload = copy_payload(payload)
+        with self._lock:
+            self._payloads[key] = (payload, payload['exp'])
+            self._payloads.move_to_end(key)
+            while len(self._payloads) > self.maxsize:
+                self._payloads.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._payloads.clear()
+
+    def __len__(self):
+        return len(self._payloads)
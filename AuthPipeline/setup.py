@@ -0,0 +1,9 @@
+from setuptools import setup
+
+setup(
+    name='auth-pipeline',
+    version='0.1.0',
+    description='Auth0 bearer token checks shared by the FSND Flask apps',
+    packages=['auth_pipeline'],
+    install_requires=['python-jose[cryptography]>=3.0'],
+)
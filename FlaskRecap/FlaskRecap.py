@@ -1,33 +1,31 @@
 from flask import Flask, request, jsonify, abort
 
+from greeting_store import store_from_env
+from response_cache import EncodedResponses, json_response
+
 app = Flask(__name__)
 
-greetings = {
-            'en': 'hello', 
-            'es': 'Hola', 
-            'ar': 'مرحبا',
-            'ru': 'Привет',
-            'fi': 'Hei',
-            'he': 'שלום',
-            'ja': 'こんにちは'
-            }
+# pluggable storage, see greeting_store.py
+# GREETING_STORE=sqlite:///greetings.db shares greetings between gunicorn workers
+greetings = store_from_env()
+# GET responses are encoded once per version of the greetings, see response_cache.py
+responses = EncodedResponses()
 
 @app.route('/greeting', methods=['GET'])
 def greeting_all():
-    return jsonify({'greetings': greetings})
+    return json_response(request, responses.all(greetings))
 
 @app.route('/greeting/<lang>', methods=['GET'])
 def greeting_one(lang):
-    print(lang)
-    if(lang not in greetings):
+    encoded = responses.one(greetings, lang)
+    if(encoded is None):
         abort(404)
-    return jsonify({'greeting': greetings[lang
-    ]})
+    return json_response(request, encoded)
 
 @app.route('/greeting', methods=['POST'])
 def greeting_add():
     info = request.get_json()
     if('lang' not in info or 'greeting' not in info):
         abort(422)
-    greetings[info['lang']] = info['greeting']
-    return jsonify({'greetings':greetings})
+    greetings.set(info['lang'], info['greeting'])
+    return jsonify({'greetings': greetings.all()})
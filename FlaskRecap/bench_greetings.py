@@ -0,0 +1,64 @@
+"""Requests/sec of GET /greeting and GET /greeting/<lang> with thousands of languages
+
+Compares re-running jsonify over the greetings on every request with the
+pre-encoded responses. Uses the Flask test client, so no server is needed:
+
+    python bench_greetings.py --languages 5000 --requests 2000
+"""
+import argparse
+import time
+
+from flask import jsonify, abort
+
+import FlaskRecap
+from greeting_store import MemoryGreetingStore
+
+
+def legacy_all():
+    return jsonify({'greetings': FlaskRecap.greetings.all()})
+
+
+def legacy_one(lang):
+    greeting = FlaskRecap.greetings.get(lang)
+    if(greeting is None):
+        abort(404)
+    return jsonify({'greeting': greeting})
+
+
+def rate(client, paths, requests):
+    start = time.perf_counter()
+    for i in range(requests):
+        client.get(paths[i % len(paths)])
+    return requests / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--languages', type=int, default=5000)
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args()
+
+    app = FlaskRecap.app
+    FlaskRecap.greetings = MemoryGreetingStore({'l{}'.format(i): 'hello {}'.format(i) for i in range(args.languages)})
+    app.add_url_rule('/legacy/greeting', 'legacy_all', legacy_all)
+    app.add_url_rule('/legacy/greeting/<lang>', 'legacy_one', legacy_one)
+    client = app.test_client()
+
+    langs = ['l{}'.format(i) for i in range(0, args.languages, max(1, args.languages // 100))]
+    assert client.get('/greeting').data == client.get('/legacy/greeting').data
+    etag = client.get('/greeting').headers['ETag']
+
+    for label, prefix in (('jsonify', '/legacy'), ('pre-encoded', '')):
+        print('{:<12} GET /greeting {:8.0f} req/s   GET /greeting/<lang> {:8.0f} req/s'.format(
+            label,
+            rate(client, [prefix + '/greeting'], args.requests),
+            rate(client, [prefix + '/greeting/' + lang for lang in langs], args.requests)))
+
+    start = time.perf_counter()
+    for _ in range(args.requests):
+        assert client.get('/greeting', headers={'If-None-Match': etag}).status_code == 304
+    print('{:<12} GET /greeting {:8.0f} req/s'.format('304', args.requests / (time.perf_counter() - start)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+import os
+import sqlite3
+import threading
+
+DEFAULT_GREETINGS = {
+            'en': 'hello',
+            'es': 'Hola',
+            'ar': 'مرحبا',
+            'ru': 'Привет',
+            'fi': 'Hei',
+            'he': 'שלום',
+            'ja': 'こんにちは'
+            }
+
+
+class MemoryGreetingStore:
+    '''Greetings kept in a dict of this process, writes are serialized by a lock.
+
+    Every gunicorn worker gets its own copy, so use it for the dev server or a single worker.
+    '''
+
+    def __init__(self, greetings=DEFAULT_GREETINGS):
+        self._lock = threading.Lock()
+        self._greetings = dict(greetings)
+        self._version = 0
+
+    def version(self):
+        # bumped after every write, so the greetings read after it are at least that new
+        return self._version
+
+    def get(self, lang):
+        return self._greetings.get(lang)
+
+    def all(self):
+        # writers replace the dict instead of mutating it, so readers never see a half-done update
+        return self._greetings
+
+    def set(self, lang, greeting):
+        with self._lock:
+            greetings = dict(self._greetings)
+            greetings[lang] = greeting
+            self._greetings = greetings
+            self._version += 1
+
+
+class SqliteGreetingStore:
+    '''Greetings kept in a sqlite file shared by all worker processes.
+
+    Single greetings are read by primary key. The full listing is cached per thread and only
+    reloaded when another connection has committed (sqlite's PRAGMA data_version), so
+    GET /greeting does not copy the table on every request. The version row counts the
+    writes, it is the same for every thread and worker process.
+    '''
+
+    def __init__(self, path, greetings=DEFAULT_GREETINGS):
+        self.path = path
+        self._local = threading.local()
+
+        connection = self._connection()
+        with connection:
+            connection.execute('CREATE TABLE IF NOT EXISTS greetings (lang TEXT PRIMARY KEY, greeting TEXT NOT NULL)')
+            connection.executemany('INSERT OR IGNORE INTO greetings (lang, greeting) VALUES (?, ?)', greetings.items())
+            connection.execute('CREATE TABLE IF NOT EXISTS greetings_version '
+                               '(id INTEGER PRIMARY KEY CHECK (id = 0), version INTEGER NOT NULL)')
+            connection.execute('INSERT OR IGNORE INTO greetings_version (id, version) VALUES (0, 0)')
+
+    def _connection(self):
+        # sqlite connections must not be shared between threads (or forked processes)
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+            # (data_version it was read at, greetings dict)
+            self._local.snapshot = (None, None)
+        return connection
+
+    def version(self):
+        return self._connection().execute('SELECT version FROM greetings_version WHERE id = 0').fetchone()[0]
+
+    def get(self, lang):
+        row = self._connection().execute('SELECT greeting FROM greetings WHERE lang = ?', (lang,)).fetchone()
+        return row[0] if row else None
+
+    def all(self):
+        connection = self._connection()
+        version = connection.execute('PRAGMA data_version').fetchone()[0]
+        snapshot_version, greetings = self._local.snapshot
+        if greetings is not None and snapshot_version == version:
+            return greetings
+
+        greetings = dict(connection.execute('SELECT lang, greeting FROM greetings ORDER BY lang'))
+        self._local.snapshot = (version, greetings)
+        return greetings
+
+    def set(self, lang, greeting):
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            connection.execute('INSERT INTO greetings (lang, greeting) VALUES (?, ?) '
+                               'ON CONFLICT(lang) DO UPDATE SET greeting = excluded.greeting', (lang, greeting))
+            connection.execute('UPDATE greetings_version SET version = version + 1 WHERE id = 0')
+            connection.execute('COMMIT')
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+        # data_version does not change for this connection's own commits
+        self._local.snapshot = (None, None)
+
+
+def store_from_env():
+    '''GREETING_STORE=sqlite:///path/to/greetings.db shares greetings between workers, default is in memory'''
+    url = os.environ.get('GREETING_STORE', 'memory')
+    if url.startswith('sqlite:///'):
+        return SqliteGreetingStore(url[len('sqlite:///'):])
+    if url == 'memory':
+        return MemoryGreetingStore()
+    raise ValueError('unknown GREETING_STORE: {}'.format(url))
@@ -0,0 +1,64 @@
+import hashlib
+import threading
+
+from flask import Response, jsonify
+
+
+class EncodedResponses:
+    '''Pre-encoded JSON bodies (and their ETags) for the greeting routes.
+
+    Bodies are cached for the store and the version() of its greetings, so all threads share
+    them until a write bumps the version. Single greetings are encoded from store.get(lang),
+    without loading the listing.
+    '''
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # ((store, version) they were built for, {None: encoded GET /greeting, lang: encoded GET /greeting/<lang>})
+        self._cache = (None, {})
+
+    def encode(self, value):
+        # same bytes jsonify would send
+        body = jsonify(value).get_data()
+        return body, hashlib.sha256(body).hexdigest()
+
+    def _bodies(self, store):
+        # the version is read before the greetings, so a body built while a write commits is
+        # only ever cached under the older version and rebuilt on the next request
+        key = (store, store.version())
+        cache = self._cache
+        if cache[0] != key:
+            with self._lock:
+                cache = self._cache
+                if cache[0] != key:
+                    cache = (key, {})
+                    self._cache = cache
+        return cache[1]
+
+    def all(self, store):
+        '''encoded {'greetings': ...} for all greetings of store'''
+        bodies = self._bodies(store)
+        encoded = bodies.get(None)
+        if encoded is None:
+            encoded = bodies.setdefault(None, self.encode({'greetings': store.all()}))
+        return encoded
+
+    def one(self, store, lang):
+        '''encoded {'greeting': ...} for lang, or None if store has no such language'''
+        bodies = self._bodies(store)
+        encoded = bodies.get(lang)
+        if encoded is None:
+            greeting = store.get(lang)
+            if greeting is None:
+                return None
+            encoded = bodies.setdefault(lang, self.encode({'greeting': greeting}))
+        return encoded
+
+
+def json_response(request, encoded):
+    '''a conditional 200/304 response for an (body, etag) pair'''
+    body, etag = encoded
+    response = Response(body, mimetype='application/json')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
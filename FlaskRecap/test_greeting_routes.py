@@ -0,0 +1,52 @@
+import json
+import unittest
+
+import FlaskRecap
+from greeting_store import MemoryGreetingStore
+
+
+class GreetingRoutesTestCase(unittest.TestCase):
+    """This class represents the pre-encoded greeting responses test case"""
+
+    def setUp(self):
+        FlaskRecap.greetings = MemoryGreetingStore()
+        self.client = FlaskRecap.app.test_client()
+
+    def test_etag_revalidation(self):
+        """A client with a current ETag gets a 304"""
+        res = self.client.get('/greeting')
+        etag = res.headers['ETag']
+
+        self.assertEqual(json.loads(res.data)['greetings']['en'], 'hello')
+        self.assertEqual(self.client.get('/greeting', headers={'If-None-Match': etag}).status_code, 304)
+
+    def test_add_regenerates_responses(self):
+        """Adding a greeting invalidates the cached bodies and their ETags"""
+        etag = self.client.get('/greeting').headers['ETag']
+        self.assertEqual(self.client.get('/greeting/de').status_code, 404)
+
+        self.client.post('/greeting', json={'lang': 'de', 'greeting': 'Hallo'})
+        res = self.client.get('/greeting', headers={'If-None-Match': etag})
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(json.loads(res.data)['greetings']['de'], 'Hallo')
+        self.assertEqual(json.loads(self.client.get('/greeting/de').data), {'greeting': 'Hallo'})
+
+    def test_one_greeting(self):
+        """Single greetings are served with their own ETag"""
+        res = self.client.get('/greeting/ja')
+
+        self.assertEqual(json.loads(res.data), {'greeting': 'こんにちは'})
+        self.assertEqual(self.client.get('/greeting/ja', headers={'If-None-Match': res.headers['ETag']}).status_code, 304)
+
+    def test_one_greeting_skips_listing(self):
+        """A single greeting is looked up by key, the listing is not loaded"""
+        FlaskRecap.greetings.all = None
+
+        self.assertEqual(json.loads(self.client.get('/greeting/fi').data), {'greeting': 'Hei'})
+        self.assertEqual(self.client.get('/greeting/xx').status_code, 404)
+
+
+# Make the tests conveniently executable
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from greeting_store import DEFAULT_GREETINGS, MemoryGreetingStore, SqliteGreetingStore
+
+WORKERS = 4
+WRITES = 200
+
+
+def worker(path, worker_id, results):
+    '''one gunicorn-like worker process: writes its own greetings and reads everything back'''
+    store = SqliteGreetingStore(path)
+    start = time.perf_counter()
+    for i in range(WRITES):
+        store.set('w{}-{}'.format(worker_id, i), 'hello {}'.format(i))
+        store.get('en')
+        store.all()
+    results.put((worker_id, WRITES * 3 / (time.perf_counter() - start)))
+
+
+class MemoryGreetingStoreTestCase(unittest.TestCase):
+    """This class represents the in-memory greeting store test case"""
+
+    def test_concurrent_writes(self):
+        """Writes from many threads are all kept"""
+        store = MemoryGreetingStore()
+
+        threads = [threading.Thread(target=lambda n=n: [store.set('t{}-{}'.format(n, i), 'hi') for i in range(500)])
+                   for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(store.all()), len(DEFAULT_GREETINGS) + 8 * 500)
+
+    def test_listing_is_not_mutated(self):
+        """A listing handed to a reader does not change under it"""
+        store = MemoryGreetingStore()
+        listing = store.all()
+
+        store.set('de', 'Hallo')
+        self.assertNotIn('de', listing)
+        self.assertEqual(store.get('de'), 'Hallo')
+
+
+class SqliteGreetingStoreTestCase(unittest.TestCase):
+    """This class represents the shared sqlite greeting store test case"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'greetings.db')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_persists_across_restart(self):
+        """Greetings survive a new store on the same file"""
+        SqliteGreetingStore(self.path).set('de', 'Hallo')
+
+        store = SqliteGreetingStore(self.path)
+        self.assertEqual(store.get('de'), 'Hallo')
+        self.assertEqual(store.get('en'), 'hello')
+
+    def test_listing_cached_until_changed(self):
+        """The listing is reused until another connection writes"""
+        reader = SqliteGreetingStore(self.path)
+        writer = SqliteGreetingStore(self.path)
+
+        listing = reader.all()
+        self.assertIs(reader.all(), listing)
+        writer.set('de', 'Hallo')
+        self.assertEqual(reader.all()['de'], 'Hallo')
+
+    def test_version_shared_between_connections(self):
+        """Every connection sees the same version, bumped by each write"""
+        reader = SqliteGreetingStore(self.path)
+        writer = SqliteGreetingStore(self.path)
+        version = reader.version()
+
+        writer.set('de', 'Hallo')
+        self.assertEqual(reader.version(), version + 1)
+        self.assertEqual(writer.version(), version + 1)
+
+    def test_multi_process_consistency(self):
+        """Writes of every worker process are visible to all of them"""
+        SqliteGreetingStore(self.path)
+        results = multiprocessing.Queue()
+
+        processes = [multiprocessing.Process(target=worker, args=(self.path, n, results)) for n in range(WORKERS)]
+        for process in processes:
+            process.start()
+        throughput = dict(results.get(timeout=60) for _ in processes)
+        for process in processes:
+            process.join()
+            self.assertEqual(process.exitcode, 0)
+
+        greetings = SqliteGreetingStore(self.path).all()
+        self.assertEqual(len(greetings), len(DEFAULT_GREETINGS) + WORKERS * WRITES)
+        print('\n' + '  '.join('worker {}: {:.0f} ops/s'.format(n, ops) for n, ops in sorted(throughput.items())))
+
+
+# Make the tests conveniently executable
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+"""Cold-start import cost of every app in the repository
+
+For each app, times a cold `import <module>` in fresh interpreters (minus the
+bare interpreter start), then runs it once under `python -X importtime` and
+lists the heaviest direct imports. Apps that fail to import (missing packages,
+unfilled @TODO placeholders) are reported with their error. From the repository root run:
+
+    python bench_importtime.py --rounds 5 --top 8
+    python bench_importtime.py --app fyyur
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# name: (directory, module, extra environment)
+APPS = {
+    'fyyur': ('projects/01_fyyur/starter_code', 'app', {'DATABASE_URL': 'sqlite://'}),
+    'trivia': ('projects/02_trivia_api/starter/backend', 'flaskr', {}),
+    'coffee-shop': ('projects/03_coffee_shop_full_stack/starter_code/backend', 'src.api', {}),
+    'capstone': ('projects/capstone/starter', 'app', {}),
+    'heroku-sample': ('projects/capstone/heroku_sample/starter', 'app', {'DATABASE_URL': 'sqlite://', 'EXCITED': 'false'}),
+    'flask-recap': ('FlaskRecap', 'FlaskRecap', {}),
+    'basic-flask-auth': ('BasicFlaskAuth', 'app', {}),
+    'auth-pipeline': ('AuthPipeline', 'auth_pipeline', {}),
+}
+
+
+def run(directory, code, env, *flags):
+    return subprocess.run([sys.executable, *flags, '-c', code], cwd=os.path.join(ROOT, directory),
+                          env=dict(os.environ, **env), capture_output=True, text=True)
+
+
+def wall_time(directory, code, env, rounds):
+    times = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        run(directory, code, env)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def import_breakdown(stderr, module):
+    '''(total us, [(cumulative us, name)] of the module's direct imports) from -X importtime output'''
+    block = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        level = (len(name) - len(name.lstrip()) - 1) // 2
+        name = name.strip()
+        if level == 0:
+            if name == module:
+                children = [(us, child) for child_level, us, child in block if child_level == 1]
+                return int(cumulative), sorted(children, reverse=True)
+            block = []
+        else:
+            block.append((level, int(cumulative), name))
+    return None, []
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--app', choices=sorted(APPS), action='append', help='only these apps (default all)')
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--top', type=int, default=8)
+    args = parser.parse_args()
+
+    interpreter = wall_time('.', 'pass', {}, args.rounds)
+    print('bare interpreter start: {:.1f} ms\n'.format(interpreter * 1000))
+
+    for name in args.app or APPS:
+        directory, module, env = APPS[name]
+        code = 'import ' + module
+        result = run(directory, code, env, '-X', 'importtime')
+        if result.returncode != 0:
+            errors = [line for line in result.stderr.splitlines() if line.strip() and not line.startswith('import time:')]
+            print('{:<17} import failed: {}\n'.format(name, (errors or ['?'])[-1]))
+            continue
+
+        total, children = import_breakdown(result.stderr, module)
+        print('{:<17} import {:7.1f} ms wall (median of {}), {:7.1f} ms -X importtime'.format(
+            name, (wall_time(directory, code, env, args.rounds) - interpreter) * 1000, args.rounds, (total or 0) / 1000))
+        for us, child in children[:args.top]:
+            print('    {:>8.1f} ms  {}'.format(us / 1000, child))
+        print()
+
+
+if __name__ == '__main__':
+    main()
@@ -3,19 +3,29 @@
 # ----------------------------------------------------------------------------#
 
 import json
+import os
 import sys
 
-import dateutil.parser
-import babel
-from flask import Flask, render_template, request, Response, flash, redirect, url_for, jsonify
+import click
+from flask import Flask, render_template, request, Response, flash, redirect, url_for, jsonify, abort
 from flask_moment import Moment
 from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
+from jinja2 import FileSystemBytecodeCache
 import logging
 from logging import Formatter, FileHandler
-from flask_wtf import Form
-from forms import *
-from datetime import datetime
+import string
+import threading
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import text, func, or_, and_
+
+import assets
+import geo
+import partitions
+from bookings import BookingIndex, MAX_DURATION_MINUTES
+from matchmaking import Matchmaker
+from replicas import RoutingSession, read_only, stick_to_primary
+from view_models import VENUE_FIELDS, ARTIST_FIELDS, venue_page, artist_page
 
 # ----------------------------------------------------------------------------#
 # App Config.
@@ -24,8 +34,42 @@ from datetime import datetime
 app = Flask(__name__)
 moment = Moment(app)
 app.config.from_object('config')
-db = SQLAlchemy(app)
-migrate = Migrate(app, db)
+# reads of the read_only views go to the replicas of config.DATABASE_REPLICA_URLS
+db = SQLAlchemy(app, session_options={'class_': RoutingSession})
+app.after_request(stick_to_primary)
+
+# templates are compiled to bytecode once and reused by every worker and restart
+if app.config['JINJA_BYTECODE_CACHE_DIR']:
+    os.makedirs(app.config['JINJA_BYTECODE_CACHE_DIR'], exist_ok=True)
+    app.jinja_env.bytecode_cache = FileSystemBytecodeCache(app.config['JINJA_BYTECODE_CACHE_DIR'])
+
+# in production url_for('static', ...) points at the fingerprinted, precompressed copies
+# made by `flask build-assets`, during development the files of static/ are served as is
+asset_manifest = assets.load_manifest(app.static_folder) if app.config['PRODUCTION'] else None
+if app.config['PRODUCTION'] and asset_manifest is None:
+    app.logger.warning('static assets are not built, run `flask build-assets`')
+if asset_manifest:
+    built_assets = {hashed: asset_manifest['encodings'].get(hashed, [])
+                    for hashed in asset_manifest['assets'].values()}
+
+    @app.url_defaults
+    def fingerprint_static(endpoint, values):
+        if endpoint == 'static' and values.get('filename') in asset_manifest['assets']:
+            values['filename'] = asset_manifest['assets'][values['filename']]
+
+    def static(filename):
+        if filename in built_assets:
+            return assets.send_asset(app.static_folder, filename, built_assets[filename], request.accept_encodings)
+        return app.send_static_file(filename)
+
+    app.view_functions['static'] = static
+
+# flask-migrate (and alembic) is only needed by the `flask db` commands, so it is only
+# registered when the app is loaded by the flask CLI and stays out of the startup of
+# the serving workers (gunicorn, waitress)
+if os.environ.get('FLASK_RUN_FROM_CLI') == 'true':
+    from flask_migrate import Migrate
+    migrate = Migrate(app, db)
 
 
 # ----------------------------------------------------------------------------#
@@ -47,6 +91,10 @@ class Venue(db.Model):
     website = db.Column(db.String(512))
     seeking_talent = db.Column(db.Boolean, default=False)
     seeking_description = db.Column(db.String(1024))
+    # centre of the venue's city from the bundled gazetteer, see geocode_venue
+    latitude = db.Column(db.Float)
+    longitude = db.Column(db.Float)
+    geohash = db.Column(db.String(12), index=True)
     shows = db.relationship('Show', backref='venue', lazy=True)
 
     def __repr__(self):
@@ -73,6 +121,10 @@ class Artist(db.Model):
         return "<Artist {}, {}, {}, {}>".format(self.id, self.name, self.city, self.state)
 
 
+# the order of the /artists pages, keyset pagination walks this index
+db.Index('ix_artist_lower_name_id', func.lower(Artist.name), Artist.id)
+
+
 class Show(db.Model):
     __tablename__ = 'Show'
 
@@ -80,16 +132,201 @@ class Show(db.Model):
     venue_id = db.Column(db.Integer, db.ForeignKey('Venue.id'), nullable=False)
     artist_id = db.Column(db.Integer, db.ForeignKey('Artist.id'), nullable=False)
     start_time = db.Column(db.DateTime, nullable=False)
+    duration_minutes = db.Column(db.Integer, nullable=False, default=120, server_default='120')
+
+    # on postgres the migrations add exclusion constraints over SHOW_PERIOD_SQL on top, and
+    # partition the table by month of start_time with (id, start_time) as primary key
+    __table_args__ = (
+        db.Index('ix_show_start_time', 'start_time'),
+        db.Index('ix_show_venue_id_start_time', 'venue_id', 'start_time'),
+        db.Index('ix_show_artist_id_start_time', 'artist_id', 'start_time'),
+    )
+
+    @property
+    def end_time(self):
+        return self.start_time + timedelta(minutes=self.duration_minutes)
 
     def __repr__(self):
         return "<Show {}, {}, {}>".format(self.artist_id, self.venue_id, self.start_time)
 
 
+# ----------------------------------------------------------------------------#
+# Booking conflicts.
+# ----------------------------------------------------------------------------#
+
+# the period a show occupies, the same expression as the exclusion constraints of
+# migration 6c1e2f4b9d17_ so postgres answers the overlap check from their GiST indexes
+SHOW_PERIOD_SQL = "tsrange(\"Show\".start_time, \"Show\".start_time + \"Show\".duration_minutes * interval '1 minute')"
+
+
+def show_periods(query):
+    rows = query.with_entities(
+        Show.id, Show.venue_id, Show.artist_id, Show.start_time, Show.duration_minutes
+    ).order_by(Show.id)
+    return [(show_id, venue_id, artist_id, start, start + timedelta(minutes=minutes))
+            for show_id, venue_id, artist_id, start, minutes in rows]
+
+
+def load_show_periods(column, owner_id, up_to_id):
+    return show_periods(Show.query.filter(getattr(Show, column) == owner_id, Show.id <= up_to_id))
+
+
+def load_new_show_periods(after_id):
+    return show_periods(Show.query.filter(Show.id > after_id))
+
+
+def latest_show_id():
+    return db.session.query(db.func.max(Show.id)).scalar() or 0
+
+
+# in-process fallback for databases without range types (sqlite), see bookings.py
+booking_index = BookingIndex(load_show_periods, load_new_show_periods, latest_show_id)
+
+
+def show_conflicts(venue_id, artist_id, start_time, end_time):
+    '''ids of the shows already booking the venue or the artist during [start_time, end_time)'''
+    if db.engine.dialect.name == 'postgresql':
+        # no show lasts longer than MAX_DURATION_MINUTES, so the shows that can overlap start in
+        # (start_time - MAX_DURATION_MINUTES, end_time) and only the month partitions of that
+        # window are scanned, the && check below decides
+        rows = Show.query.with_entities(Show.id).filter(
+            (Show.venue_id == venue_id) | (Show.artist_id == artist_id),
+            Show.start_time > start_time - timedelta(minutes=MAX_DURATION_MINUTES),
+            Show.start_time < end_time,
+            text(SHOW_PERIOD_SQL + ' && tsrange(:period_start, :period_end)').bindparams(
+                period_start=start_time, period_end=end_time)
+        ).order_by(Show.id)
+        return [show_id for show_id, in rows]
+    return booking_index.conflicts(int(venue_id), int(artist_id), start_time, end_time)
+
+
+# ----------------------------------------------------------------------------#
+# Show partitions.
+# ----------------------------------------------------------------------------#
+
+@app.cli.command('show-partitions')
+@click.option('--months-ahead', default=12, show_default=True, help='months to create partitions for')
+@click.option('--months-kept', default=24, show_default=True, help='past months to keep in Show')
+def show_partitions(months_ahead, months_kept):
+    # monthly maintenance (see partitions.py), creates the partitions of the coming months
+    # and archives the old ones
+    if db.engine.dialect.name != 'postgresql':
+        print('Show is only partitioned on postgres, nothing to do')
+        return
+    with db.engine.begin() as connection:
+        created, archived = partitions.maintain(connection, datetime.now(), months_ahead, months_kept)
+    print('created {} partitions, archived {}'.format(
+        ', '.join(created) or 'no', ', '.join(archived) or 'none'))
+
+
+# ----------------------------------------------------------------------------#
+# Venue locations.
+# ----------------------------------------------------------------------------#
+
+def venue_location(city, state):
+    '''latitude, longitude and geohash of a venue, None for cities missing from the gazetteer'''
+    location = geo.locate(city, state)
+    if location is None:
+        return {'latitude': None, 'longitude': None, 'geohash': None}
+    return {'latitude': location[0], 'longitude': location[1], 'geohash': geo.geohash(*location)}
+
+
+def geocode_venue(venue):
+    for column, value in venue_location(venue.city, venue.state).items():
+        setattr(venue, column, value)
+
+
+@app.cli.command('geocode-venues')
+def geocode_venues():
+    # offline backfill of the venues without a location, rerun after extending gazetteer.csv
+    located = 0
+    last_id = 0
+    while True:
+        rows = db.session.query(Venue.id, Venue.city, Venue.state).filter(
+            Venue.latitude.is_(None), Venue.id > last_id
+        ).order_by(Venue.id).limit(1000).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        updates = [dict(venue_location(city, state), id=venue_id) for venue_id, city, state in rows]
+        updates = [update for update in updates if update['geohash'] is not None]
+        if updates:
+            db.session.execute(db.update(Venue), updates)
+            db.session.commit()
+        located += len(updates)
+    print('located {} venues'.format(located))
+
+
+def venues_within(latitude, longitude, miles):
+    '''(miles, id, name, city, state) of the venues within miles of a point, nearest first'''
+    # range scans of ix_Venue_geohash over the cells covering the circle, then the exact distance
+    ranges = [and_(Venue.geohash >= low, Venue.geohash < high) if high else Venue.geohash >= low
+              for low, high in geo.geohash_ranges(geo.covering_cells(latitude, longitude, miles))]
+    rows = db.session.query(
+        Venue.latitude, Venue.longitude, Venue.id, Venue.name, Venue.city, Venue.state
+    ).filter(or_(*ranges))
+    found = []
+    for venue_latitude, venue_longitude, venue_id, name, city, state in rows:
+        distance = geo.miles_between(latitude, longitude, venue_latitude, venue_longitude)
+        if distance <= miles:
+            found.append((distance, venue_id, name, city, state))
+    found.sort()
+    return found
+
+
+# ----------------------------------------------------------------------------#
+# Recommendations.
+# ----------------------------------------------------------------------------#
+
+def match_rows(model, seeking, ids=None, after_id=0):
+    query = db.session.query(model.id, model.genres, model.state, seeking).filter(model.id > after_id)
+    if ids is not None:
+        query = query.filter(model.id.in_(ids))
+    return query.order_by(model.id).all()
+
+
+def load_match_venues(ids=None, after_id=0):
+    return match_rows(Venue, Venue.seeking_talent, ids, after_id)
+
+
+def load_match_artists(ids=None, after_id=0):
+    return match_rows(Artist, Artist.seeking_venue, ids, after_id)
+
+
+def load_match_shows(after_id=0):
+    return db.session.query(Show.id, Show.venue_id, Show.artist_id).filter(Show.id > after_id).order_by(Show.id).all()
+
+
+# top matches of every venue and artist, kept per worker, see matchmaking.py
+matchmaker = Matchmaker(load_match_venues, load_match_artists, load_match_shows)
+
+RECOMMENDATIONS_DEFAULT = 10
+
+
+def recommendations_limit():
+    # ?limit= up to matchmaking.TOP_K, None for a negative limit
+    limit = request.args.get('limit', RECOMMENDATIONS_DEFAULT, type=int)
+    return min(limit, matchmaker.top_k) if limit >= 0 else None
+
+
+def recommendations(model, matches):
+    # the matched venues or artists as JSON, in the order of matches
+    rows = {row.id: row for row in db.session.query(model.id, model.name, model.city, model.state, model.genres).filter(
+        model.id.in_([match_id for match_id, score in matches]))}
+    # genres may be NULL in databases created before migration a5a0296ea09b
+    return [{"id": match_id, "name": rows[match_id].name, "city": rows[match_id].city, "state": rows[match_id].state,
+             "genres": rows[match_id].genres.split(",") if rows[match_id].genres else [], "score": score}
+            for match_id, score in matches if match_id in rows]
+
+
 # ----------------------------------------------------------------------------#
 # Filters.
 # ----------------------------------------------------------------------------#
 
 def format_datetime(value, format='medium'):
+    # imported on first use, only templates rendering dates need them
+    import dateutil.parser
+    import babel.dates
     date = dateutil.parser.parse(str(value))
     if format == 'full':
         format = "EEEE MMMM, d, y 'at' h:mma"
@@ -101,6 +338,27 @@ def format_datetime(value, format='medium'):
 app.jinja_env.filters['datetime'] = format_datetime
 
 
+def load_templates():
+    # compiles every template (or loads it from the bytecode cache) into the template cache
+    templates = app.jinja_env.list_templates(extensions=['html'])
+    for name in templates:
+        app.jinja_env.get_template(name)
+    return templates
+
+
+@app.cli.command('precompile-templates')
+def precompile_templates():
+    # build step, fills JINJA_BYTECODE_CACHE_DIR so no worker compiles a template on a request
+    print('compiled {} templates'.format(len(load_templates())))
+
+
+@app.cli.command('build-assets')
+def build_assets():
+    # build step, fingerprints and precompresses static/ into static/dist/
+    manifest = assets.build(app.static_folder)
+    print('built {} assets, {} precompressed'.format(len(manifest['assets']), len(manifest['encodings'])))
+
+
 # ----------------------------------------------------------------------------#
 # Controllers.
 # ----------------------------------------------------------------------------#
@@ -114,6 +372,7 @@ def index():
 #  ----------------------------------------------------------------
 
 @app.route('/venues')
+@read_only
 def venues():
     data = []
     venue_query_result = Venue.query.with_entities(
@@ -132,7 +391,7 @@ def venues():
             venue_obj = {
                 "id": vn.id,
                 "name": vn.name,
-                "num_upcoming_shows": Show.query.filter(Show.id == vn.id, Show.start_time > datetime.now()).count()
+                "num_upcoming_shows": Show.query.filter(Show.venue_id == vn.id, Show.start_time > datetime.now()).count()
             }
             venues_arr.append(venue_obj)
 
@@ -146,7 +405,43 @@ def venues():
     return render_template('pages/venues.html', areas=data)
 
 
+NEARBY_DEFAULT_MILES = 20
+NEARBY_MAX_MILES = 100
+NEARBY_MAX_VENUES = 100
+
+
+@app.route('/venues/nearby')
+@read_only
+def nearby_venues():
+    # venues within ?miles= of ?lat=&lng= (the browser's position), or of the centre of ?city=&state=,
+    # nearest first as JSON
+    miles = request.args.get('miles', NEARBY_DEFAULT_MILES, type=float)
+    if 'lat' in request.args or 'lng' in request.args:
+        latitude = request.args.get('lat', type=float)
+        longitude = request.args.get('lng', type=float)
+        if latitude is None or longitude is None or not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+            return jsonify({"success": False, "message": "lat and lng must be a position in degrees"}), 400
+    else:
+        location = geo.locate(request.args.get('city', ''), request.args.get('state', ''))
+        if location is None:
+            return jsonify({"success": False, "message": "lat and lng, or a known city and state, are required"}), 400
+        latitude, longitude = location
+    if not 0 < miles <= NEARBY_MAX_MILES:
+        return jsonify({"success": False, "message": "miles must be more than 0 and at most {}".format(NEARBY_MAX_MILES)}), 400
+
+    found = venues_within(latitude, longitude, miles)
+    return jsonify({
+        "lat": latitude,
+        "lng": longitude,
+        "miles": float(miles),
+        "count": len(found),
+        "venues": [{"id": venue_id, "name": name, "city": city, "state": state, "miles": round(distance, 1)}
+                   for distance, venue_id, name, city, state in found[:NEARBY_MAX_VENUES]]
+    })
+
+
 @app.route('/venues/search', methods=['POST'])
+@read_only
 def search_venues():
     # search for Hop should return "The Musical Hop".
     # search for "Music" should return "The Musical Hop" and "Park Square Live Music & Coffee"
@@ -173,39 +468,20 @@ def search_venues():
 
 
 @app.route('/venues/<int:venue_id>')
+@read_only
 def show_venue(venue_id):
     # shows the venue page with the given venue_id
-    venue_query = Venue.query.get(venue_id)
-    data = venue_query.__dict__
-    data["genres"] = data["genres"].split(",")
-
-    data["past_shows"] = []
-    data["past_shows_count"] = Show.query.filter(Show.venue_id == venue_query.id,
-                                                 Show.start_time <= datetime.now()).count()
-    data["upcoming_shows"] = []
-    data["upcoming_shows_count"] = Show.query.filter(Show.venue_id == venue_query.id,
-                                                     Show.start_time > datetime.now()).count()
-
-    join_query = Show.query.join(Artist, Artist.id == Show.artist_id).add_columns(
-        Artist.id.label("artist_id"),
-        Artist.name.label("artist_name"),
-        Artist.image_link.label("artist_image_link"),
-        Show.start_time.label("start_time")
-    )
-
-    if data["past_shows_count"] > 0:
-        data["past_shows"] = join_query.filter(
-            Show.venue_id == venue_query.id,
-            Show.start_time <= datetime.now()
-        ).order_by(Show.start_time).all()
+    venue_row = db.session.query(*[getattr(Venue, field) for field in VENUE_FIELDS]).filter(
+        Venue.id == venue_id
+    ).first()
+    if venue_row is None:
+        abort(404)
 
-    if data["upcoming_shows_count"] > 0:
-        data["upcoming_shows"] = join_query.filter(
-            Show.venue_id == venue_query.id,
-            Show.start_time > datetime.now()
-        ).order_by(Show.start_time).all()
+    shows = db.session.query(
+        Artist.id, Artist.name, Artist.image_link, Show.start_time
+    ).join(Artist, Artist.id == Show.artist_id).filter(Show.venue_id == venue_id).order_by(Show.start_time)
 
-    return render_template('pages/show_venue.html', venue=data)
+    return render_template('pages/show_venue.html', venue=venue_page(venue_row, shows, datetime.now()))
 
 
 #  Create Venue
@@ -213,6 +489,7 @@ def show_venue(venue_id):
 
 @app.route('/venues/create', methods=['GET'])
 def create_venue_form():
+    from forms import VenueForm
     form = VenueForm()
     return render_template('forms/new_venue.html', form=form)
 
@@ -244,6 +521,7 @@ def create_venue_submission():
             seeking_talent=False,
             seeking_description=""
         )
+        geocode_venue(new_venue)
 
         db.session.add(new_venue)
         db.session.commit()
@@ -283,18 +561,75 @@ def delete_venue(venue_id):
         if error:
             return jsonify({"success": False})
 
+    matchmaker.venue_changed(venue_id)
     return jsonify({"success": True})
 
 
+@app.route('/venues/<int:venue_id>/recommended_artists')
+def recommended_artists(venue_id):
+    # ?limit= up to matchmaking.TOP_K, artists the venue has not booked yet
+    limit = recommendations_limit()
+    if limit is None:
+        return jsonify({"success": False, "message": "limit must not be negative"}), 400
+    matches = matchmaker.recommended_artists(venue_id, limit)
+    if matches is None:
+        return jsonify({"success": False, "message": "venue not found"}), 404
+    return jsonify({"venue_id": venue_id, "artists": recommendations(Artist, matches)})
+
+
 #  Artists
 #  ----------------------------------------------------------------
+ARTISTS_PER_PAGE = 50
+# the A-Z counts change only when artists are added or renamed, a short lived copy is good enough
+ARTIST_LETTERS_TTL = 60
+artist_letters_cache = {'expires': 0, 'letters': None}
+artist_letters_lock = threading.Lock()
+
+
+def artist_letters():
+    # {'A': 12, ..., '#': 3} from one grouped query over the first letter of lower(name)
+    with artist_letters_lock:
+        if artist_letters_cache['expires'] > time.monotonic():
+            return artist_letters_cache['letters']
+
+        first_letter = func.substr(func.lower(Artist.name), 1, 1)
+        letters = dict.fromkeys(string.ascii_uppercase, 0)
+        letters['#'] = 0
+        for letter, count in db.session.query(first_letter, func.count()).group_by(first_letter):
+            key = letter.upper() if letter and letter in string.ascii_lowercase else '#'
+            letters[key] += count
+
+        artist_letters_cache.update(expires=time.monotonic() + ARTIST_LETTERS_TTL, letters=letters)
+        return letters
+
+
 @app.route('/artists')
+@read_only
 def artists():
-    artist_query = Artist.query.with_entities(Artist.id, Artist.name).order_by(Artist.id).all()
-    return render_template('pages/artists.html', artists=artist_query)
+    # one page in (lower(name), id) order, ?after=<artist id> continues after that artist,
+    # ?letter=B jumps to the first artist starting with B. Both are seeks on ix_artist_lower_name_id.
+    lower_name = func.lower(Artist.name)
+    query = Artist.query.with_entities(Artist.id, Artist.name)
+
+    after = request.args.get('after', type=int)
+    letter = request.args.get('letter', '').lower()
+    if after is not None:
+        anchor = Artist.query.with_entities(lower_name).filter(Artist.id == after).scalar()
+        if anchor is None:
+            abort(404)
+        # (lower(name), id) > (anchor, after), spelled so that the lower(name) bound is an index seek
+        query = query.filter(lower_name >= anchor, or_(lower_name > anchor, Artist.id > after))
+    elif len(letter) == 1 and letter in string.ascii_lowercase:
+        query = query.filter(lower_name >= letter)
+
+    page = query.order_by(lower_name, Artist.id).limit(ARTISTS_PER_PAGE + 1).all()
+    next_after = page[ARTISTS_PER_PAGE - 1].id if len(page) > ARTISTS_PER_PAGE else None
+    return render_template('pages/artists.html', artists=page[:ARTISTS_PER_PAGE],
+                           letters=artist_letters(), next_after=next_after)
 
 
 @app.route('/artists/search', methods=['POST'])
+@read_only
 def search_artists():
     # search for "A" should return "Guns N Petals", "Matt Quevado", and "The Wild Sax Band".
     # search for "band" should return "The Wild Sax Band".
@@ -321,47 +656,39 @@ def search_artists():
 
 
 @app.route('/artists/<int:artist_id>')
+@read_only
 def show_artist(artist_id):
-    # shows the venue page with the given venue_id
-    artist_query = Artist.query.get(artist_id)
-    data = artist_query.__dict__
-    data["genres"] = data["genres"].split(",")
-
-    data["past_shows"] = []
-    data["past_shows_count"] = Show.query.filter(Show.artist_id == artist_query.id,
-                                                 Show.start_time <= datetime.now()).count()
-    data["upcoming_shows"] = []
-    data["upcoming_shows_count"] = Show.query.filter(Show.artist_id == artist_query.id,
-                                                     Show.start_time > datetime.now()).count()
-
-    join_query = Show.query.join(
-        Venue, Venue.id == Show.venue_id
-    ).add_columns(
-        Venue.id.label("venue_id"),
-        Venue.name.label("venue_name"),
-        Venue.image_link.label("venue_image_link"),
-        Show.start_time.label("start_time")
-    )
-
-    if data["past_shows_count"] > 0:
-        data["past_shows"] = join_query.filter(
-            Show.artist_id == artist_query.id,
-            Show.start_time <= datetime.now()
-        ).order_by(Show.start_time).all()
+    # shows the artist page with the given artist_id
+    artist_row = db.session.query(*[getattr(Artist, field) for field in ARTIST_FIELDS]).filter(
+        Artist.id == artist_id
+    ).first()
+    if artist_row is None:
+        abort(404)
 
-    if data["upcoming_shows_count"] > 0:
-        data["upcoming_shows"] = join_query.filter(
-            Show.artist_id == artist_query.id,
-            Show.start_time > datetime.now()
-        ).order_by(Show.start_time).all()
+    shows = db.session.query(
+        Venue.id, Venue.name, Venue.image_link, Show.start_time
+    ).join(Venue, Venue.id == Show.venue_id).filter(Show.artist_id == artist_id).order_by(Show.start_time)
 
-    return render_template('pages/show_artist.html', artist=data)
+    return render_template('pages/show_artist.html', artist=artist_page(artist_row, shows, datetime.now()))
 
 
 #  Update
 #  ----------------------------------------------------------------
+@app.route('/artists/<int:artist_id>/recommended_venues')
+def recommended_venues(artist_id):
+    # ?limit= up to matchmaking.TOP_K, venues the artist has not played yet
+    limit = recommendations_limit()
+    if limit is None:
+        return jsonify({"success": False, "message": "limit must not be negative"}), 400
+    matches = matchmaker.recommended_venues(artist_id, limit)
+    if matches is None:
+        return jsonify({"success": False, "message": "artist not found"}), 404
+    return jsonify({"artist_id": artist_id, "venues": recommendations(Venue, matches)})
+
+
 @app.route('/artists/<int:artist_id>/edit', methods=['GET'])
 def edit_artist(artist_id):
+    from forms import ArtistForm
     form = ArtistForm()
     return render_template('forms/edit_artist.html', form=form, artist=Artist.query.get(artist_id))
 
@@ -379,6 +706,7 @@ def edit_artist_submission(artist_id):
         artist.genres = ", ".join(request.form.getlist("genres"))
         artist.facebook_link = request.form["facebook_link"]
         db.session.commit()
+        matchmaker.artist_changed(artist_id)
 
     except:
         error = True
@@ -397,6 +725,7 @@ def edit_artist_submission(artist_id):
 
 @app.route('/venues/<int:venue_id>/edit', methods=['GET'])
 def edit_venue(venue_id):
+    from forms import VenueForm
     form = VenueForm()
     return render_template('forms/edit_venue.html', form=form, venue=Venue.query.get(venue_id))
 
@@ -414,7 +743,9 @@ def edit_venue_submission(venue_id):
         venue.phone = request.form["phone"]
         venue.genres = ", ".join(request.form.getlist("genres"))
         venue.facebook_link = request.form["facebook_link"]
+        geocode_venue(venue)
         db.session.commit()
+        matchmaker.venue_changed(venue_id)
 
     except:
         error = True
@@ -436,6 +767,7 @@ def edit_venue_submission(venue_id):
 
 @app.route('/artists/create', methods=['GET'])
 def create_artist_form():
+    from forms import ArtistForm
     form = ArtistForm()
     return render_template('forms/new_artist.html', form=form)
 
@@ -489,6 +821,7 @@ def create_artist_submission():
 #  ----------------------------------------------------------------
 
 @app.route('/shows')
+@read_only
 def shows():
     # displays list of shows at /shows
     data = Show.query.join(
@@ -507,9 +840,53 @@ def shows():
     return render_template('pages/shows.html', shows=data)
 
 
+CALENDAR_MAX_DAYS = 366
+
+
+@app.route('/shows/calendar')
+@read_only
+def shows_calendar():
+    # shows starting in [from, to) as compact JSON grouped by day, for calendar widgets
+    # ?from=2020-06-01&to=2020-07-01&venue_id=1&artist_id=2, from defaults to today, to to a month later
+    import dateutil.parser
+    try:
+        start = dateutil.parser.parse(request.args['from']) if 'from' in request.args else \
+            datetime.combine(datetime.today(), datetime.min.time())
+        end = dateutil.parser.parse(request.args['to']) if 'to' in request.args else start + timedelta(days=31)
+        venue_id = request.args.get('venue_id', type=int)
+        artist_id = request.args.get('artist_id', type=int)
+    except (ValueError, OverflowError):
+        return jsonify({"success": False, "message": "from and to must be dates"}), 400
+    if not start < end <= start + timedelta(days=CALENDAR_MAX_DAYS):
+        return jsonify({"success": False,
+                        "message": "to must be after from and at most {} days later".format(CALENDAR_MAX_DAYS)}), 400
+
+    # a range scan of ix_show_start_time, or of the venue/artist composite indexes when filtered
+    query = db.session.query(
+        Show.start_time, Show.id, Show.venue_id, Show.artist_id, Show.duration_minutes
+    ).filter(Show.start_time >= start, Show.start_time < end)
+    if venue_id is not None:
+        query = query.filter(Show.venue_id == venue_id)
+    if artist_id is not None:
+        query = query.filter(Show.artist_id == artist_id)
+
+    days = {}
+    for start_time, show_id, show_venue_id, show_artist_id, duration in query.order_by(Show.start_time, Show.id):
+        days.setdefault(start_time.date().isoformat(), []).append(
+            [show_id, show_venue_id, show_artist_id, start_time.strftime('%H:%M'), duration])
+
+    return jsonify({
+        "from": start.isoformat(),
+        "to": end.isoformat(),
+        "fields": ["id", "venue_id", "artist_id", "time", "duration_minutes"],
+        "days": days
+    })
+
+
 @app.route('/shows/create')
 def create_shows():
     # renders form. do not touch.
+    from forms import ShowForm
     form = ShowForm()
     return render_template('forms/new_show.html', form=form)
 
@@ -517,22 +894,34 @@ def create_shows():
 @app.route('/shows/create', methods=['POST'])
 def create_show_submission():
     # called to create new shows in the db, upon submitting new show listing form
+    import dateutil.parser
     error = False
+    conflicts = []
     form_data = {}
 
     try:
-        form_data["artist_id"] = request.form["artist_id"]
-        form_data["venue_id"] = request.form["venue_id"]
-        form_data["start_time"] = request.form["start_time"]
+        form_data["artist_id"] = int(request.form["artist_id"])
+        form_data["venue_id"] = int(request.form["venue_id"])
+        form_data["start_time"] = dateutil.parser.parse(request.form["start_time"])
+        form_data["duration_minutes"] = int(request.form.get("duration_minutes", 120))
+        if not 1 <= form_data["duration_minutes"] <= MAX_DURATION_MINUTES:
+            raise ValueError('duration_minutes out of range')
 
         new_show = Show(
             artist_id=form_data["artist_id"],
             venue_id=form_data["venue_id"],
-            start_time=form_data["start_time"]
+            start_time=form_data["start_time"],
+            duration_minutes=form_data["duration_minutes"]
         )
 
-        db.session.add(new_show)
-        db.session.commit()
+        if db.engine.dialect.name == 'sqlite':
+            # no exclusion constraints to catch a show listed by another worker between the
+            # check and the insert, so the write lock is taken before the check
+            db.session.connection().exec_driver_sql('BEGIN IMMEDIATE')
+        conflicts = show_conflicts(new_show.venue_id, new_show.artist_id, new_show.start_time, new_show.end_time)
+        if not conflicts:
+            db.session.add(new_show)
+            db.session.commit()
 
     except:
         error = True
@@ -543,6 +932,8 @@ def create_show_submission():
         db.session.close()
         if error:
             flash('An error occurred. Show could not be listed.')
+        elif conflicts:
+            flash('Show could not be listed. The venue or the artist is already booked at that time.')
         else:
             flash('Show was successfully listed!')
 
@@ -560,7 +951,7 @@ def server_error(error):
 
 
 if not app.debug:
-    file_handler = FileHandler('error.log')
+    file_handler = FileHandler(app.config['ERROR_LOG'])
     file_handler.setFormatter(
         Formatter('%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]')
     )
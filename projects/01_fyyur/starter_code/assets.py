@@ -0,0 +1,137 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import posixpath
+import re
+import shutil
+
+from flask import send_from_directory
+
+try:
+    import brotli
+except ImportError:
+    # optional, without it only gzip variants are built
+    brotli = None
+
+# Fingerprinted static assets. `flask build-assets` copies every file of static/ to
+# static/dist/ under a name containing a hash of its content, next to .br and .gz
+# variants of the text files. The hashed names never change content, so they are
+# served with a year long immutable Cache-Control and browsers stop revalidating them.
+
+BUILD_DIR = 'dist'
+MANIFEST = 'manifest.json'
+MAX_AGE = 365 * 24 * 3600
+COMPRESSIBLE = {'.css', '.js', '.map', '.svg', '.ttf', '.otf', '.eot', '.json', '.txt', '.html'}
+# preferred first
+ENCODINGS = [('br', '.br'), ('gzip', '.gz')]
+
+# url(...) in stylesheets and sourceMappingURL comments in scripts point at other assets
+REFERENCE = re.compile(r'''url\(\s*(['"]?)([^'")]+)\1\s*\)|(sourceMappingURL=)(\S+)''')
+
+
+def fingerprint(path, content):
+    root, ext = posixpath.splitext(path)
+    return '{}.{}{}'.format(root, hashlib.sha256(content).hexdigest()[:12], ext)
+
+
+def rewrite_references(path, content, assets):
+    '''content of the asset at path with its references to other assets replaced by their hashed names'''
+    base = posixpath.dirname(path)
+
+    def hashed(reference):
+        # keeps ?query and #fragment, leaves absolute urls and unknown files alone
+        target, suffix = re.match(r'([^?#]*)(.*)', reference).groups()
+        if not target or '//' in reference or reference.startswith(('/', 'data:')):
+            return reference
+        resolved = posixpath.normpath(posixpath.join(base, target))
+        if resolved not in assets:
+            return reference
+        return posixpath.relpath(assets[resolved], posixpath.join(BUILD_DIR, base)) + suffix
+
+    def replace(match):
+        if match.group(2) is not None:
+            return 'url({0}{1}{0})'.format(match.group(1), hashed(match.group(2)))
+        return match.group(3) + hashed(match.group(4))
+
+    return REFERENCE.sub(replace, content.decode('utf-8')).encode('utf-8')
+
+
+def compressed_variants(content):
+    variants = {}
+    if brotli is not None:
+        variants['br'] = brotli.compress(content, quality=11)
+    # mtime=0 so rebuilding the same file gives the same bytes
+    variants['gzip'] = gzip.compress(content, 9, mtime=0)
+    return {encoding: data for encoding, data in variants.items() if len(data) < len(content)}
+
+
+def build(static_folder):
+    '''fingerprint and precompress static_folder into static_folder/dist, returns the manifest'''
+    build_dir = os.path.join(static_folder, BUILD_DIR)
+    shutil.rmtree(build_dir, ignore_errors=True)
+
+    paths = []
+    for root, dirs, files in os.walk(static_folder):
+        dirs[:] = sorted(d for d in dirs if os.path.join(root, d) != build_dir)
+        for name in sorted(files):
+            if not name.startswith('.'):
+                paths.append(os.path.relpath(os.path.join(root, name), static_folder).replace(os.sep, '/'))
+    # stylesheets and scripts last, the files they reference must be hashed first
+    paths.sort(key=lambda path: posixpath.splitext(path)[1] in ('.css', '.js'))
+
+    assets, encodings = {}, {}
+    for path in paths:
+        with open(os.path.join(static_folder, path), 'rb') as f:
+            content = f.read()
+        ext = posixpath.splitext(path)[1]
+        if ext in ('.css', '.js'):
+            content = rewrite_references(path, content, assets)
+        hashed = BUILD_DIR + '/' + fingerprint(path, content)
+        assets[path] = hashed
+
+        target = os.path.join(static_folder, hashed)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, 'wb') as f:
+            f.write(content)
+        if ext in COMPRESSIBLE:
+            variants = compressed_variants(content)
+            for encoding, suffix in ENCODINGS:
+                if encoding in variants:
+                    with open(target + suffix, 'wb') as f:
+                        f.write(variants[encoding])
+            encodings[hashed] = [encoding for encoding, _ in ENCODINGS if encoding in variants]
+
+    manifest = {'assets': assets, 'encodings': encodings}
+    with open(os.path.join(build_dir, MANIFEST), 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    return manifest
+
+
+def load_manifest(static_folder):
+    '''the manifest of the last build, None when the assets were never built'''
+    try:
+        with open(os.path.join(static_folder, BUILD_DIR, MANIFEST)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def send_asset(static_folder, filename, available, accept_encodings):
+    '''the hashed asset, as the best precompressed variant the client accepts'''
+    for encoding, suffix in ENCODINGS:
+        if encoding in available and accept_encodings[encoding]:
+            break
+    else:
+        encoding = suffix = None
+
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    response = send_from_directory(static_folder, filename + (suffix or ''), mimetype=mimetype, max_age=MAX_AGE)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    if available:
+        response.vary.add('Accept-Encoding')
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
@@ -0,0 +1,85 @@
+# ----------------------------------------------------------------------------#
+# Static assets of a page view: raw static/ files vs the built assets.
+#
+#   python bench_assets.py --requests 200
+#
+# Builds the assets (flask build-assets), then loads the home page's stylesheets
+# and scripts as a browser would: the raw files with their default no-cache
+# revalidation, and the fingerprinted files with their precompressed variants.
+# Reports bytes and requests of a first and a repeat view, and the time per
+# asset request against gzip compressing the raw file on every request.
+# ----------------------------------------------------------------------------#
+
+import argparse
+import gzip
+import os
+import re
+import statistics
+import tempfile
+import time
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark serving of the built static assets')
+    parser.add_argument('--requests', type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['DATABASE_URL'] = 'sqlite:///{}'.format(os.path.join(tmp, 'fyyur.db'))
+        os.environ['FYYUR_PRODUCTION'] = '1'
+        os.environ['FYYUR_ERROR_LOG'] = os.path.join(tmp, 'error.log')
+        import assets
+        assets.build(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static'))
+        from app import app, db, asset_manifest
+        with app.app_context():
+            db.create_all()
+
+        client = app.test_client()
+        html = client.get('/').get_data(as_text=True)
+        raw_paths = {'/static/' + hashed: '/static/' + path for path, hashed in asset_manifest['assets'].items()}
+        hashed_urls = [url for url in re.findall(r'(?:href|src)="(/static/[^"]+)"', html)
+                       if url in raw_paths and url.endswith(('.css', '.js'))]
+        raw_urls = [raw_paths[url] for url in hashed_urls]
+
+        def view(urls, encoding, etags=None):
+            sent, responses = 0, {}
+            for url in urls:
+                headers = {'Accept-Encoding': encoding}
+                if etags and url in etags:
+                    headers['If-None-Match'] = etags[url]
+                res = client.get(url, headers=headers)
+                sent += len(res.data)
+                responses[url] = res
+            return sent, responses
+
+        raw_sent, raw_responses = view(raw_urls, 'gzip, deflate, br')
+        raw_etags = {url: res.headers['ETag'] for url, res in raw_responses.items()}
+        raw_repeat, _ = view(raw_urls, 'gzip, deflate, br', raw_etags)
+        built_sent, built_responses = view(hashed_urls, 'gzip, deflate, br')
+        immutable = all('immutable' in res.headers['Cache-Control'] for res in built_responses.values())
+
+        def per_request(url, encoding, compress=False):
+            times = []
+            for _ in range(args.requests):
+                began = time.perf_counter()
+                body = client.get(url, headers={'Accept-Encoding': encoding}).data
+                if compress:
+                    gzip.compress(body, 6)
+                times.append(time.perf_counter() - began)
+            return statistics.median(times) * 1e6
+
+        largest = max(hashed_urls, key=lambda url: len(client.get(url, headers={'Accept-Encoding': 'identity'}).data))
+
+    print('home page, {} stylesheets and scripts'.format(len(hashed_urls)))
+    print('raw static/      first view {:7.1f} KiB, repeat view {} revalidations ({:.1f} KiB)'.format(
+        raw_sent / 1024, len(raw_urls), raw_repeat / 1024))
+    print('built assets     first view {:7.1f} KiB, repeat view {} requests (immutable: {})'.format(
+        built_sent / 1024, 0 if immutable else len(hashed_urls), immutable))
+    print('{} per request:'.format(largest))
+    print('  raw file                       {:8.1f} us'.format(per_request(raw_paths[largest], 'identity')))
+    print('  gzip at request time           {:8.1f} us'.format(per_request(raw_paths[largest], 'identity', True)))
+    print('  precompressed variant          {:8.1f} us'.format(per_request(largest, 'gzip, deflate, br')))
+
+
+if __name__ == '__main__':
+    main()
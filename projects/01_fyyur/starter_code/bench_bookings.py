@@ -0,0 +1,84 @@
+# ----------------------------------------------------------------------------#
+# Booking conflict checks against a venue with a long show history.
+#
+#   python bench_bookings.py --shows 100000 --checks 1000
+#
+# Seeds a scratch sqlite database with one venue holding --shows historical
+# shows, then times the overlap check done by create_show_submission:
+# scanning every show of the venue and artist per check, against the
+# in-process interval index (bookings.py) used where there are no range types.
+# ----------------------------------------------------------------------------#
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ARTISTS = 50
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark show booking conflict checks')
+    parser.add_argument('--shows', type=int, default=100000)
+    parser.add_argument('--checks', type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['DATABASE_URL'] = 'sqlite:///{}'.format(os.path.join(tmp, 'fyyur.db'))
+        from app import app, db, Venue, Artist, Show, show_conflicts, booking_index
+
+        first = datetime(2000, 1, 1, 20)
+        with app.app_context():
+            db.create_all()
+            db.session.add(Venue(name='venue', city='City', state='CA', address='1 Main St', genres='Jazz'))
+            for i in range(ARTISTS):
+                db.session.add(Artist(name='artist {}'.format(i), city='City', state='CA', genres='Jazz'))
+            db.session.commit()
+            # one show a night, 3 hours each, so some checks collide and most do not
+            db.session.execute(Show.__table__.insert(), [{
+                'venue_id': 1, 'artist_id': 1 + i % ARTISTS,
+                'start_time': first + timedelta(days=i), 'duration_minutes': 180
+            } for i in range(args.shows)])
+            db.session.commit()
+
+            rng = random.Random(0)
+            span = args.shows * 24
+            checks = []
+            for _ in range(args.checks):
+                start = first + timedelta(hours=rng.randrange(span), minutes=rng.choice([0, 30]))
+                checks.append((1, 1 + rng.randrange(ARTISTS), start, start + timedelta(minutes=120)))
+
+            def naive(venue_id, artist_id, start, end):
+                shows = Show.query.filter((Show.venue_id == venue_id) | (Show.artist_id == artist_id)).all()
+                return sorted(show.id for show in shows if show.start_time < end and show.end_time > start)
+
+            naive_checks = checks[:max(1, args.checks // 100)]
+            began = time.perf_counter()
+            expected = [naive(*check) for check in naive_checks]
+            naive_time = (time.perf_counter() - began) / len(naive_checks)
+            db.session.remove()
+
+            booking_index.clear()
+            assert [show_conflicts(*check) for check in naive_checks] == expected
+
+            booking_index.clear()
+            began = time.perf_counter()
+            for check in checks:
+                show_conflicts(*check)
+            cold_time = time.perf_counter() - began
+
+            began = time.perf_counter()
+            found = sum(1 for check in checks if show_conflicts(*check))
+            warm_time = (time.perf_counter() - began) / len(checks)
+
+        print('{} shows at one venue, {} checks ({} conflicting)'.format(args.shows, len(checks), found))
+        print('scan all shows per check  {:10.1f} ms/check'.format(naive_time * 1000))
+        print('interval index, cold      {:10.1f} ms for all checks (loads the venue and {} artist histories)'.format(
+            cold_time * 1000, ARTISTS))
+        print('interval index, warm      {:10.1f} us/check (incremental refresh + overlap query)'.format(warm_time * 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+# ----------------------------------------------------------------------------#
+# Window queries of /shows/calendar over a large show history.
+#
+#   python bench_calendar.py --shows 1000000
+#   python bench_calendar.py --shows 10000000     # ~2 GB scratch database
+#
+# Seeds a scratch sqlite database with --shows shows spread over ten years,
+# then times full requests (query, grouping and JSON) for windows of one year
+# of a venue, one year of an artist and one day of every venue.
+# ----------------------------------------------------------------------------#
+
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+VENUES = 1000
+ARTISTS = 5000
+YEARS = 10
+
+
+def seed(path, shows):
+    connection = sqlite3.connect(path)
+    with connection:
+        connection.executemany('INSERT INTO "Venue" (id, name, city, state, address, genres) VALUES (?, ?, ?, ?, ?, ?)',
+                               ((i, 'venue {}'.format(i), 'City', 'CA', '1 Main St', 'Jazz') for i in range(1, VENUES + 1)))
+        connection.executemany('INSERT INTO "Artist" (id, name, city, state, genres) VALUES (?, ?, ?, ?, ?)',
+                               ((i, 'artist {}'.format(i), 'City', 'CA', 'Jazz') for i in range(1, ARTISTS + 1)))
+        first = datetime(2015, 1, 1)
+        step = YEARS * 365 * 24 * 3600 / shows
+        rng = random.Random(0)
+        connection.executemany(
+            'INSERT INTO "Show" (venue_id, artist_id, start_time, duration_minutes) VALUES (?, ?, ?, 120)',
+            ((rng.randint(1, VENUES), rng.randint(1, ARTISTS),
+              (first + timedelta(seconds=int(i * step))).strftime('%Y-%m-%d %H:%M:%S.000000')) for i in range(shows)))
+    connection.execute('ANALYZE')
+    connection.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark /shows/calendar window queries')
+    parser.add_argument('--shows', type=int, default=1000000)
+    parser.add_argument('--requests', type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'fyyur.db')
+        os.environ['DATABASE_URL'] = 'sqlite:///{}'.format(path)
+        from app import app, db
+        with app.app_context():
+            db.create_all()
+        began = time.perf_counter()
+        seed(path, args.shows)
+        print('seeded {} shows in {:.0f} s'.format(args.shows, time.perf_counter() - began))
+
+        client = app.test_client()
+        rng = random.Random(1)
+        windows = {
+            'one venue, one year': lambda day: '&venue_id={}'.format(rng.randint(1, VENUES)),
+            'one artist, one year': lambda day: '&artist_id={}'.format(rng.randint(1, ARTISTS)),
+            'every venue, one day': None,
+        }
+        for label, extra in windows.items():
+            times, rows = [], []
+            for _ in range(args.requests):
+                start = datetime(2015, 1, 1) + timedelta(days=rng.randrange((YEARS - 1) * 365))
+                end = start + timedelta(days=365 if extra else 1)
+                url = '/shows/calendar?from={}&to={}{}'.format(start.date(), end.date(), extra(start) if extra else '')
+                began = time.perf_counter()
+                res = client.get(url)
+                times.append(time.perf_counter() - began)
+                rows.append(sum(len(shows) for shows in res.get_json()['days'].values()))
+            print('{:<22} median {:7.2f} ms  p90 {:7.2f} ms  ({:.0f} shows per response)'.format(
+                label, statistics.median(times) * 1000, sorted(times)[int(len(times) * 0.9)] * 1000,
+                statistics.mean(rows)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+# ----------------------------------------------------------------------------#
+# Artist / venue recommendations over a large roster.
+#
+#   python bench_matchmaking.py --venues 5000 --artists 50000 --shows 200000
+#
+# Seeds a scratch sqlite database, then times: scoring one venue against every
+# artist in pure Python (what a request would do without matchmaking.py), the
+# full build of the NumPy top-k cache, cached requests, and the incremental
+# refresh after a new show and after an artist edit.
+# ----------------------------------------------------------------------------#
+
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+from datetime import datetime
+
+from enums import Genre, State
+
+
+def seed(path, venues, artists, shows):
+    rng = random.Random(0)
+    genres = [genre.name for genre in Genre]
+    states = [state.value for state in State]
+    connection = sqlite3.connect(path)
+    with connection:
+        connection.executemany(
+            'INSERT INTO "Venue" (id, name, city, state, address, genres, seeking_talent) VALUES (?, ?, ?, ?, ?, ?, ?)',
+            ((i, 'venue {}'.format(i), 'City', rng.choice(states), '1 Main St', ', '.join(rng.sample(genres, 2)),
+              rng.random() < 0.3) for i in range(1, venues + 1)))
+        connection.executemany(
+            'INSERT INTO "Artist" (id, name, city, state, genres, seeking_venue) VALUES (?, ?, ?, ?, ?, ?)',
+            ((i, 'artist {}'.format(i), 'City', rng.choice(states), ', '.join(rng.sample(genres, rng.randint(1, 3))),
+              rng.random() < 0.3) for i in range(1, artists + 1)))
+        connection.executemany(
+            'INSERT INTO "Show" (venue_id, artist_id, start_time, duration_minutes) VALUES (?, ?, ?, 120)',
+            ((rng.randint(1, venues), rng.randint(1, artists), '2020-01-01 20:00:00.000000') for _ in range(shows)))
+    connection.close()
+
+
+def python_scores(venue, artists, booked):
+    # the same score as matchmaking.py, one artist at a time
+    from matchmaking import GENRE_WEIGHT, STATE_WEIGHT, SEEKING_BOOST
+    venue_genres = {genre.strip() for genre in venue.genres.split(',')}
+    scores = []
+    for artist in artists:
+        if artist.id in booked:
+            continue
+        artist_genres = {genre.strip() for genre in artist.genres.split(',')}
+        score = GENRE_WEIGHT * len(venue_genres & artist_genres) / (len(venue_genres) * len(artist_genres)) ** 0.5
+        score += STATE_WEIGHT * (venue.state == artist.state)
+        scores.append((score * (1 + SEEKING_BOOST * artist.seeking_venue), artist.id))
+    return sorted(scores, reverse=True)[:10]
+
+
+def timed(function, repeat):
+    times = []
+    for _ in range(repeat):
+        began = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - began)
+    return statistics.median(times) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark artist / venue recommendations')
+    parser.add_argument('--venues', type=int, default=5000)
+    parser.add_argument('--artists', type=int, default=50000)
+    parser.add_argument('--shows', type=int, default=200000)
+    parser.add_argument('--requests', type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'fyyur.db')
+        os.environ['DATABASE_URL'] = 'sqlite:///{}'.format(path)
+        from app import app, db, Venue, Artist, Show, matchmaker
+        with app.app_context():
+            db.create_all()
+        seed(path, args.venues, args.artists, args.shows)
+
+        rng = random.Random(1)
+        client = app.test_client()
+        with app.app_context():
+            def python_request():
+                venue = db.session.get(Venue, rng.randint(1, args.venues))
+                booked = {artist_id for artist_id, in db.session.query(Show.artist_id).filter(Show.venue_id == venue.id)}
+                python_scores(venue, Artist.query.all(), booked)
+                db.session.remove()
+            python_time = timed(python_request, 3)
+
+        build_time = timed(lambda: (matchmaker.clear(), client.get('/venues/1/recommended_artists')), 3)
+        cached_time = timed(lambda: client.get('/venues/{}/recommended_artists'.format(rng.randint(1, args.venues))),
+                            args.requests)
+        reverse_time = timed(lambda: client.get('/artists/{}/recommended_venues'.format(rng.randint(1, args.artists))),
+                             args.requests)
+
+        def new_show():
+            with app.app_context():
+                db.session.add(Show(venue_id=rng.randint(1, args.venues), artist_id=rng.randint(1, args.artists),
+                                    start_time=datetime(2021, 1, 1)))
+                db.session.commit()
+            began = time.perf_counter()
+            client.get('/venues/1/recommended_artists')
+            return time.perf_counter() - began
+
+        def artist_edit():
+            artist_id = rng.randint(1, args.artists)
+            with app.app_context():
+                db.session.get(Artist, artist_id).genres = rng.choice([genre.name for genre in Genre])
+                db.session.commit()
+            matchmaker.artist_changed(artist_id)
+            began = time.perf_counter()
+            client.get('/venues/1/recommended_artists')
+            return time.perf_counter() - began
+
+        show_refresh = statistics.median(new_show() for _ in range(args.requests)) * 1000
+        edit_refresh = statistics.median(artist_edit() for _ in range(args.requests)) * 1000
+
+    print('{} venues, {} artists, {} shows'.format(args.venues, args.artists, args.shows))
+    print('python scoring per request        {:9.1f} ms'.format(python_time))
+    print('numpy build (all top-k lists)     {:9.1f} ms'.format(build_time))
+    print('cached recommended_artists        {:9.2f} ms'.format(cached_time))
+    print('cached recommended_venues         {:9.2f} ms'.format(reverse_time))
+    print('request after a new show          {:9.2f} ms'.format(show_refresh))
+    print('request after an artist edit      {:9.2f} ms'.format(edit_refresh))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+# ----------------------------------------------------------------------------#
+# Radius queries of /venues/nearby over a large venue table.
+#
+#   python bench_nearby.py --venues 1000000
+#
+# Seeds a scratch sqlite database with --venues venues scattered up to 60
+# miles around the gazetteer cities, then times 20 mile queries around random
+# cities: a bounding box over latitude/longitude (no spatial index, a table
+# scan) against the geohash range scans of venues_within.
+# ----------------------------------------------------------------------------#
+
+import argparse
+import math
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+
+import geo
+
+MILES = 20
+
+
+def seed(path, venues):
+    rng = random.Random(0)
+    cities = sorted(geo.gazetteer().items())
+
+    def rows():
+        for i in range(1, venues + 1):
+            (city, state), (latitude, longitude) = rng.choice(cities)
+            # uniform over a disc of 60 miles around the city centre
+            distance, bearing = 60 * math.sqrt(rng.random()), rng.random() * 2 * math.pi
+            latitude += distance * math.cos(bearing) / geo.MILES_PER_DEGREE
+            longitude += distance * math.sin(bearing) / (geo.MILES_PER_DEGREE * math.cos(math.radians(latitude)))
+            yield (i, 'venue {}'.format(i), city, state, '1 Main St', 'Jazz',
+                   latitude, longitude, geo.geohash(latitude, longitude))
+
+    connection = sqlite3.connect(path)
+    with connection:
+        connection.executemany(
+            'INSERT INTO "Venue" (id, name, city, state, address, genres, latitude, longitude, geohash) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', rows())
+    connection.execute('ANALYZE')
+    connection.close()
+
+
+def bounding_box(connection, latitude, longitude, miles):
+    lat_span = miles / geo.MILES_PER_DEGREE
+    lng_span = miles / (geo.MILES_PER_DEGREE * math.cos(math.radians(abs(latitude) + lat_span)))
+    rows = connection.execute(
+        'SELECT latitude, longitude, id FROM "Venue" WHERE latitude BETWEEN ? AND ? AND longitude BETWEEN ? AND ?',
+        (latitude - lat_span, latitude + lat_span, longitude - lng_span, longitude + lng_span))
+    return sorted(venue_id for venue_latitude, venue_longitude, venue_id in rows
+                  if geo.miles_between(latitude, longitude, venue_latitude, venue_longitude) <= miles)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark /venues/nearby radius queries')
+    parser.add_argument('--venues', type=int, default=1000000)
+    parser.add_argument('--queries', type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'fyyur.db')
+        os.environ['DATABASE_URL'] = 'sqlite:///{}'.format(path)
+        from app import app, db, venues_within
+        with app.app_context():
+            db.create_all()
+        began = time.perf_counter()
+        seed(path, args.venues)
+        print('seeded {} venues in {:.0f} s'.format(args.venues, time.perf_counter() - began))
+
+        rng = random.Random(1)
+        centres = [rng.choice(sorted(geo.gazetteer().values())) for _ in range(args.queries)]
+        connection = sqlite3.connect(path)
+        scan_times, index_times, request_times, found = [], [], [], []
+        with app.app_context():
+            for latitude, longitude in centres:
+                began = time.perf_counter()
+                expected = bounding_box(connection, latitude, longitude, MILES)
+                scan_times.append(time.perf_counter() - began)
+
+                began = time.perf_counter()
+                venues = venues_within(latitude, longitude, MILES)
+                index_times.append(time.perf_counter() - began)
+                assert sorted(venue[1] for venue in venues) == expected
+                found.append(len(venues))
+                db.session.remove()
+
+        client = app.test_client()
+        for latitude, longitude in centres:
+            began = time.perf_counter()
+            client.get('/venues/nearby?lat={}&lng={}&miles={}'.format(latitude, longitude, MILES))
+            request_times.append(time.perf_counter() - began)
+
+    print('{} mile radius, {:.0f} venues found on average'.format(MILES, statistics.mean(found)))
+    for label, times in [('bounding box scan', scan_times), ('geohash ranges', index_times),
+                         ('GET /venues/nearby', request_times)]:
+        print('{:<20} median {:8.2f} ms  p90 {:8.2f} ms'.format(
+            label, statistics.median(times) * 1000, sorted(times)[int(len(times) * 0.9)] * 1000))
+
+
+if __name__ == '__main__':
+    main()
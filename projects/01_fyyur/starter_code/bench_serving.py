@@ -0,0 +1,134 @@
+# ----------------------------------------------------------------------------#
+# Load benchmark: app.run() dev server vs the production servers in serve.py.
+#
+#   python bench_serving.py --clients 32 --duration 10
+#
+# Every server runs as a subprocess against the same scratch sqlite database.
+# Clients are threads with keep-alive connections cycling through the main
+# pages. Reports requests/sec and p50/p99 latency per server.
+# ----------------------------------------------------------------------------#
+
+import argparse
+import http.client
+import importlib.util
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+PATHS = ['/venues', '/artists', '/venues/1', '/artists/1', '/shows']
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def seed(database_url, venues):
+    os.environ['DATABASE_URL'] = database_url
+    from app import app, db, Venue, Artist, Show
+    with app.app_context():
+        db.create_all()
+        for i in range(venues):
+            db.session.add(Venue(name='venue {}'.format(i), city='City {}'.format(i % 10), state='CA',
+                                 address='1 Main St', genres='Jazz, Rock n Roll'))
+            db.session.add(Artist(name='artist {}'.format(i), city='City {}'.format(i % 10), state='CA', genres='Jazz'))
+        db.session.flush()
+        for i in range(venues * 5):
+            db.session.add(Show(venue_id=1 + i % venues, artist_id=1 + i % venues,
+                                start_time=datetime.now() + timedelta(days=i % 60 - 30)))
+        db.session.commit()
+
+
+def wait_until_up(port, process, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError('server exited with {}'.format(process.returncode))
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.2).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError('server did not come up')
+
+
+def client(port, deadline, latencies, errors):
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    i = 0
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            connection.request('GET', PATHS[i % len(PATHS)])
+            response = connection.getresponse()
+            response.read()
+            if response.status != 200:
+                errors.append(response.status)
+            latencies.append(time.perf_counter() - start)
+        except (OSError, http.client.HTTPException) as e:
+            errors.append(e)
+            connection.close()
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        i += 1
+
+
+def load(port, clients, duration):
+    latencies, errors = [], []
+    deadline = time.perf_counter() + duration
+    threads = [threading.Thread(target=client, args=(port, deadline, latencies, errors)) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test app.run() against serve.py')
+    parser.add_argument('--clients', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--venues', type=int, default=200)
+    parser.add_argument('--workers', type=int, help='gunicorn workers, defaults to serve.py (2 * cores + 1)')
+    args = parser.parse_args()
+
+    servers = {
+        'app.run()': lambda port: [sys.executable, '-c',
+                                   'from app import app; app.run(port={}, debug=False)'.format(port)],
+        'gunicorn': lambda port: [sys.executable, 'serve.py', '--server', 'gunicorn', '--bind', '127.0.0.1:{}'.format(port)]
+        + (['--workers', str(args.workers)] if args.workers else []),
+    }
+    if importlib.util.find_spec('waitress'):
+        servers['waitress'] = lambda port: [sys.executable, 'serve.py', '--server', 'waitress',
+                                            '--bind', '127.0.0.1:{}'.format(port)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = 'sqlite:///{}'.format(os.path.join(tmp, 'fyyur.db'))
+        seed(database_url, args.venues)
+        env = dict(os.environ, DATABASE_URL=database_url)
+
+        for name, command in servers.items():
+            port = free_port()
+            process = subprocess.Popen(command(port), env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            try:
+                wait_until_up(port, process)
+                latencies, errors = load(port, args.clients, args.duration)
+            finally:
+                process.terminate()
+                process.wait()
+
+            latencies.sort()
+            print('{:<10} {:8.1f} req/s  p50 {:7.1f} ms  p99 {:7.1f} ms  errors {}'.format(
+                name, len(latencies) / args.duration,
+                statistics.median(latencies) * 1000 if latencies else 0,
+                latencies[int(len(latencies) * 0.99)] * 1000 if latencies else 0,
+                len(errors)))
+
+
+if __name__ == '__main__':
+    main()
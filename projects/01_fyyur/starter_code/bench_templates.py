@@ -0,0 +1,89 @@
+# ----------------------------------------------------------------------------#
+# First-request latency per route, with and without compiled templates.
+#
+#   python bench_templates.py --rounds 5
+#
+# Every measurement is a fresh process that imports the app and times its
+# first request to one route, in three modes:
+#   compile on request   no bytecode cache, templates compiled on first hit
+#   bytecode cache       templates loaded from the precompiled cache
+#   warmed up            FYYUR_PRODUCTION=1 and serve.warm_up() before the
+#                        first request, what serve.py does in the master
+# ----------------------------------------------------------------------------#
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROUTES = ['/', '/venues', '/artists', '/shows', '/venues/1', '/artists/1',
+          '/venues/create', '/artists/create', '/shows/create']
+
+CHILD = '''
+import sys, time
+from app import app
+if sys.argv[2] == 'warm':
+    from serve import warm_up
+    warm_up()
+client = app.test_client()
+start = time.perf_counter()
+assert client.get(sys.argv[1]).status_code == 200
+first = time.perf_counter() - start
+start = time.perf_counter()
+client.get(sys.argv[1])
+print(first, time.perf_counter() - start)
+'''
+
+
+def seed(database_url):
+    os.environ['DATABASE_URL'] = database_url
+    from datetime import datetime, timedelta
+    from app import app, db, Venue, Artist, Show
+    with app.app_context():
+        db.create_all()
+        db.session.add(Venue(name='venue', city='City', state='CA', address='1 Main St', genres='Jazz'))
+        db.session.add(Artist(name='artist', city='City', state='CA', genres='Jazz'))
+        db.session.commit()
+        db.session.add(Show(venue_id=1, artist_id=1, start_time=datetime.now() + timedelta(days=1)))
+        db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark first-request latency per route')
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = 'sqlite:///{}'.format(os.path.join(tmp, 'fyyur.db'))
+        cache_dir = os.path.join(tmp, 'jinja_cache')
+        seed(database_url)
+        # the production children log to the scratch directory, not to error.log in the tree
+        env = dict(os.environ, DATABASE_URL=database_url, FLASK_APP='app',
+                   FYYUR_ERROR_LOG=os.path.join(tmp, 'error.log'))
+        subprocess.run(['flask', 'precompile-templates'], check=True, capture_output=True,
+                       env=dict(env, JINJA_BYTECODE_CACHE_DIR=cache_dir))
+
+        modes = [
+            ('compile on request', dict(env, JINJA_BYTECODE_CACHE_DIR=''), 'lazy'),
+            ('bytecode cache', dict(env, JINJA_BYTECODE_CACHE_DIR=cache_dir), 'lazy'),
+            ('warmed up', dict(env, JINJA_BYTECODE_CACHE_DIR=cache_dir, FYYUR_PRODUCTION='1'), 'warm'),
+        ]
+        print('{:<16}'.format('first request') + ''.join('{:>20}'.format(label) for label, _, _ in modes) + '   warm')
+        for route in ROUTES:
+            cells = []
+            for label, mode_env, warm in modes:
+                firsts, warms = [], []
+                for _ in range(args.rounds):
+                    out = subprocess.run([sys.executable, '-c', CHILD, route, warm], env=mode_env,
+                                         check=True, capture_output=True, text=True).stdout.split()
+                    firsts.append(float(out[0]))
+                    warms.append(float(out[1]))
+                cells.append(statistics.median(firsts))
+            print('{:<16}'.format(route) + ''.join('{:>17.1f} ms'.format(t * 1000) for t in cells)
+                  + '{:>7.1f} ms'.format(statistics.median(warms) * 1000))
+
+
+if __name__ == '__main__':
+    main()
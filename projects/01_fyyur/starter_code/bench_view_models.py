@@ -0,0 +1,107 @@
+# ----------------------------------------------------------------------------#
+# Memory of the venue/artist detail pages: __dict__ of ORM objects vs view models.
+#
+#   python bench_view_models.py --shows 500 --requests 50
+#
+# Builds and renders the venue page the old way (mutating venue.__dict__,
+# four show queries) and with view_models.py (column tuples, one show query),
+# under tracemalloc. Reports the peak traced memory and time per request.
+# ----------------------------------------------------------------------------#
+
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from flask import render_template
+
+
+def legacy_show_venue(venue_id):
+    # show_venue before the view models
+    from app import Venue, Artist, Show
+    venue_query = Venue.query.get(venue_id)
+    data = venue_query.__dict__
+    data["genres"] = data["genres"].split(",")
+
+    data["past_shows"] = []
+    data["past_shows_count"] = Show.query.filter(Show.venue_id == venue_query.id,
+                                                 Show.start_time <= datetime.now()).count()
+    data["upcoming_shows"] = []
+    data["upcoming_shows_count"] = Show.query.filter(Show.venue_id == venue_query.id,
+                                                     Show.start_time > datetime.now()).count()
+
+    join_query = Show.query.join(Artist, Artist.id == Show.artist_id).add_columns(
+        Artist.id.label("artist_id"),
+        Artist.name.label("artist_name"),
+        Artist.image_link.label("artist_image_link"),
+        Show.start_time.label("start_time")
+    )
+
+    if data["past_shows_count"] > 0:
+        data["past_shows"] = join_query.filter(
+            Show.venue_id == venue_query.id,
+            Show.start_time <= datetime.now()
+        ).order_by(Show.start_time).all()
+
+    if data["upcoming_shows_count"] > 0:
+        data["upcoming_shows"] = join_query.filter(
+            Show.venue_id == venue_query.id,
+            Show.start_time > datetime.now()
+        ).order_by(Show.start_time).all()
+
+    return render_template('pages/show_venue.html', venue=data)
+
+
+def measure(app, db, view, requests):
+    peaks, times = [], []
+    html = None
+    for _ in range(requests):
+        with app.test_request_context('/venues/1'):
+            tracemalloc.start()
+            began = time.perf_counter()
+            html = view(1)
+            times.append(time.perf_counter() - began)
+            peaks.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+            db.session.remove()
+    return html, sorted(peaks)[len(peaks) // 2], sorted(times)[len(times) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='tracemalloc benchmark of the venue detail page')
+    parser.add_argument('--shows', type=int, default=500)
+    parser.add_argument('--requests', type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['DATABASE_URL'] = 'sqlite:///{}'.format(os.path.join(tmp, 'fyyur.db'))
+        from app import app, db, Venue, Artist, Show, show_venue
+
+        with app.app_context():
+            db.create_all()
+            db.session.add(Venue(name='venue', city='City', state='CA', address='1 Main St',
+                                 genres='Jazz, Rock n Roll', image_link='https://example.com/venue.png'))
+            for i in range(20):
+                db.session.add(Artist(name='artist {}'.format(i), city='City', state='CA', genres='Jazz',
+                                      image_link='https://example.com/{}.png'.format(i)))
+            db.session.commit()
+            now = datetime.now()
+            db.session.execute(Show.__table__.insert(), [{
+                'venue_id': 1, 'artist_id': 1 + i % 20, 'duration_minutes': 120,
+                'start_time': now + timedelta(days=i - args.shows * 4 // 5)
+            } for i in range(args.shows)])
+            db.session.commit()
+
+        legacy_html, legacy_peak, legacy_time = measure(app, db, legacy_show_venue, args.requests)
+        html, peak, took = measure(app, db, show_venue, args.requests)
+        assert html == legacy_html
+
+        print('venue page with {} shows, median of {} requests'.format(args.shows, args.requests))
+        print('venue.__dict__  peak {:8.1f} KiB  {:7.2f} ms'.format(legacy_peak / 1024, legacy_time * 1000))
+        print('view models     peak {:8.1f} KiB  {:7.2f} ms'.format(peak / 1024, took * 1000))
+
+
+if __name__ == '__main__':
+    main()
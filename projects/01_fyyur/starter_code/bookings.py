@@ -0,0 +1,89 @@
+import threading
+from bisect import bisect_left, insort
+from datetime import timedelta
+
+# the longest show that can be listed, the conflict check on postgres (show_conflicts in
+# app.py) only looks at shows starting less than that before the new one
+MAX_DURATION_MINUTES = 24 * 60
+
+
+class IntervalIndex:
+    '''Half-open intervals [start, end) sorted by start, for overlap queries.
+
+    Only intervals starting in (start - longest interval, end) can overlap [start, end), so a
+    query is two bisections plus a scan of that window instead of a scan of every interval.
+    '''
+
+    def __init__(self):
+        self._intervals = []
+        self._longest = timedelta(0)
+
+    def __len__(self):
+        return len(self._intervals)
+
+    def add(self, start, end, key):
+        insort(self._intervals, (start, end, key))
+        self._longest = max(self._longest, end - start)
+
+    def overlapping(self, start, end):
+        '''keys of the intervals overlapping [start, end)'''
+        first = bisect_left(self._intervals, (start - self._longest,))
+        last = bisect_left(self._intervals, (end,))
+        return [key for s, e, key in self._intervals[first:last] if e > start]
+
+
+class BookingIndex:
+    '''Per venue and per artist IntervalIndex of show periods, the conflict check used where
+    the database has no range types (sqlite).
+
+    The indexes live in this process. A venue or artist history is loaded on its first check.
+    Before each check the shows added since the previous one (by show id, from any worker
+    process) are loaded and added to the indexes already built.
+    '''
+
+    def __init__(self, load_shows, load_new_shows, latest_show_id):
+        # load_shows(column, owner_id, up_to_id) -> [(show id, venue id, artist id, start, end)]
+        # load_new_shows(after_id) -> the same rows for every show with a higher id
+        # latest_show_id() -> the highest show id, or 0
+        self._load_shows = load_shows
+        self._load_new_shows = load_new_shows
+        self._latest_show_id = latest_show_id
+        self._lock = threading.Lock()
+        # {(column, owner_id): IntervalIndex}
+        self._indexes = {}
+        self._last_id = None
+
+    def _add(self, show_id, venue_id, artist_id, start, end):
+        for key in (('venue_id', venue_id), ('artist_id', artist_id)):
+            index = self._indexes.get(key)
+            if index is not None:
+                index.add(start, end, show_id)
+
+    def _refresh(self):
+        if self._last_id is None:
+            # nothing loaded yet, histories are loaded up to here on their first check
+            self._last_id = self._latest_show_id()
+            return
+        for row in self._load_new_shows(self._last_id):
+            self._add(*row)
+            self._last_id = max(self._last_id, row[0])
+
+    def _index(self, column, owner_id):
+        index = self._indexes.get((column, owner_id))
+        if index is None:
+            index = self._indexes[(column, owner_id)] = IntervalIndex()
+            for show_id, venue_id, artist_id, start, end in self._load_shows(column, owner_id, self._last_id):
+                index.add(start, end, show_id)
+        return index
+
+    def conflicts(self, venue_id, artist_id, start, end):
+        '''ids of the shows of the venue or the artist overlapping [start, end)'''
+        with self._lock:
+            self._refresh()
+            return sorted(set(self._index('venue_id', venue_id).overlapping(start, end)
+                              + self._index('artist_id', artist_id).overlapping(start, end)))
+
+    def clear(self):
+        with self._lock:
+            self._indexes.clear()
+            self._last_id = None
@@ -1,7 +1,8 @@
 from datetime import datetime
 from flask_wtf import Form
-from wtforms import StringField, SelectField, SelectMultipleField, DateTimeField
-from wtforms.validators import DataRequired, AnyOf, URL
+from wtforms import StringField, SelectField, SelectMultipleField, DateTimeField, IntegerField
+from wtforms.validators import DataRequired, AnyOf, URL, NumberRange
+from bookings import MAX_DURATION_MINUTES
 from enums import State, Genre
 
 
@@ -11,7 +12,12 @@ class ShowForm(Form):
     start_time = DateTimeField(
         'start_time',
         validators=[DataRequired()],
-        default=datetime.today()
+        default=datetime.today
+    )
+    duration_minutes = IntegerField(
+        'duration_minutes',
+        validators=[DataRequired(), NumberRange(min=1, max=MAX_DURATION_MINUTES)],
+        default=120
     )
 
 
@@ -20,14 +26,14 @@ class VenueForm(Form):
     city = StringField('city', validators=[DataRequired()])
     state = SelectField(
         'state', validators=[DataRequired()],
-        choices=State.choices()
+        choices=State.choices
     )
     address = StringField('address', validators=[DataRequired()])
     phone = StringField('phone')
     image_link = StringField('image_link')
     genres = SelectMultipleField(
         'genres', validators=[DataRequired()],
-        choices=Genre.choices()
+        choices=Genre.choices
     )
     facebook_link = StringField('facebook_link', validators=[URL()])
 
@@ -37,12 +43,12 @@ class ArtistForm(Form):
     city = StringField('city', validators=[DataRequired()])
     state = SelectField(
         'state', validators=[DataRequired()],
-        choices=State.choices()
+        choices=State.choices
     )
     phone = StringField('phone')
     image_link = StringField('image_link')
     genres = SelectMultipleField(
         'genres', validators=[DataRequired()],
-        choices=Genre.choices()
+        choices=Genre.choices
     )
     facebook_link = StringField('facebook_link', validators=[URL()])
@@ -0,0 +1,114 @@
+import csv
+import math
+import os
+import re
+from functools import lru_cache
+
+# Venue locations without a network geocoder: gazetteer.csv holds the approximate centres
+# of US cities, and venues are indexed by the geohash of their location. A geohash cell is
+# a prefix of the geohashes inside it, so the venues of a cell are one range scan of a
+# B-tree index on any database.
+
+GAZETTEER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'gazetteer.csv')
+GEOHASH_ALPHABET = '0123456789bcdefghjkmnpqrstuvwxyz'
+GEOHASH_PRECISION = 9
+EARTH_RADIUS_MILES = 3958.8
+MAX_CELLS = 24
+MILES_PER_DEGREE = math.pi * EARTH_RADIUS_MILES / 180
+
+
+def city_key(city, state):
+    # 'St. Louis', 'st louis' and 'Saint Louis' are the same city
+    city = re.sub(r'\s+', ' ', city.lower().replace('.', ' ')).strip()
+    city = re.sub(r'^st ', 'saint ', city)
+    return city, state.strip().upper()
+
+
+@lru_cache(maxsize=None)
+def gazetteer():
+    with open(GAZETTEER, newline='') as f:
+        return {city_key(row['city'], row['state']): (float(row['latitude']), float(row['longitude']))
+                for row in csv.DictReader(f)}
+
+
+def locate(city, state):
+    '''(latitude, longitude) of the centre of a city, None when it is not in the gazetteer'''
+    return gazetteer().get(city_key(city, state))
+
+
+def geohash(latitude, longitude, precision=GEOHASH_PRECISION):
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, value, even = [], 0, 0, True
+    while len(chars) < precision:
+        # even bits halve the longitude range, odd bits the latitude range
+        value_range, coordinate = (lng_range, longitude) if even else (lat_range, latitude)
+        middle = (value_range[0] + value_range[1]) / 2
+        value <<= 1
+        if coordinate >= middle:
+            value |= 1
+            value_range[0] = middle
+        else:
+            value_range[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(GEOHASH_ALPHABET[value])
+            bits, value = 0, 0
+    return ''.join(chars)
+
+
+def cell_size(precision):
+    '''(height, width) in degrees of the geohash cells of a precision'''
+    lng_bits = (5 * precision + 1) // 2
+    lat_bits = 5 * precision // 2
+    return 180.0 / 2 ** lat_bits, 360.0 / 2 ** lng_bits
+
+
+def covering_cells(latitude, longitude, miles, max_cells=MAX_CELLS):
+    '''geohash prefixes of the cells covering the bounding box of a circle of radius miles
+
+    The finest precision that covers the box with at most max_cells cells.
+    '''
+    lat_span = miles / MILES_PER_DEGREE
+    south, north = max(-90.0, latitude - lat_span), min(90.0 - 1e-9, latitude + lat_span)
+    # the widest longitude span of the circle is at its edge nearest to a pole
+    lng_miles = MILES_PER_DEGREE * math.cos(math.radians(min(max(abs(south), abs(north)), 89.0)))
+    lng_span = min(180.0, miles / lng_miles)
+
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        height, width = cell_size(precision)
+        rows = range(int((south + 90.0) // height), int((north + 90.0) // height) + 1)
+        columns = range(int((longitude - lng_span + 180.0) // width), int((longitude + lng_span + 180.0) // width) + 1)
+        if len(rows) * len(columns) <= max_cells or precision == 1:
+            break
+
+    columns_around = int(round(360.0 / width))
+    return sorted({geohash(-90.0 + (row + 0.5) * height, -180.0 + (column % columns_around + 0.5) * width, precision)
+                   for row in rows for column in columns})
+
+
+def successor(prefix):
+    '''the first geohash after every geohash starting with prefix, None after the last cell'''
+    while prefix and prefix[-1] == GEOHASH_ALPHABET[-1]:
+        prefix = prefix[:-1]
+    if not prefix:
+        return None
+    return prefix[:-1] + GEOHASH_ALPHABET[GEOHASH_ALPHABET.index(prefix[-1]) + 1]
+
+
+def geohash_ranges(cells):
+    '''[low, high) geohash ranges of sorted cells, adjacent cells merged into one range'''
+    ranges = []
+    for cell in cells:
+        if ranges and ranges[-1][1] == cell:
+            ranges[-1][1] = successor(cell)
+        else:
+            ranges.append([cell, successor(cell)])
+    return [tuple(r) for r in ranges]
+
+
+def miles_between(lat1, lng1, lat2, lng2):
+    '''great circle distance (haversine)'''
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_MILES * math.asin(min(1.0, math.sqrt(a)))
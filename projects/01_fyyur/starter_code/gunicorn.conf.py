@@ -0,0 +1,4 @@
+# gunicorn settings for `gunicorn app:app`, the same ones `python serve.py` uses
+from serve import gunicorn_options
+
+globals().update(gunicorn_options())
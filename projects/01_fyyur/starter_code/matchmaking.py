@@ -0,0 +1,337 @@
+import threading
+import time
+from collections import Counter
+
+import numpy as np
+
+from enums import Genre, State
+
+# Artist / venue recommendations. Every venue and artist is a feature vector built from its
+# genres, its state and the genres of whoever it was booked with. A venue's score for an
+# artist is one dot product, so the scores of a batch of venues against every artist are one
+# matrix product. The top TOP_K matches of every venue and artist are kept, and on writes
+# only the rows and columns of what changed are scored again.
+
+TOP_K = 20
+BATCH_ROWS = 256
+REBUILD_SECONDS = 600
+MAX_INCREMENTAL_CHANGES = 1000
+
+GENRE_WEIGHT = 1.0
+STATE_WEIGHT = 0.5
+HISTORY_WEIGHT = 0.5
+# candidates seeking a match (seeking_talent, seeking_venue) score that much higher
+SEEKING_BOOST = 0.25
+
+# the forms store Genre names, older rows the values
+GENRE_INDEX = dict([(genre.name, i) for i, genre in enumerate(Genre)] + [(genre.value, i) for i, genre in enumerate(Genre)])
+STATE_INDEX = {state.value: i for i, state in enumerate(State)}
+
+
+def normalized(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms == 0, 1, norms)
+
+
+class MatchSide:
+    '''Venues or artists: ids, raw features and the current top matches, by row.'''
+
+    def __init__(self, top_k):
+        self.top_k = top_k
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.index = {}
+        self.genres = np.zeros((0, len(Genre)), dtype=np.float32)
+        self.states = np.zeros((0, len(State)), dtype=np.float32)
+        self.history = np.zeros((0, len(Genre)), dtype=np.float32)
+        self.seeking = np.zeros(0, dtype=np.float32)
+        self.alive = np.zeros(0, dtype=bool)
+        self.features = np.zeros((0, 3 * len(Genre) + len(State)), dtype=np.float32)
+        self.top_rows = np.zeros((0, top_k), dtype=np.int64)
+        self.top_scores = np.zeros((0, top_k), dtype=np.float32)
+        # row -> {row of the other side: number of shows booked together}
+        self.booked = {}
+        self.last_id = 0
+
+    def __len__(self):
+        return len(self.ids)
+
+    def upsert(self, rows, requested_ids=()):
+        '''(id, genres, state, seeking) rows, requested ids missing from rows were deleted; returns the changed rows'''
+        added = [row for row in rows if row[0] not in self.index]
+        if added:
+            n, extra = len(self.ids), len(added)
+            self.ids = np.concatenate([self.ids, np.array([row[0] for row in added], dtype=np.int64)])
+            self.index.update((row[0], n + i) for i, row in enumerate(added))
+            grow = lambda array, fill=0: np.concatenate([array, np.full((extra,) + array.shape[1:], fill, array.dtype)])
+            self.genres, self.states, self.history = grow(self.genres), grow(self.states), grow(self.history)
+            self.seeking, self.alive, self.features = grow(self.seeking), grow(self.alive, True), grow(self.features)
+            self.top_rows, self.top_scores = grow(self.top_rows, -1), grow(self.top_scores, -np.inf)
+
+        changed = set()
+        for entity_id, genres, state, seeking in rows:
+            row = self.index[entity_id]
+            self.genres[row] = 0
+            for genre in (genres or '').split(','):
+                if genre.strip() in GENRE_INDEX:
+                    self.genres[row, GENRE_INDEX[genre.strip()]] = 1
+            self.states[row] = 0
+            if state in STATE_INDEX:
+                self.states[row, STATE_INDEX[state]] = 1
+            self.seeking[row] = 1 if seeking else 0
+            self.alive[row] = True
+            self.last_id = max(self.last_id, entity_id)
+            changed.add(row)
+        for entity_id in set(requested_ids) - {row[0] for row in rows}:
+            if entity_id in self.index:
+                row = self.index[entity_id]
+                self.alive[row] = False
+                changed.add(row)
+        return changed
+
+    def update_features(self, rows, left):
+        '''the left side (venues) and the right side (artists) lay out their vectors so that their
+        dot product is the genre, state and history similarity'''
+        rows = np.fromiter(rows, dtype=np.int64)
+        genres = normalized(self.genres[rows])
+        history = normalized(self.history[rows])
+        if left:
+            blocks = [GENRE_WEIGHT * genres, STATE_WEIGHT * self.states[rows], HISTORY_WEIGHT * history, HISTORY_WEIGHT * genres]
+        else:
+            blocks = [genres, self.states[rows], genres, history]
+        self.features[rows] = np.hstack(blocks) * self.alive[rows, None]
+
+
+def book(venues, artists, shows):
+    '''counts (id, venue_id, artist_id) shows into booked, returns the venue rows and artist rows they changed'''
+    pairs = Counter((venues.index[venue_id], artists.index[artist_id]) for show_id, venue_id, artist_id in shows
+                    if venue_id in venues.index and artist_id in artists.index)
+    for (venue_row, artist_row), count in pairs.items():
+        venue_booked = venues.booked.setdefault(venue_row, {})
+        venue_booked[artist_row] = venue_booked.get(artist_row, 0) + count
+        artist_booked = artists.booked.setdefault(artist_row, {})
+        artist_booked[venue_row] = artist_booked.get(venue_row, 0) + count
+    return {venue_row for venue_row, _ in pairs}, {artist_row for _, artist_row in pairs}
+
+
+def update_history(side, other, rows):
+    # a venue's history is the genres of the artists it booked, one per show, an artist's
+    # those of its venues. Deleted rows of other no longer count.
+    rows = list(rows)
+    side.history[rows] = 0
+    booked = [(row, other_row, count) for row in rows for other_row, count in side.booked.get(row, {}).items()]
+    if booked:
+        rows, other_rows, counts = (np.array(column) for column in zip(*booked))
+        weights = counts * other.alive[other_rows]
+        for genre in range(side.history.shape[1]):
+            side.history[:, genre] += np.bincount(
+                rows, weights=weights * other.genres[other_rows, genre], minlength=len(side)).astype(np.float32)
+
+
+def scores(side, other, rows):
+    '''scores of side rows (an array) against every row of other, booked and deleted pairs at -inf'''
+    result = side.features[rows] @ other.features.T
+    result *= 1 + SEEKING_BOOST * other.seeking
+    deleted = np.flatnonzero(~other.alive)
+    if len(deleted):
+        result[:, deleted] = -np.inf
+    for i, row in enumerate(rows):
+        if row in side.booked:
+            result[i, list(side.booked[row])] = -np.inf
+    return result
+
+
+def score_rows(side, other, rows):
+    '''recomputes the top matches of side rows, BATCH_ROWS rows per matrix product'''
+    rows = np.fromiter(rows, dtype=np.int64)
+    k = min(side.top_k, len(other))
+    for start in range(0, len(rows), BATCH_ROWS):
+        batch = rows[start:start + BATCH_ROWS]
+        side.top_rows[batch] = -1
+        side.top_scores[batch] = -np.inf
+        if k == 0:
+            continue
+        batch_scores = scores(side, other, batch)
+        top = np.argpartition(batch_scores, -k, axis=1)[:, -k:]
+        top_scores = np.take_along_axis(batch_scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind='stable')
+        side.top_rows[batch, :k] = np.take_along_axis(top, order, axis=1)
+        side.top_scores[batch, :k] = np.take_along_axis(top_scores, order, axis=1)
+
+
+def score_columns(side, other, changed_other, changed_side):
+    '''updates the top matches of the unchanged side rows for the changed rows of other'''
+    if not changed_other or not len(side):
+        return
+    settled = side.alive.copy()
+    settled[list(changed_side)] = False
+    rescore = np.zeros(len(side), dtype=bool)
+    for row in changed_other:
+        # scores of every side row against this row of other, the same products as in scores()
+        column = side.features @ other.features[row]
+        column *= 1 + SEEKING_BOOST * other.seeking[row]
+        if not other.alive[row]:
+            column[:] = -np.inf
+        if row in other.booked:
+            column[list(other.booked[row])] = -np.inf
+        holds = (side.top_rows == row).any(axis=1)
+        # a match already in a top list may have dropped out of it, those are scored again in full
+        rescore |= holds & settled
+        enters = np.flatnonzero(~holds & settled & (column > side.top_scores[:, -1]))
+        if len(enters):
+            rows = np.hstack([side.top_rows[enters], np.full((len(enters), 1), row)])
+            top_scores = np.hstack([side.top_scores[enters], column[enters, None]])
+            order = np.argsort(-top_scores, axis=1, kind='stable')[:, :side.top_k]
+            side.top_rows[enters] = np.take_along_axis(rows, order, axis=1)
+            side.top_scores[enters] = np.take_along_axis(top_scores, order, axis=1)
+    score_rows(side, other, np.flatnonzero(rescore))
+
+
+class Matchmaker:
+    '''Cached top matches between venues and artists, refreshed incrementally.
+
+    The loaders return rows ordered by id:
+        load_venues(ids=None, after_id=0)    (id, genres, state, seeking_talent)
+        load_artists(ids=None, after_id=0)   (id, genres, state, seeking_venue)
+        load_shows(after_id=0)               (id, venue_id, artist_id)
+    New venues, artists and shows (from any worker) are found by id on the next read.
+    Edits and deletes are reported by venue_changed/artist_changed, those of other workers
+    are picked up by the full rebuild every rebuild_seconds. That rebuild runs outside the
+    lock, the previous matches are served meanwhile. Venues are not recommended the artists
+    they already booked, and the other way around.
+    '''
+
+    def __init__(self, load_venues, load_artists, load_shows, top_k=TOP_K, rebuild_seconds=REBUILD_SECONDS):
+        self._load_venues = load_venues
+        self._load_artists = load_artists
+        self._load_shows = load_shows
+        self.top_k = top_k
+        self.rebuild_seconds = rebuild_seconds
+        self._lock = threading.Lock()
+        self._built_at = None
+        # (venue ids, artist ids) changed since the running background rebuild started, None when idle
+        self._rebuild_changes = None
+        self._dirty_venues = set()
+        self._dirty_artists = set()
+
+    def clear(self):
+        with self._lock:
+            self._built_at = None
+
+    def venue_changed(self, venue_id):
+        with self._lock:
+            self._dirty_venues.add(int(venue_id))
+            if self._rebuild_changes is not None:
+                self._rebuild_changes[0].add(int(venue_id))
+
+    def artist_changed(self, artist_id):
+        with self._lock:
+            self._dirty_artists.add(int(artist_id))
+            if self._rebuild_changes is not None:
+                self._rebuild_changes[1].add(int(artist_id))
+
+    def recommended_artists(self, venue_id, limit=TOP_K):
+        '''[(artist_id, score)] best first, without matches of no similarity, None for an unknown venue'''
+        self._rebuild_if_stale()
+        with self._lock:
+            self._refresh()
+            return self._top(self.venues, self.artists, venue_id, limit)
+
+    def recommended_venues(self, artist_id, limit=TOP_K):
+        '''[(venue_id, score)] best first, without matches of no similarity, None for an unknown artist'''
+        self._rebuild_if_stale()
+        with self._lock:
+            self._refresh()
+            return self._top(self.artists, self.venues, artist_id, limit)
+
+    def _top(self, side, other, entity_id, limit):
+        row = side.index.get(int(entity_id))
+        if row is None or not side.alive[row]:
+            return None
+        return [(int(other.ids[match]), round(float(score), 4))
+                for match, score in zip(side.top_rows[row, :limit], side.top_scores[row, :limit])
+                if match >= 0 and score > 0]
+
+    def _rebuild_if_stale(self):
+        with self._lock:
+            if self._built_at is None:
+                # nothing to serve yet, build under the lock
+                self._install(self._build())
+                return
+            if self._rebuild_changes is not None or time.monotonic() - self._built_at <= self.rebuild_seconds:
+                return
+            self._rebuild_changes = (set(), set())
+        try:
+            built = self._build()
+        except Exception:
+            with self._lock:
+                self._rebuild_changes = None
+            raise
+        with self._lock:
+            # the build may have loaded the venues and artists changed meanwhile before their
+            # edit, and reads meanwhile applied the edit to the matches replaced here, so they
+            # are marked dirty again and reloaded by the next _refresh. New rows and shows are
+            # past the watermarks of the build.
+            changed_venues, changed_artists = self._rebuild_changes
+            self._dirty_venues |= changed_venues
+            self._dirty_artists |= changed_artists
+            self._rebuild_changes = None
+            self._install(built)
+
+    def _install(self, built):
+        self.venues, self.artists, self._last_show_id = built
+        self._built_at = time.monotonic()
+
+    def _build(self):
+        venues, artists = MatchSide(self.top_k), MatchSide(self.top_k)
+        venues.upsert(self._load_venues())
+        artists.upsert(self._load_artists())
+        shows = self._load_shows()
+        book(venues, artists, shows)
+        update_history(venues, artists, venues.booked)
+        update_history(artists, venues, artists.booked)
+        venues.update_features(range(len(venues)), left=True)
+        artists.update_features(range(len(artists)), left=False)
+        score_rows(venues, artists, range(len(venues)))
+        score_rows(artists, venues, range(len(artists)))
+        return venues, artists, max((show[0] for show in shows), default=0)
+
+    def _refresh(self):
+        venue_rows = self._load_venues(after_id=self.venues.last_id)
+        artist_rows = self._load_artists(after_id=self.artists.last_id)
+        shows = self._load_shows(after_id=self._last_show_id)
+        if len(venue_rows) + len(artist_rows) + len(shows) + len(self._dirty_venues) + len(self._dirty_artists) \
+                > MAX_INCREMENTAL_CHANGES:
+            self._dirty_venues, self._dirty_artists = set(), set()
+            self._install(self._build())
+            return
+
+        dirty_venues = [venue_id for venue_id in self._dirty_venues if venue_id <= self.venues.last_id]
+        dirty_artists = [artist_id for artist_id in self._dirty_artists if artist_id <= self.artists.last_id]
+        if dirty_venues:
+            venue_rows = list(venue_rows) + list(self._load_venues(ids=dirty_venues))
+        if dirty_artists:
+            artist_rows = list(artist_rows) + list(self._load_artists(ids=dirty_artists))
+        self._dirty_venues, self._dirty_artists = set(), set()
+
+        changed_venues = self.venues.upsert(venue_rows, dirty_venues)
+        changed_artists = self.artists.upsert(artist_rows, dirty_artists)
+        booked_venues, booked_artists = book(self.venues, self.artists, shows)
+        self._last_show_id = max([self._last_show_id] + [show[0] for show in shows])
+        # a history follows the genres of the other side, so it changes with them
+        history_venues = booked_venues.union(*(self.artists.booked.get(row, ()) for row in changed_artists))
+        history_artists = booked_artists.union(*(self.venues.booked.get(row, ()) for row in changed_venues))
+        update_history(self.venues, self.artists, history_venues)
+        update_history(self.artists, self.venues, history_artists)
+        changed_venues |= history_venues
+        changed_artists |= history_artists
+        if not changed_venues and not changed_artists:
+            return
+
+        if changed_venues:
+            self.venues.update_features(changed_venues, left=True)
+        if changed_artists:
+            self.artists.update_features(changed_artists, left=False)
+        score_rows(self.venues, self.artists, sorted(changed_venues))
+        score_rows(self.artists, self.venues, sorted(changed_artists))
+        score_columns(self.artists, self.venues, changed_venues, changed_artists)
+        score_columns(self.venues, self.artists, changed_artists, changed_venues)
@@ -0,0 +1,43 @@
+"""show durations and booking conflict constraints
+
+Revision ID: 6c1e2f4b9d17
+Revises: a5a0296ea09b
+Create Date: 2026-10-19 11:02:37.512884
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '6c1e2f4b9d17'
+down_revision = 'a5a0296ea09b'
+branch_labels = None
+depends_on = None
+
+# must stay the same expression as SHOW_PERIOD_SQL in app.py, so the overlap check uses these indexes
+SHOW_PERIOD = "tsrange(start_time, start_time + duration_minutes * interval '1 minute')"
+
+
+def upgrade():
+    op.add_column('Show', sa.Column('duration_minutes', sa.Integer(), server_default='120', nullable=False))
+    op.create_index('ix_show_venue_id_start_time', 'Show', ['venue_id', 'start_time'], unique=False)
+    op.create_index('ix_show_artist_id_start_time', 'Show', ['artist_id', 'start_time'], unique=False)
+
+    if op.get_bind().dialect.name == 'postgresql':
+        # a venue or an artist can not be booked twice at the same time
+        # fails if already listed shows overlap, those have to be resolved first
+        op.execute('CREATE EXTENSION IF NOT EXISTS btree_gist')
+        op.execute('ALTER TABLE "Show" ADD CONSTRAINT show_venue_no_overlap '
+                   'EXCLUDE USING gist (venue_id WITH =, {} WITH &&)'.format(SHOW_PERIOD))
+        op.execute('ALTER TABLE "Show" ADD CONSTRAINT show_artist_no_overlap '
+                   'EXCLUDE USING gist (artist_id WITH =, {} WITH &&)'.format(SHOW_PERIOD))
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('ALTER TABLE "Show" DROP CONSTRAINT show_artist_no_overlap')
+        op.execute('ALTER TABLE "Show" DROP CONSTRAINT show_venue_no_overlap')
+
+    op.drop_index('ix_show_artist_id_start_time', table_name='Show')
+    op.drop_index('ix_show_venue_id_start_time', table_name='Show')
+    op.drop_column('Show', 'duration_minutes')
@@ -0,0 +1,25 @@
+"""show start_time index for calendar queries
+
+Revision ID: 8d4a1b7c3e52
+Revises: 6c1e2f4b9d17
+Create Date: 2026-10-19 11:48:05.270931
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '8d4a1b7c3e52'
+down_revision = '6c1e2f4b9d17'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # b-tree rather than BRIN: shows are listed in any order (future bookings, backfills),
+    # so start_time does not follow the physical row order BRIN relies on
+    op.create_index('ix_show_start_time', 'Show', ['start_time'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_show_start_time', table_name='Show')
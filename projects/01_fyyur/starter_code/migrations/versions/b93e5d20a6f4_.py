@@ -0,0 +1,23 @@
+"""artist lower(name) index for the paginated listing
+
+Revision ID: b93e5d20a6f4
+Revises: 8d4a1b7c3e52
+Create Date: 2026-10-19 12:31:44.608153
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'b93e5d20a6f4'
+down_revision = '8d4a1b7c3e52'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_artist_lower_name_id', 'Artist', [sa.text('lower(name)'), 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_artist_lower_name_id', table_name='Artist')
@@ -0,0 +1,30 @@
+"""venue latitude, longitude and geohash index for /venues/nearby
+
+Revision ID: e2f7a9c4d158
+Revises: b93e5d20a6f4
+Create Date: 2026-10-19 14:02:17.331520
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'e2f7a9c4d158'
+down_revision = 'b93e5d20a6f4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('Venue', sa.Column('latitude', sa.Float(), nullable=True))
+    op.add_column('Venue', sa.Column('longitude', sa.Float(), nullable=True))
+    op.add_column('Venue', sa.Column('geohash', sa.String(length=12), nullable=True))
+    op.create_index(op.f('ix_Venue_geohash'), 'Venue', ['geohash'], unique=False)
+    # existing venues are located afterwards by `flask geocode-venues`
+
+
+def downgrade():
+    op.drop_index(op.f('ix_Venue_geohash'), table_name='Venue')
+    op.drop_column('Venue', 'geohash')
+    op.drop_column('Venue', 'longitude')
+    op.drop_column('Venue', 'latitude')
@@ -0,0 +1,125 @@
+"""monthly range partitions of Show on start_time (postgres)
+
+Revision ID: f3c8d2a6b714
+Revises: e2f7a9c4d158
+Create Date: 2026-10-19 15:41:08.260417
+
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'f3c8d2a6b714'
+down_revision = 'e2f7a9c4d158'
+branch_labels = None
+depends_on = None
+
+# the same expression as migration 6c1e2f4b9d17, postgres (before 17) has no exclusion
+# constraints on a partitioned table so every partition carries its own
+SHOW_PERIOD = "tsrange(start_time, start_time + duration_minutes * interval '1 minute')"
+MONTHS_AHEAD = 12
+
+
+def add_months(month, months):
+    index = month.year * 12 + month.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def add_exclusion_constraints(name):
+    op.execute('ALTER TABLE "{0}" ADD CONSTRAINT "{0}_venue_no_overlap" '
+               'EXCLUDE USING gist (venue_id WITH =, {1} WITH &&)'.format(name, SHOW_PERIOD))
+    op.execute('ALTER TABLE "{0}" ADD CONSTRAINT "{0}_artist_no_overlap" '
+               'EXCLUDE USING gist (artist_id WITH =, {1} WITH &&)'.format(name, SHOW_PERIOD))
+
+
+def create_show_indexes():
+    op.create_index('ix_show_start_time', 'Show', ['start_time'], unique=False)
+    op.create_index('ix_show_venue_id_start_time', 'Show', ['venue_id', 'start_time'], unique=False)
+    op.create_index('ix_show_artist_id_start_time', 'Show', ['artist_id', 'start_time'], unique=False)
+
+
+def drop_show_indexes():
+    op.drop_index('ix_show_artist_id_start_time', table_name='Show')
+    op.drop_index('ix_show_venue_id_start_time', table_name='Show')
+    op.drop_index('ix_show_start_time', table_name='Show')
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        # sqlite has no partitioning, Show stays a plain table there
+        return
+
+    # the table is rebuilt, so the show ids are kept but the names of its indexes and
+    # constraints have to be free for the partitioned table
+    op.execute('ALTER TABLE "Show" DROP CONSTRAINT show_artist_no_overlap')
+    op.execute('ALTER TABLE "Show" DROP CONSTRAINT show_venue_no_overlap')
+    drop_show_indexes()
+    op.execute('ALTER TABLE "Show" RENAME TO "Show_unpartitioned"')
+    op.execute('ALTER TABLE "Show_unpartitioned" RENAME CONSTRAINT "Show_pkey" TO "Show_unpartitioned_pkey"')
+    op.execute('ALTER SEQUENCE "Show_id_seq" OWNED BY NONE')
+
+    # the partition key has to be part of the primary key
+    op.execute('''
+        CREATE TABLE "Show" (
+            id integer NOT NULL DEFAULT nextval('"Show_id_seq"'::regclass),
+            venue_id integer NOT NULL REFERENCES "Venue" (id),
+            artist_id integer NOT NULL REFERENCES "Artist" (id),
+            start_time timestamp without time zone NOT NULL,
+            duration_minutes integer NOT NULL DEFAULT 120,
+            CONSTRAINT "Show_pkey" PRIMARY KEY (id, start_time)
+        ) PARTITION BY RANGE (start_time)''')
+    op.execute('ALTER SEQUENCE "Show_id_seq" OWNED BY "Show".id')
+
+    # months nobody created a partition for yet, `flask show-partitions` keeps it empty
+    op.execute('CREATE TABLE "Show_default" PARTITION OF "Show" DEFAULT')
+    add_exclusion_constraints('Show_default')
+
+    # one partition per month from the first listed show to MONTHS_AHEAD months from now
+    first = op.get_bind().execute(sa.text('SELECT min(start_time) FROM "Show_unpartitioned"')).scalar()
+    this_month = datetime(datetime.now().year, datetime.now().month, 1)
+    month = datetime(first.year, first.month, 1) if first is not None and first < this_month else this_month
+    while month <= add_months(this_month, MONTHS_AHEAD):
+        name = month.strftime('Show_%Y_%m')
+        op.execute("CREATE TABLE \"{}\" PARTITION OF \"Show\" FOR VALUES FROM ('{:%Y-%m-%d}') TO ('{:%Y-%m-%d}')".format(
+            name, month, add_months(month, 1)))
+        add_exclusion_constraints(name)
+        month = add_months(month, 1)
+
+    op.execute('INSERT INTO "Show" (id, venue_id, artist_id, start_time, duration_minutes) '
+               'SELECT id, venue_id, artist_id, start_time, duration_minutes FROM "Show_unpartitioned"')
+    op.execute('DROP TABLE "Show_unpartitioned"')
+    # created on every partition, and on the partitions attached later
+    create_show_indexes()
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    # the partitions archived by `flask show-partitions` stay in the archive schema
+    drop_show_indexes()
+    op.execute('ALTER TABLE "Show" RENAME TO "Show_partitioned"')
+    op.execute('ALTER TABLE "Show_partitioned" RENAME CONSTRAINT "Show_pkey" TO "Show_partitioned_pkey"')
+    op.execute('ALTER SEQUENCE "Show_id_seq" OWNED BY NONE')
+
+    op.execute('''
+        CREATE TABLE "Show" (
+            id integer NOT NULL DEFAULT nextval('"Show_id_seq"'::regclass),
+            venue_id integer NOT NULL REFERENCES "Venue" (id),
+            artist_id integer NOT NULL REFERENCES "Artist" (id),
+            start_time timestamp without time zone NOT NULL,
+            duration_minutes integer NOT NULL DEFAULT 120,
+            CONSTRAINT "Show_pkey" PRIMARY KEY (id)
+        )''')
+    op.execute('ALTER SEQUENCE "Show_id_seq" OWNED BY "Show".id')
+    op.execute('INSERT INTO "Show" (id, venue_id, artist_id, start_time, duration_minutes) '
+               'SELECT id, venue_id, artist_id, start_time, duration_minutes FROM "Show_partitioned"')
+    op.execute('DROP TABLE "Show_partitioned"')
+
+    create_show_indexes()
+    op.execute('ALTER TABLE "Show" ADD CONSTRAINT show_venue_no_overlap '
+               'EXCLUDE USING gist (venue_id WITH =, {} WITH &&)'.format(SHOW_PERIOD))
+    op.execute('ALTER TABLE "Show" ADD CONSTRAINT show_artist_no_overlap '
+               'EXCLUDE USING gist (artist_id WITH =, {} WITH &&)'.format(SHOW_PERIOD))
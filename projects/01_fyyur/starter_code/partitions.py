@@ -0,0 +1,118 @@
+from datetime import datetime
+
+from sqlalchemy import text
+
+# Monthly partitions of "Show" on postgres 11+ (migration f3c8d2a6b714). "Show_2020_06"
+# holds the shows starting in June 2020, "Show_default" whatever no month partition covers.
+# Queries filtering on start_time only scan the partitions of the months they cover, so
+# upcoming shows are read from the current and future months only. Each partition has
+# its own booking exclusion constraints, shows overlapping across a month boundary are
+# caught by show_conflicts in app.py.
+#
+# `flask show-partitions` keeps the months ahead created and moves partitions of old
+# months out of "Show" into the archive schema, where they stay queryable. Archived
+# partitions have no foreign keys, deleting a venue or artist leaves their archived shows,
+# and downgrading the migrations leaves the archive schema as it is.
+
+ARCHIVE_SCHEMA = 'archive'
+PARTITION_FORMAT = 'Show_%Y_%m'
+
+# must stay the same expression as SHOW_PERIOD_SQL in app.py, every partition carries the
+# booking exclusion constraints of migration 6c1e2f4b9d17 itself
+SHOW_PERIOD = "tsrange(start_time, start_time + duration_minutes * interval '1 minute')"
+
+
+def month_start(value):
+    return datetime(value.year, value.month, 1)
+
+
+def add_months(month, months):
+    index = month.year * 12 + month.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month):
+    return month.strftime(PARTITION_FORMAT)
+
+
+def partition_month(name):
+    '''the month of a partition name, None for "Show_default" and anything else'''
+    try:
+        return datetime.strptime(name, PARTITION_FORMAT)
+    except ValueError:
+        return None
+
+
+def month_partitions(connection):
+    '''{month: name} of the month partitions attached to "Show"'''
+    names = connection.execute(text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = '\"Show\"'::regclass")).scalars()
+    return {partition_month(name): name for name in names if partition_month(name) is not None}
+
+
+def add_exclusion_constraints(connection, name):
+    connection.execute(text(
+        'ALTER TABLE "{0}" ADD CONSTRAINT "{0}_venue_no_overlap" '
+        'EXCLUDE USING gist (venue_id WITH =, {1} WITH &&)'.format(name, SHOW_PERIOD)))
+    connection.execute(text(
+        'ALTER TABLE "{0}" ADD CONSTRAINT "{0}_artist_no_overlap" '
+        'EXCLUDE USING gist (artist_id WITH =, {1} WITH &&)'.format(name, SHOW_PERIOD)))
+
+
+def create_partition(connection, month):
+    '''creates the partition of a month, taking over its shows from "Show_default"'''
+    name, bounds = partition_name(month), {'start': month, 'end': add_months(month, 1)}
+    connection.execute(text('CREATE TABLE "{}" (LIKE "Show" INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'.format(name)))
+    # the default partition may not keep rows of the range a new partition covers
+    connection.execute(text(
+        'WITH moved AS (DELETE FROM "Show_default" WHERE start_time >= :start AND start_time < :end RETURNING *) '
+        'INSERT INTO "{}" SELECT * FROM moved'.format(name)), bounds)
+    connection.execute(text(
+        "ALTER TABLE \"Show\" ATTACH PARTITION \"{}\" FOR VALUES FROM ('{:%Y-%m-%d}') TO ('{:%Y-%m-%d}')".format(
+            name, bounds['start'], bounds['end'])))
+    add_exclusion_constraints(connection, name)
+    return name
+
+
+def foreign_keys(connection, name):
+    '''names of the foreign key constraints of a table of the public schema'''
+    return connection.execute(text(
+        "SELECT conname FROM pg_constraint WHERE conrelid = CAST(:table AS regclass) AND contype = 'f'"),
+        {'table': '"{}"'.format(name)}).scalars().all()
+
+
+def archive_partition(connection, name):
+    '''detaches a partition from "Show" and moves it to the archive schema, without the
+    foreign keys to "Venue" and "Artist" and the id default it kept from "Show"'''
+    connection.execute(text('ALTER TABLE "Show" DETACH PARTITION "{}"'.format(name)))
+    # archived shows must not keep their venue and artist from being deleted, their
+    # venue_id and artist_id may point at deleted rows afterwards
+    for constraint in foreign_keys(connection, name):
+        connection.execute(text('ALTER TABLE "{}" DROP CONSTRAINT "{}"'.format(name, constraint)))
+    # nothing is inserted into the archive, and "Show_id_seq" stays droppable with "Show"
+    connection.execute(text('ALTER TABLE "{}" ALTER COLUMN id DROP DEFAULT'.format(name)))
+    connection.execute(text('CREATE SCHEMA IF NOT EXISTS {}'.format(ARCHIVE_SCHEMA)))
+    connection.execute(text('ALTER TABLE "{}" SET SCHEMA {}'.format(name, ARCHIVE_SCHEMA)))
+
+
+def maintain(connection, today, months_ahead, months_kept):
+    '''creates the partitions up to months_ahead after this month and archives those that
+    ended more than months_kept months ago, returns the (created, archived) names'''
+    partitions = month_partitions(connection)
+    this_month = month_start(today)
+
+    created = []
+    for offset in range(months_ahead + 1):
+        month = add_months(this_month, offset)
+        if month not in partitions:
+            created.append(create_partition(connection, month))
+
+    archived = []
+    if months_kept is not None:
+        oldest_kept = add_months(this_month, -months_kept)
+        for month, name in sorted(partitions.items()):
+            if month < oldest_kept:
+                archive_partition(connection, name)
+                archived.append(name)
+    return created, archived
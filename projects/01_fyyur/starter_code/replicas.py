@@ -0,0 +1,64 @@
+import functools
+import random
+import time
+
+from flask import current_app, g, has_app_context, request
+try:
+    # RoutingSession extends the session of Flask-SQLAlchemy 3 and its engine lookup (_db)
+    from flask_sqlalchemy.session import Session
+except ImportError:
+    raise ImportError('read replica routing needs Flask-SQLAlchemy 3, see requirements.txt') from None
+
+# Read replicas. config.SQLALCHEMY_BINDS holds one replica_<n> bind per replica URL. The
+# views decorated with read_only run their queries on a random replica, everything else
+# (and anything a read_only view flushes) on the primary. A client that just wrote reads
+# from the primary for REPLICA_STICKY_SECONDS, so it sees its own writes despite the
+# replication lag.
+
+REPLICA_BIND_PREFIX = 'replica_'
+PRIMARY_COOKIE = 'fyyur_primary_until'
+
+
+class RoutingSession(Session):
+    '''db.session, on the replica picked for the request if there is one'''
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        replica = g.get('replica') if has_app_context() else None
+        if bind is None and replica is not None and not self._flushing:
+            return self._db.engines[replica]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def replica_binds():
+    return sorted(key for key in current_app.config.get('SQLALCHEMY_BINDS', {}) if key.startswith(REPLICA_BIND_PREFIX))
+
+
+def wrote_recently():
+    try:
+        return float(request.cookies.get(PRIMARY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def read_only(view):
+    '''runs the queries of a view on a replica, unless the client wrote recently'''
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        binds = replica_binds()
+        if binds and not wrote_recently():
+            g.replica = random.choice(binds)
+        return view(*args, **kwargs)
+    wrapper.read_only = True
+    return wrapper
+
+
+def stick_to_primary(response):
+    '''after_request hook, after a write the client reads from the primary for a while'''
+    if request.method in ('GET', 'HEAD', 'OPTIONS') or response.status_code >= 500:
+        return response
+    view = current_app.view_functions.get(request.endpoint)
+    if getattr(view, 'read_only', False) or not replica_binds():
+        return response
+    sticky = current_app.config['REPLICA_STICKY_SECONDS']
+    response.set_cookie(PRIMARY_COOKIE, '{:.3f}'.format(time.time() + sticky), max_age=sticky, httponly=True)
+    return response
@@ -0,0 +1,121 @@
+# ----------------------------------------------------------------------------#
+# Production serving.
+#
+#   python serve.py                      gunicorn (waitress on Windows)
+#   python serve.py --server waitress
+#   gunicorn app:app                     picks up gunicorn.conf.py
+#
+# WEB_CONCURRENCY and WEB_THREADS override the worker and thread counts.
+# ----------------------------------------------------------------------------#
+
+import argparse
+import os
+import sys
+
+
+def cpu_count():
+    # cores this process may run on, not all cores of the host
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def worker_count():
+    return int(os.environ.get('WEB_CONCURRENCY', 2 * cpu_count() + 1))
+
+
+def thread_count():
+    # requests mostly wait on the database, a few threads per worker keep the cores busy
+    return int(os.environ.get('WEB_THREADS', 4))
+
+
+def bind_address():
+    return '0.0.0.0:{}'.format(os.environ.get('PORT', 5000))
+
+
+def dispose_engine():
+    '''drop the pooled connections inherited from the master, each worker opens its own'''
+    from app import app, db
+    with app.app_context():
+        # the primary and the read replicas
+        for engine in db.engines.values():
+            try:
+                # SQLAlchemy >= 1.4.33, leaves the parent's sockets alone instead of closing them
+                engine.dispose(close=False)
+            except TypeError:
+                engine.dispose()
+
+
+def warm_up():
+    '''compile the templates and import what app.py imports lazily (forms, babel, dateutil)'''
+    import babel.dates
+    import dateutil.parser
+    import forms
+    from app import load_templates
+    load_templates()
+
+
+def when_ready(server):
+    # with preload_app this runs in the master before forking, the workers inherit the
+    # warmed up modules and templates instead of each loading them on its first requests
+    warm_up()
+
+
+def post_fork(server, worker):
+    dispose_engine()
+
+
+def gunicorn_options(bind=None, workers=None, threads=None):
+    return {
+        'bind': bind or bind_address(),
+        'workers': workers or worker_count(),
+        'threads': threads or thread_count(),
+        'worker_class': 'gthread',
+        # import the app (and its heavy modules) once in the master, workers share those pages
+        'preload_app': True,
+        'when_ready': when_ready,
+        'post_fork': post_fork,
+        'accesslog': '-',
+    }
+
+
+def run_gunicorn(bind=None, workers=None, threads=None):
+    from gunicorn.app.base import BaseApplication
+
+    class FyyurApplication(BaseApplication):
+        def load_config(self):
+            for key, value in gunicorn_options(bind, workers, threads).items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            from app import app
+            return app
+
+    FyyurApplication().run()
+
+
+def run_waitress(bind=None, threads=None):
+    # one process, no fork, so no engine disposal needed
+    from waitress import serve
+    from app import app
+    warm_up()
+    serve(app, listen=bind or bind_address(), threads=threads or worker_count() * thread_count())
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve Fyyur with a production WSGI server')
+    parser.add_argument('--server', choices=['gunicorn', 'waitress'],
+                        default='waitress' if sys.platform == 'win32' else 'gunicorn')
+    parser.add_argument('--bind', help='host:port, defaults to 0.0.0.0:$PORT')
+    parser.add_argument('--workers', type=int, help='gunicorn worker processes, defaults to 2 * cores + 1')
+    parser.add_argument('--threads', type=int, help='threads per worker')
+    args = parser.parse_args()
+
+    if args.server == 'gunicorn':
+        run_gunicorn(args.bind, args.workers, args.threads)
+    else:
+        run_waitress(args.bind, args.threads)
+
+
+if __name__ == '__main__':
+    main()
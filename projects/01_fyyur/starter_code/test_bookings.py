@@ -0,0 +1,66 @@
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import unittest
+
+basedir = os.path.abspath(os.path.dirname(__file__))
+
+SEED = '''
+from app import app, db, Venue, Artist
+with app.app_context():
+    db.create_all()
+    db.session.add(Venue(name='venue', city='City', state='CA', address='1 Main St', genres='Jazz'))
+    db.session.add(Artist(name='artist', city='City', state='CA', genres='Jazz'))
+    db.session.commit()
+'''
+
+# a worker that is slow between the conflict check and the insert
+WORKER = '''
+import sys, time
+from app import app, booking_index
+
+check = booking_index.conflicts
+
+def slow_check(*args):
+    conflicts = check(*args)
+    time.sleep(0.5)
+    return conflicts
+
+booking_index.conflicts = slow_check
+app.test_client().post('/shows/create', data={
+    'venue_id': '1', 'artist_id': '1', 'start_time': sys.argv[1], 'duration_minutes': '120'})
+'''
+
+
+class ConcurrentBookingTestCase(unittest.TestCase):
+    """Workers listing overlapping shows at once on sqlite"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.database = os.path.join(self.tmp.name, 'fyyur.db')
+        # a process per worker, like gunicorn's, the app module is not imported here
+        self.env = dict(os.environ, DATABASE_URL='sqlite:///{}'.format(self.database), DATABASE_REPLICA_URLS='')
+        subprocess.run([sys.executable, '-c', SEED], cwd=basedir, env=self.env, check=True)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_overlapping_shows_are_not_both_listed(self):
+        workers = [subprocess.Popen([sys.executable, '-c', WORKER, start_time], cwd=basedir, env=self.env)
+                   for start_time in ['2030-06-01 20:00', '2030-06-01 21:00']]
+        for worker in workers:
+            self.assertEqual(worker.wait(), 0)
+
+        connection = sqlite3.connect(self.database)
+        try:
+            shows = connection.execute('SELECT start_time FROM "Show"').fetchall()
+        finally:
+            connection.close()
+        self.assertEqual(len(shows), 1, shows)
+
+
+# Make the tests conveniently executable
+if __name__ == "__main__":
+    unittest.main()
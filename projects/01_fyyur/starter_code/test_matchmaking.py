@@ -0,0 +1,70 @@
+import unittest
+
+from matchmaking import Matchmaker
+
+
+class FakeDatabase:
+    """In-memory rows for the Matchmaker loaders"""
+
+    def __init__(self):
+        self.venues = {1: ('Jazz', 'CA', True), 2: ('Rock_n_Roll', 'CA', True)}
+        self.artists = {1: ('Jazz', 'CA', True), 2: ('Rock_n_Roll', 'CA', True)}
+        self.shows = []
+        self.on_load_artists = None
+
+    @staticmethod
+    def rows(table, ids, after_id):
+        return [(entity_id,) + table[entity_id] for entity_id in sorted(table)
+                if entity_id > after_id and (ids is None or entity_id in ids)]
+
+    def load_venues(self, ids=None, after_id=0):
+        return self.rows(self.venues, ids, after_id)
+
+    def load_artists(self, ids=None, after_id=0):
+        hook, self.on_load_artists = self.on_load_artists, None
+        if hook is not None:
+            hook()
+        return self.rows(self.artists, ids, after_id)
+
+    def load_shows(self, after_id=0):
+        return [show for show in self.shows if show[0] > after_id]
+
+
+class MatchmakerTestCase(unittest.TestCase):
+    """Recommendations kept up to date across edits and rebuilds"""
+
+    def setUp(self):
+        self.database = FakeDatabase()
+        self.matchmaker = Matchmaker(self.database.load_venues, self.database.load_artists,
+                                     self.database.load_shows, rebuild_seconds=3600)
+
+    def best_artist(self, venue_id):
+        return self.matchmaker.recommended_artists(venue_id)[0][0]
+
+    def test_edit_is_applied(self):
+        self.assertEqual(self.best_artist(1), 1)
+
+        self.database.venues[1] = ('Rock_n_Roll', 'CA', True)
+        self.matchmaker.venue_changed(1)
+        self.assertEqual(self.best_artist(1), 2)
+
+    def test_edit_during_background_rebuild_survives_it(self):
+        self.assertEqual(self.best_artist(1), 1)
+
+        def edit_and_read():
+            # the rebuild has loaded the venues already, a read meanwhile serves the edit
+            self.database.venues[1] = ('Rock_n_Roll', 'CA', True)
+            self.matchmaker.venue_changed(1)
+            self.assertEqual(self.best_artist(1), 2)
+
+        self.database.on_load_artists = edit_and_read
+        self.matchmaker.rebuild_seconds = 0
+        self.matchmaker.recommended_artists(2)
+        self.matchmaker.rebuild_seconds = 3600
+        self.assertIsNone(self.database.on_load_artists)
+        self.assertEqual(self.best_artist(1), 2)
+
+
+# Make the tests conveniently executable
+if __name__ == "__main__":
+    unittest.main()
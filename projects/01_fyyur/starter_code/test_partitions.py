@@ -0,0 +1,139 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, exc, text
+
+# an empty postgres (11 or later, with btree_gist available) database the test migrates up
+# and back down, e.g. postgresql+psycopg2://postgres@localhost/fyyur_test
+DATABASE_URL = os.environ.get('FYYUR_TEST_POSTGRES_URL')
+# the last revision before Show is partitioned
+UNPARTITIONED = 'e2f7a9c4d158'
+basedir = os.path.abspath(os.path.dirname(__file__))
+
+
+def flask(*args):
+    # the commands run like they would in production, in a process of their own
+    env = dict(os.environ, DATABASE_URL=DATABASE_URL, FLASK_APP='app.py',
+               FYYUR_ERROR_LOG=os.path.join(tempfile.gettempdir(), 'fyyur_test_error.log'))
+    result = subprocess.run([sys.executable, '-m', 'flask'] + list(args), cwd=basedir, env=env,
+                            stdout=subprocess.PIPE, stderr=subprocess.STDOUT, universal_newlines=True)
+    if result.returncode != 0:
+        raise AssertionError('flask {} failed:\n{}'.format(' '.join(args), result.stdout))
+    return result.stdout
+
+
+# the partitions the conflict check of a show on the 15th of this month scans, and the shows it finds
+CONFLICT_CHECK = '''
+from datetime import datetime, timedelta
+from sqlalchemy import event
+from app import app, db, show_conflicts
+
+start = datetime.now().replace(day=15, hour=10, minute=0, second=0, microsecond=0)
+statements = []
+with app.app_context():
+    event.listen(db.engine, 'before_cursor_execute',
+                 lambda connection, cursor, statement, parameters, context, many: statements.append((statement, parameters)))
+    print(show_conflicts(1, 1, start, start + timedelta(hours=2)))
+    with db.engine.connect() as connection:
+        plan = connection.exec_driver_sql('EXPLAIN ' + statements[0][0], statements[0][1]).scalars().all()
+print(sorted({line.split(' on ')[1].split()[0] for line in plan if 'Heap Scan on' in line or 'Seq Scan on' in line}))
+'''
+
+
+def python(code):
+    env = dict(os.environ, DATABASE_URL=DATABASE_URL,
+               FYYUR_ERROR_LOG=os.path.join(tempfile.gettempdir(), 'fyyur_test_error.log'))
+    return subprocess.run([sys.executable, '-c', code], cwd=basedir, env=env, check=True,
+                          stdout=subprocess.PIPE, universal_newlines=True).stdout
+
+
+@unittest.skipUnless(DATABASE_URL, 'set FYYUR_TEST_POSTGRES_URL to an empty postgres database')
+class ShowPartitionsTestCase(unittest.TestCase):
+    """The Show partitioning migration and `flask show-partitions` on postgres"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.engine = create_engine(DATABASE_URL)
+        flask('db', 'upgrade', UNPARTITIONED)
+        # venue 1 and artist 1 only have shows old enough to be archived
+        cls.upcoming = datetime.now().replace(microsecond=0) + timedelta(days=10)
+        with cls.engine.begin() as connection:
+            connection.execute(text(
+                'INSERT INTO "Venue" (id, name, city, state, address, genres) VALUES '
+                "(1, 'Old Hall', 'San Francisco', 'CA', '1 Main St', 'Jazz'), "
+                "(2, 'New Hall', 'San Francisco', 'CA', '2 Main St', 'Jazz')"))
+            connection.execute(text(
+                'INSERT INTO "Artist" (id, name, city, state, genres) VALUES '
+                "(1, 'Old Band', 'San Francisco', 'CA', 'Jazz'), (2, 'New Band', 'San Francisco', 'CA', 'Jazz')"))
+            connection.execute(text(
+                'INSERT INTO "Show" (venue_id, artist_id, start_time) VALUES '
+                "(1, 1, '2020-06-01 20:00'), (2, 2, '2020-07-15 20:00'), (2, 2, :upcoming)"),
+                {'upcoming': cls.upcoming})
+        flask('db', 'upgrade')
+        cls.output = flask('show-partitions', '--months-ahead', '12', '--months-kept', '24')
+
+    @classmethod
+    def tearDownClass(cls):
+        try:
+            flask('db', 'downgrade', 'base')
+        finally:
+            with cls.engine.begin() as connection:
+                connection.execute(text('DROP SCHEMA IF EXISTS archive CASCADE'))
+            cls.engine.dispose()
+
+    def test_old_months_are_archived(self):
+        self.assertIn('archived Show_2020_06, Show_2020_07,', self.output)
+        with self.engine.connect() as connection:
+            archived = connection.execute(text(
+                'SELECT id FROM archive."Show_2020_06" UNION ALL SELECT id FROM archive."Show_2020_07"')).scalars()
+            self.assertEqual(sorted(archived), [1, 2])
+            self.assertEqual(connection.execute(text('SELECT count(*) FROM "Show"')).scalar(), 1)
+
+    def test_upcoming_show_is_in_its_month_partition(self):
+        with self.engine.connect() as connection:
+            partition = connection.execute(text('SELECT tableoid::regclass::text FROM "Show"')).scalar()
+        self.assertEqual(partition, '"{:Show_%Y_%m}"'.format(self.upcoming))
+
+    def test_archived_shows_do_not_block_deletes(self):
+        with self.engine.connect() as connection:
+            transaction = connection.begin()
+            try:
+                connection.execute(text('DELETE FROM "Venue" WHERE id = 1'))
+                connection.execute(text('DELETE FROM "Artist" WHERE id = 1'))
+            finally:
+                transaction.rollback()
+
+    def test_shows_in_show_still_block_deletes(self):
+        with self.engine.connect() as connection:
+            with self.assertRaises(exc.IntegrityError):
+                connection.execute(text('DELETE FROM "Venue" WHERE id = 2'))
+
+    def test_conflict_check_scans_only_the_months_a_conflict_can_start_in(self):
+        # shows last up to MAX_DURATION_MINUTES, one overlapping the 15th started on the 14th at
+        # the earliest, the partitions of the months before are not scanned
+        start = datetime.now().replace(day=15, hour=10, minute=0, second=0, microsecond=0)
+        with self.engine.begin() as connection:
+            show_id = connection.execute(text(
+                'INSERT INTO "Show" (venue_id, artist_id, start_time, duration_minutes) '
+                'VALUES (1, 1, :start, 20 * 60) RETURNING id'), {'start': start - timedelta(hours=19)}).scalar()
+        try:
+            found, scanned = python(CONFLICT_CHECK).splitlines()
+        finally:
+            with self.engine.begin() as connection:
+                connection.execute(text('DELETE FROM "Show" WHERE id = :id'), {'id': show_id})
+
+        self.assertEqual(found, str([show_id]))
+        self.assertEqual(scanned, str(['"{:Show_%Y_%m}"'.format(start)]))
+
+    def test_second_run_has_nothing_to_do(self):
+        output = flask('show-partitions', '--months-ahead', '12', '--months-kept', '24')
+        self.assertIn('created no partitions, archived none', output)
+
+
+# Make the tests conveniently executable
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+import importlib
+import os
+import sys
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from replicas import PRIMARY_COOKIE
+
+
+class ReadReplicaTestCase(unittest.TestCase):
+    """Routing of Fyyur's queries between the primary and a read replica"""
+
+    @classmethod
+    def setUpClass(cls):
+        # two sqlite files stand in for the primary and its replica, they are given different rows
+        # so every response tells which database it was read from
+        cls.tmp = tempfile.TemporaryDirectory()
+        # the app reads the database URLs when it is imported, it is imported again by the next
+        # test case with its own environment
+        cls.environ = mock.patch.dict(os.environ, {
+            'DATABASE_URL': 'sqlite:///{}'.format(os.path.join(cls.tmp.name, 'primary.db')),
+            'DATABASE_REPLICA_URLS': 'sqlite:///{}'.format(os.path.join(cls.tmp.name, 'replica.db'))})
+        cls.environ.start()
+        for module in ('app', 'config'):
+            sys.modules.pop(module, None)
+        fyyur = importlib.import_module('app')
+        cls.app, cls.db, cls.Venue, cls.Artist = fyyur.app, fyyur.db, fyyur.Venue, fyyur.Artist
+
+        app, db, Venue, Artist = cls.app, cls.db, cls.Venue, cls.Artist
+        with app.app_context():
+            for database, engine in [('primary', db.engine), ('replica', db.engines['replica_0'])]:
+                db.metadata.create_all(engine)
+                with engine.begin() as connection:
+                    connection.execute(Venue.__table__.insert(), {
+                        'id': 1, 'name': '{} venue'.format(database), 'city': 'San Francisco', 'state': 'CA',
+                        'address': '1 Main St', 'genres': 'Jazz'})
+                    connection.execute(Artist.__table__.insert(), {
+                        'id': 1, 'name': '{} artist'.format(database), 'city': 'San Francisco', 'state': 'CA',
+                        'genres': 'Jazz'})
+
+    @classmethod
+    def tearDownClass(cls):
+        with cls.app.app_context():
+            for engine in cls.db.engines.values():
+                engine.dispose()
+        cls.environ.stop()
+        for module in ('app', 'config'):
+            sys.modules.pop(module, None)
+        cls.tmp.cleanup()
+
+    def setUp(self):
+        self.client = self.app.test_client()
+
+    def test_listing_and_detail_pages_read_from_the_replica(self):
+        for url in ['/venues', '/venues/1', '/artists', '/artists/1']:
+            html = self.client.get(url).get_data(as_text=True)
+            self.assertIn('replica', html, url)
+            self.assertNotIn('primary', html, url)
+
+    def test_search_reads_from_the_replica(self):
+        res = self.client.post('/venues/search', data={'search_term': 'venue'})
+        self.assertIn('replica venue', res.get_data(as_text=True))
+        self.assertNotIn(PRIMARY_COOKIE, res.headers.get('Set-Cookie', ''))
+
+    def test_other_views_read_from_the_primary(self):
+        html = self.client.get('/venues/1/edit').get_data(as_text=True)
+        self.assertIn('primary venue', html)
+
+    def test_writes_go_to_the_primary(self):
+        self.client.post('/artists/create', data={
+            'name': 'new artist', 'city': 'Oakland', 'state': 'CA', 'phone': '', 'genres': 'Jazz',
+            'facebook_link': ''})
+        db, Artist = self.db, self.Artist
+        with self.app.app_context():
+            self.assertEqual(db.session.query(Artist).filter_by(name='new artist').count(), 1)
+            with db.engines['replica_0'].connect() as connection:
+                self.assertEqual(connection.execute(
+                    Artist.__table__.select().where(Artist.name == 'new artist')).fetchall(), [])
+
+    def test_reads_stick_to_the_primary_after_a_write(self):
+        res = self.client.post('/venues/1/edit', data={
+            'name': 'primary venue', 'city': 'San Francisco', 'state': 'CA', 'address': '1 Main St',
+            'phone': '', 'genres': 'Jazz', 'facebook_link': ''})
+        self.assertIn(PRIMARY_COOKIE, res.headers['Set-Cookie'])
+        html = self.client.get('/venues/1').get_data(as_text=True)
+        self.assertIn('primary venue', html)
+
+    def test_stickiness_expires(self):
+        self.client.set_cookie(PRIMARY_COOKIE, str(time.time() - 1))
+        html = self.client.get('/venues/1').get_data(as_text=True)
+        self.assertIn('replica venue', html)
+
+
+# Make the tests conveniently executable
+if __name__ == "__main__":
+    unittest.main()
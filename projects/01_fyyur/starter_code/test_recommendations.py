@@ -0,0 +1,74 @@
+import importlib
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+
+class RecommendationsTestCase(unittest.TestCase):
+    """The recommended_artists and recommended_venues endpoints"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory()
+        # the app reads the database URLs when it is imported, see test_read_replicas.py
+        cls.environ = mock.patch.dict(os.environ, {
+            'DATABASE_URL': 'sqlite:///{}'.format(os.path.join(cls.tmp.name, 'fyyur.db')),
+            'DATABASE_REPLICA_URLS': ''})
+        cls.environ.start()
+        for module in ('app', 'config'):
+            sys.modules.pop(module, None)
+        fyyur = importlib.import_module('app')
+        cls.app, cls.db = fyyur.app, fyyur.db
+
+        with cls.app.app_context():
+            # genres was nullable before migration a5a0296ea09b
+            with mock.patch.object(fyyur.Artist.__table__.c.genres, 'nullable', True):
+                cls.db.create_all()
+            cls.db.session.add(fyyur.Venue(id=1, name='venue', city='San Francisco', state='CA', address='1 Main St',
+                                           genres='Jazz', seeking_talent=True))
+            for artist_id, genres in [(1, 'Jazz'), (2, 'Jazz,Blues'), (3, 'Rock n Roll'), (4, None)]:
+                cls.db.session.add(fyyur.Artist(id=artist_id, name='artist {}'.format(artist_id), city='San Francisco',
+                                                state='CA', genres=genres, seeking_venue=True))
+            cls.db.session.commit()
+
+    @classmethod
+    def tearDownClass(cls):
+        with cls.app.app_context():
+            cls.db.engine.dispose()
+        cls.environ.stop()
+        for module in ('app', 'config'):
+            sys.modules.pop(module, None)
+        cls.tmp.cleanup()
+
+    def setUp(self):
+        self.client = self.app.test_client()
+
+    def recommended_artists(self, query=''):
+        res = self.client.get('/venues/1/recommended_artists' + query)
+        self.assertEqual(res.status_code, 200)
+        return res.get_json()['artists']
+
+    def test_limit(self):
+        self.assertEqual(len(self.recommended_artists()), 4)
+        self.assertEqual(len(self.recommended_artists('?limit=1000')), 4)
+        self.assertEqual([artist['id'] for artist in self.recommended_artists('?limit=2')], [1, 2])
+        self.assertEqual(self.recommended_artists('?limit=0'), [])
+
+    def test_negative_limit(self):
+        for url in ['/venues/1/recommended_artists?limit=-1', '/artists/1/recommended_venues?limit=-5']:
+            res = self.client.get(url)
+            self.assertEqual(res.status_code, 400, url)
+            self.assertEqual(res.get_json()['success'], False)
+
+    def test_artist_without_genres(self):
+        artists = {artist['id']: artist for artist in self.recommended_artists()}
+
+        self.assertEqual(artists[4]['genres'], [])
+        self.assertEqual(artists[2]['genres'], ['Jazz', 'Blues'])
+
+
+# Make the tests conveniently executable
+if __name__ == "__main__":
+    unittest.main()
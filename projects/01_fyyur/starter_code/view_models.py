@@ -0,0 +1,42 @@
+from collections import namedtuple
+
+# What the detail templates render. Built from plain column tuples, so no ORM instance (and its
+# _sa_instance_state) reaches the templates and nothing identity-mapped is mutated per request.
+
+VENUE_FIELDS = ['id', 'name', 'genres', 'address', 'city', 'state', 'phone', 'website',
+                'facebook_link', 'seeking_talent', 'seeking_description', 'image_link']
+ARTIST_FIELDS = ['id', 'name', 'genres', 'city', 'state', 'phone', 'website',
+                 'facebook_link', 'seeking_venue', 'seeking_description', 'image_link']
+SHOW_LIST_FIELDS = ['past_shows', 'upcoming_shows', 'past_shows_count', 'upcoming_shows_count']
+
+VenueShow = namedtuple('VenueShow', ['artist_id', 'artist_name', 'artist_image_link', 'start_time'])
+ArtistShow = namedtuple('ArtistShow', ['venue_id', 'venue_name', 'venue_image_link', 'start_time'])
+VenuePage = namedtuple('VenuePage', VENUE_FIELDS + SHOW_LIST_FIELDS)
+ArtistPage = namedtuple('ArtistPage', ARTIST_FIELDS + SHOW_LIST_FIELDS)
+
+
+def split_shows(shows, now):
+    '''(past, upcoming) of shows ordered by start_time, a show starting right now counts as past'''
+    upcoming_from = len(shows)
+    for i, show in enumerate(shows):
+        if show.start_time > now:
+            upcoming_from = i
+            break
+    return shows[:upcoming_from], shows[upcoming_from:]
+
+
+def page(page_type, row, shows, now):
+    '''page_type for a (*_FIELDS ordered) column row and its shows ordered by start_time'''
+    past, upcoming = split_shows(shows, now)
+    fields = list(row)
+    fields[2] = fields[2].split(",")
+    return page_type(*fields, past_shows=past, upcoming_shows=upcoming,
+                     past_shows_count=len(past), upcoming_shows_count=len(upcoming))
+
+
+def venue_page(row, shows, now):
+    return page(VenuePage, row, [VenueShow._make(show) for show in shows], now)
+
+
+def artist_page(row, shows, now):
+    return page(ArtistPage, row, [ArtistShow._make(show) for show in shows], now)
@@ -0,0 +1,320 @@
+from quart import Quart, request, abort, jsonify
+from quart_cors import cors
+from sqlalchemy import Column, Integer, String, select, func
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import declarative_base, sessionmaker
+
+QUESTIONS_PER_PAGE = 10
+
+# the async app only needs requirements-async.txt (SQLAlchemy 1.4, no Flask), so it maps the
+# tables of models.py onto its own declarative base instead of importing the Flask-SQLAlchemy models
+database_path = "postgres://{}:{}@{}/{}".format('postgres', 'root', 'localhost:5432', 'trivia')
+
+Base = declarative_base()
+
+
+'''
+Question
+
+'''
+
+
+class Question(Base):
+    __tablename__ = 'questions'
+
+    id = Column(Integer, primary_key=True)
+    question = Column(String)
+    answer = Column(String)
+    category = Column(String)
+    difficulty = Column(Integer)
+
+    def format(self):
+        return {
+            'id': self.id,
+            'question': self.question,
+            'answer': self.answer,
+            'category': self.category,
+            'difficulty': self.difficulty
+        }
+
+
+'''
+Category
+
+'''
+
+
+class Category(Base):
+    __tablename__ = 'categories'
+
+    id = Column(Integer, primary_key=True)
+    type = Column(String)
+
+    def format(self):
+        return {
+            'id': self.id,
+            'type': self.type
+        }
+
+'''
+async_database_path(path)
+    maps a sync database url onto the matching async driver
+    postgres -> asyncpg, sqlite -> aiosqlite
+'''
+
+
+def async_database_path(path):
+    if path.startswith('postgres://'):
+        return 'postgresql+asyncpg://' + path[len('postgres://'):]
+    if path.startswith('postgresql://'):
+        return 'postgresql+asyncpg://' + path[len('postgresql://'):]
+    if path.startswith('sqlite://'):
+        return 'sqlite+aiosqlite://' + path[len('sqlite://'):]
+    return path
+
+
+def create_app(test_config=None, database_path=database_path):
+    # create and configure the ASGI variant of the app
+    # serve it with e.g. `uvicorn --factory asgi:create_app`
+    app = Quart(__name__)
+    app = cors(app, allow_origin='*')
+
+    engine = create_async_engine(async_database_path(database_path))
+    Session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    app.config['ASYNC_ENGINE'] = engine
+
+    @app.after_serving
+    async def dispose_engine():
+        await engine.dispose()
+
+    @app.after_request
+    async def after_request(response):
+        response.headers.add('Access-Control-Allow-Headers', 'Content-Type, Authorization')
+        response.headers.add('Access-Control-Allow-Methods', 'GET, POST, PATCH, DELETE, OPTIONS')
+        return response
+
+    async def get_categories_data(session):
+        categories_query = await session.execute(
+            select(Category.id, Category.type).order_by(Category.id)
+        )
+        return {category.id: category.type for category in categories_query}
+
+    def filter_questions(query, search_term, category):
+        query = query.where(Question.question.ilike("%{}%".format(search_term)))
+
+        if category is not None:
+            query = query.where(Question.category == str(category))
+
+        return query
+
+    async def count_questions(session, search_term, category):
+        return await session.scalar(
+            filter_questions(select(func.count(Question.id)), search_term, category)
+        )
+
+    async def fetch_questions(session, search_term, category, offset=0):
+        questions_query = await session.scalars(
+            filter_questions(select(Question), search_term, category)
+            .order_by(Question.id)
+            .offset(offset)
+            .limit(QUESTIONS_PER_PAGE)
+        )
+        return [question.format() for question in questions_query]
+
+    @app.route('/')
+    async def health():
+        return jsonify({'health': 'Running!!'}), 200
+
+    @app.route('/categories')
+    async def get_categories():
+        async with Session() as session:
+            categories_data = await get_categories_data(session)
+
+        if len(categories_data) == 0:
+            abort(500)
+
+        return jsonify({
+            'categories': categories_data
+        }), 200
+
+    @app.route('/questions')
+    async def get_questions():
+        search_term = request.args.get('search_term', '')
+        current_category = request.args.get('current_category', None)
+        current_category = None if current_category == '' else current_category
+        page = request.args.get('page', 1, type=int)
+        start = (page - 1) * QUESTIONS_PER_PAGE
+
+        try:
+            async with Session() as session:
+                selected_questions_data = await fetch_questions(session, search_term, current_category, start)
+
+                if len(selected_questions_data) == 0:
+                    raise IndexError
+
+                total_questions = await count_questions(session, search_term, current_category)
+                categories_data = await get_categories_data(session)
+
+            return jsonify({
+                'questions': selected_questions_data,
+                'total_questions': total_questions,
+                'categories': categories_data,
+                'current_category': current_category,
+                'search_term': search_term
+            }), 200
+
+        except IndexError:
+            abort(404)
+
+        except:
+            abort(500)
+
+    @app.route('/questions/<int:question_id>', methods=['DELETE'])
+    async def delete_question_by_id(question_id):
+        async with Session() as session:
+            question = await session.get(Question, question_id)
+
+            if question is None:
+                abort(404)
+
+            try:
+                await session.delete(question)
+                await session.commit()
+                return jsonify({
+                    'success': True
+                }), 200
+
+            except:
+                await session.rollback()
+                abort(500)
+
+    @app.route('/questions', methods=['POST'])
+    async def create_question():
+        try:
+            request_body = await request.get_json()
+            if request_body['question'] == '' or request_body['answer'] == '':
+                raise TypeError
+
+            new_question = Question(
+                question=request_body['question'],
+                answer=request_body['answer'],
+                category=request_body['category'],
+                difficulty=request_body['difficulty']
+            )
+
+            async with Session() as session:
+                session.add(new_question)
+                await session.commit()
+
+            return jsonify({
+                'success': True
+            }), 201
+
+        except TypeError:
+            abort(422)
+
+        except:
+            abort(500)
+
+    @app.route('/questions/search', methods=['POST'])
+    async def search_questions():
+        try:
+            request_body = await request.get_json()
+
+            if 'searchTerm' not in request_body or 'currentCategory' not in request_body:
+                raise TypeError
+
+            questions_search_term = request_body['searchTerm']
+            current_category = request_body['currentCategory']
+
+            async with Session() as session:
+                questions_data = await fetch_questions(session, questions_search_term, current_category)
+                total_questions = await count_questions(session, questions_search_term, current_category)
+                categories_data = await get_categories_data(session)
+
+            return jsonify({
+                'questions': questions_data,
+                'total_questions': total_questions,
+                'categories': categories_data,
+                'current_category': current_category,
+                'search_term': questions_search_term
+            }), 200
+
+        except TypeError:
+            abort(400)
+
+        except:
+            abort(500)
+
+    @app.route('/categories/<category_id>/questions')
+    async def get_category_specific_question(category_id):
+        try:
+            questions_search_term = request.args.get('search_term', '')
+
+            async with Session() as session:
+                questions_data = await fetch_questions(session, questions_search_term, category_id)
+
+                if len(questions_data) == 0:
+                    raise IndexError
+
+                total_questions = await count_questions(session, questions_search_term, category_id)
+                categories_data = await get_categories_data(session)
+
+            return jsonify({
+                'questions': questions_data,
+                'total_questions': total_questions,
+                'categories': categories_data,
+                'current_category': category_id,
+                'search_term': questions_search_term
+            }), 200
+
+        except IndexError:
+            abort(404)
+
+        except:
+            abort(500)
+
+    @app.route('/quizzes', methods=['POST'])
+    async def play_quiz():
+        try:
+            request_body = await request.get_json()
+
+            if 'previous_questions' not in request_body \
+                    or 'quiz_category' not in request_body \
+                    or 'id' not in request_body['quiz_category']:
+                raise TypeError
+
+            previous_questions = request_body['previous_questions']
+            category_id = request_body['quiz_category']['id']
+            questions_query = select(Question).where(Question.id.notin_(previous_questions))
+
+            if category_id != 0:
+                questions_query = questions_query.where(Question.category == str(category_id))
+
+            # let the database pick the random row, one round trip instead of two
+            async with Session() as session:
+                next_question = await session.scalar(questions_query.order_by(func.random()).limit(1))
+
+            return jsonify({
+                'question': None if next_question is None else next_question.format()
+            }), 200
+
+        except TypeError:
+            abort(400)
+
+        except:
+            abort(500)
+
+    @app.errorhandler(400)
+    @app.errorhandler(404)
+    @app.errorhandler(405)
+    @app.errorhandler(422)
+    @app.errorhandler(500)
+    async def error_handler(error):
+        return jsonify({
+            'success': False,
+            'error': error.code,
+            'message': error.description
+        }), error.code
+
+    return app
@@ -0,0 +1,89 @@
+"""Throughput benchmark, sync (WSGI) vs async (ASGI) trivia API
+
+Start both servers against the same database first, e.g.:
+
+    gunicorn -w 4 -b 127.0.0.1:5000 'flaskr:create_app()'
+    uvicorn --factory asgi:create_app --workers 4 --port 8000
+
+then run:
+
+    python bench_asgi.py --sync-url http://127.0.0.1:5000 --async-url http://127.0.0.1:8000 --clients 500
+"""
+import argparse
+import asyncio
+import json
+import time
+from urllib.parse import urlsplit
+
+SCENARIOS = {
+    'quizzes': ('POST', '/quizzes', {'previous_questions': [], 'quiz_category': {'id': 0}}),
+    'search': ('POST', '/questions/search', {'searchTerm': 'w', 'currentCategory': None}),
+    'questions': ('GET', '/questions', None),
+}
+
+
+async def send_request(host, port, method, path, body):
+    reader, writer = await asyncio.open_connection(host, port)
+    payload = b'' if body is None else json.dumps(body).encode()
+    head = '{} {} HTTP/1.1\r\nHost: {}\r\nConnection: close\r\n'.format(method, path, host)
+    if body is not None:
+        head += 'Content-Type: application/json\r\nContent-Length: {}\r\n'.format(len(payload))
+    writer.write(head.encode() + b'\r\n' + payload)
+    await writer.drain()
+
+    status_line = await reader.readline()
+    await reader.read()
+    writer.close()
+    return int(status_line.split()[1])
+
+
+async def client(host, port, scenario, requests_per_client, latencies, errors):
+    method, path, body = SCENARIOS[scenario]
+    for _ in range(requests_per_client):
+        start = time.perf_counter()
+        try:
+            status = await send_request(host, port, method, path, body)
+            if status >= 500:
+                errors.append(status)
+        except OSError as e:
+            errors.append(e)
+        latencies.append(time.perf_counter() - start)
+
+
+async def run(url, scenario, clients, requests_per_client):
+    parts = urlsplit(url)
+    latencies, errors = [], []
+    start = time.perf_counter()
+    await asyncio.gather(*[
+        client(parts.hostname, parts.port or 80, scenario, requests_per_client, latencies, errors)
+        for _ in range(clients)
+    ])
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': len(errors),
+        'rps': len(latencies) / elapsed,
+        'p50_ms': latencies[len(latencies) // 2] * 1000,
+        'p99_ms': latencies[int(len(latencies) * 0.99) - 1] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sync-url', default='http://127.0.0.1:5000')
+    parser.add_argument('--async-url', default='http://127.0.0.1:8000')
+    parser.add_argument('--clients', type=int, default=500)
+    parser.add_argument('--requests', type=int, default=10, help='requests per client')
+    parser.add_argument('--scenario', choices=sorted(SCENARIOS), action='append')
+    args = parser.parse_args()
+
+    for scenario in args.scenario or ['quizzes', 'search']:
+        for name, url in (('sync', args.sync_url), ('async', args.async_url)):
+            result = asyncio.run(run(url, scenario, args.clients, args.requests))
+            print('{:<10} {:<6} {requests:>7} req  {errors:>5} err  {rps:>9.1f} req/s  '
+                  'p50 {p50_ms:>8.1f} ms  p99 {p99_ms:>8.1f} ms'.format(scenario, name, **result))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""Startup time from a cold interpreter to the first served request
+
+Each round starts a fresh python process that imports the app, builds it with
+create_app() and serves GET /categories through the test client. --legacy also
+runs db.create_all() at startup, like setup_db used to. Runs against a scratch
+sqlite database prepared once by the migration step. From the /backend directory run:
+
+    python bench_startup.py --rounds 10
+    python bench_startup.py --rounds 10 --legacy
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from flaskr import create_app
+from models import db, db_create_all, Category
+
+CHILD = '''
+import sys, time
+start = time.perf_counter()
+from flaskr import create_app
+from models import db
+imported = time.perf_counter()
+app = create_app(database_path=sys.argv[1])
+if sys.argv[2] == 'legacy':
+    with app.app_context():
+        db.create_all()
+created = time.perf_counter()
+res = app.test_client().get('/categories')
+assert res.status_code == 200, res.data
+served = time.perf_counter()
+print(imported - start, created - imported, served - created)
+'''
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rounds', type=int, default=10)
+    parser.add_argument('--legacy', action='store_true', help='run create_all on startup')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = 'sqlite:///{}'.format(os.path.join(tmp, 'trivia.db'))
+        app = create_app(database_path=path)
+        with app.app_context():
+            db_create_all()
+            db.session.add(Category('Science'))
+            db.session.commit()
+
+        phases = []
+        for _ in range(args.rounds):
+            start = time.perf_counter()
+            out = subprocess.run([sys.executable, '-c', CHILD, path, 'legacy' if args.legacy else 'migrated'],
+                                 check=True, capture_output=True, text=True).stdout
+            total = time.perf_counter() - start
+            phases.append([float(t) for t in out.split()] + [total])
+
+    for i, label in enumerate(['import', 'create_app', 'first request', 'total (with interpreter)']):
+        print('{:<26} median {:8.1f} ms'.format(label, statistics.median(p[i] for p in phases) * 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -6,15 +6,20 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_cors import CORS
 import random
 
-from models import setup_db, Question, Category
+from models import database_path, setup_db, db_create_all, Question, Category
 
 QUESTIONS_PER_PAGE = 10
 
 
-def create_app(test_config=None):
+def create_app(test_config=None, database_path=database_path):
     # create and configure the app
     app = Flask(__name__)
-    setup_db(app)
+    setup_db(app, database_path)
+
+    @app.cli.command('create-db')
+    def create_db():
+        # schema setup for a fresh database, app startup never touches the schema
+        db_create_all()
 
     CORS(app, resources={r"/*": {"origins": "*"}})
 
@@ -11,6 +11,8 @@ db = SQLAlchemy()
 '''
 setup_db(app)
     binds a flask application and a SQLAlchemy service
+    no DDL and no database round trips, the schema is created by the migration step
+    (`flask create-db` or restoring trivia.psql)
 '''
 
 
@@ -19,6 +21,17 @@ def setup_db(app, database_path=database_path):
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
     db.app = app
     db.init_app(app)
+
+
+'''
+db_create_all()
+    creates the tables that do not exist yet
+    the explicit migration step, run once per database and not on app startup
+    needs an app context
+'''
+
+
+def db_create_all():
     db.create_all()
 
 
@@ -0,0 +1,260 @@
+import os
+import re
+import tempfile
+import unittest
+
+from sqlalchemy import create_engine
+
+from asgi import create_app, Base, Question, Category, QUESTIONS_PER_PAGE
+
+basedir = os.path.abspath(os.path.dirname(__file__))
+
+
+def trivia_rows():
+    """The categories and questions of trivia.psql, the data test_flaskr.py runs against"""
+    rows = {}
+    with open(os.path.join(basedir, 'trivia.psql')) as dump:
+        copying = None
+        for line in dump:
+            line = line.rstrip('\n')
+            if copying is not None:
+                if line == '\\.':
+                    copying = None
+                else:
+                    table, columns = copying
+                    rows[table].append(dict(zip(columns, line.split('\t'))))
+                continue
+            match = re.match(r'COPY public\.(\w+) \(([^)]*)\) FROM stdin;', line)
+            if match:
+                copying = match.group(1), match.group(2).split(', ')
+                rows[copying[0]] = []
+    return rows
+
+
+class AsyncTriviaTestCase(unittest.IsolatedAsyncioTestCase):
+    """The assertions of test_flaskr.py against the async app (asgi.py), on aiosqlite"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.database_path = 'sqlite:///{}'.format(os.path.join(cls.tmp.name, 'trivia_test.db'))
+        cls.rows = trivia_rows()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp.cleanup()
+
+    def setUp(self):
+        """Restore trivia.psql into a fresh database, the tests delete and add questions"""
+        engine = create_engine(self.database_path)
+        Base.metadata.drop_all(engine)
+        Base.metadata.create_all(engine)
+        with engine.begin() as connection:
+            connection.execute(Category.__table__.insert(), self.rows['categories'])
+            connection.execute(Question.__table__.insert(), self.rows['questions'])
+        engine.dispose()
+
+        self.VALID_NEW_QUESTION = {
+            'question': 'Which is the test framework used in this project?',
+            'answer': 'unittest',
+            'category': '1',
+            'difficulty': 3
+        }
+
+        self.INVALID_QUESTION = {
+            'question': '',
+            'answer': '',
+            'category': '5',
+            'difficulty': 4
+        }
+
+        self.VALID_SEARCH_BODY = {
+            'searchTerm': 'w',
+            'currentCategory': '1'
+        }
+
+        self.INVALID_SEARCH_BODY = {
+            'search_term': 'what'
+        }
+
+        self.VALID_PLAY_QUIZ_BODY = {
+            'previous_questions': [1, 2],
+            'quiz_category': {
+                'id': '1'
+            }
+        }
+
+        self.INVALID_PLAY_QUIZ_BODY = {
+            'previous_questions': [1, 2]
+        }
+
+    async def asyncSetUp(self):
+        """Every test runs in an event loop of its own, so it gets an app and an engine of its own"""
+        self.app = create_app(database_path=self.database_path)
+        self.client = self.app.test_client
+
+    async def asyncTearDown(self):
+        await self.app.config['ASYNC_ENGINE'].dispose()
+
+    def assertError(self, data, status_code):
+        self.assertEqual(data['success'], False)
+        self.assertEqual(data['error'], status_code)
+        self.assertIn('message', data)
+
+    async def test_health(self):
+        """Test for GET / (health endpoint)"""
+        res = await self.client().get('/')
+        data = await res.get_json()
+
+        self.assertEqual(res.status_code, 200)
+        self.assertIn('health', data)
+        self.assertEqual(data['health'], 'Running!!')
+
+    async def test_get_categories(self):
+        """Passing Test for GET /categories"""
+        res = await self.client().get('/categories')
+        data = await res.get_json()
+
+        self.assertEqual(res.status_code, 200)
+        self.assertIn('categories', data)
+        self.assertEqual(data['categories'], {row['id']: row['type'] for row in self.rows['categories']})
+
+    async def test_get_questions(self):
+        """Passing Test for GET /questions"""
+        res = await self.client().get('/questions')
+        data = await res.get_json()
+
+        self.assertEqual(res.status_code, 200)
+        self.assertIn('categories', data)
+        self.assertTrue(data['categories'])
+        self.assertIn('current_category', data)
+        self.assertIsNone(data['current_category'])
+        self.assertEqual(data['total_questions'], len(self.rows['questions']))
+        self.assertEqual(len(data['questions']), QUESTIONS_PER_PAGE)
+        self.assertEqual(set(data['questions'][0]), {'id', 'question', 'answer', 'category', 'difficulty'})
+
+    async def test_paginate_questions(self):
+        """Passing Test for GET /questions?page=<page>, the pages split the questions by id"""
+        pages = []
+        for page in (1, 2):
+            res = await self.client().get('/questions?page={}'.format(page))
+            data = await res.get_json()
+            self.assertEqual(res.status_code, 200)
+            pages.append([question['id'] for question in data['questions']])
+
+        self.assertEqual(pages[0] + pages[1], sorted(int(row['id']) for row in self.rows['questions']))
+
+    async def test_404_get_questions(self):
+        """Failing Test for GET /questions, page number out of bound"""
+        res = await self.client().get('/questions?page=23')
+
+        self.assertEqual(res.status_code, 404)
+        self.assertError(await res.get_json(), 404)
+
+    async def test_delete_question(self):
+        """Passing Test for DELETE /questions/<question_id>"""
+        res = await self.client().delete('/questions/23')
+        data = await res.get_json()
+
+        self.assertEqual(res.status_code, 200)
+        self.assertIn('success', data)
+        self.assertTrue(data['success'])
+
+        res = await self.client().delete('/questions/23')
+        self.assertEqual(res.status_code, 404)
+
+    async def test_404_delete_question(self):
+        """Failing Test for DELETE /questions/<question_id>, question id does not exist"""
+        res = await self.client().delete('/questions/3000')
+        data = await res.get_json()
+
+        self.assertEqual(res.status_code, 404)
+        self.assertError(data, 404)
+
+    async def test_create_question(self):
+        """Passing Test for POST /questions"""
+        res = await self.client().post('/questions', json=self.VALID_NEW_QUESTION)
+        data = await res.get_json()
+
+        self.assertEqual(res.status_code, 201)
+        self.assertIn('success', data)
+        self.assertTrue(data['success'])
+
+        res = await self.client().post('/questions/search', json={'searchTerm': 'test framework',
+                                                                 'currentCategory': None})
+        questions = (await res.get_json())['questions']
+        self.assertEqual([question['answer'] for question in questions], ['unittest'])
+
+    async def test_422_create_question(self):
+        """Failing Test for POST /questions, required fields empty"""
+        res = await self.client().post('/questions', json=self.INVALID_QUESTION)
+        data = await res.get_json()
+
+        self.assertEqual(res.status_code, 422)
+        self.assertError(data, 422)
+
+    async def test_search_questions(self):
+        """Passing Test for POST /questions/search"""
+        res = await self.client().post('/questions/search', json=self.VALID_SEARCH_BODY)
+        data = await res.get_json()
+
+        self.assertEqual(res.status_code, 200)
+        self.assertIn('current_category', data)
+        self.assertEqual(data['current_category'], self.VALID_SEARCH_BODY['currentCategory'])
+        self.assertIn('search_term', data)
+        self.assertEqual(data['search_term'], self.VALID_SEARCH_BODY['searchTerm'])
+        self.assertTrue(len(data['questions']))
+        self.assertEqual(data['total_questions'], len(data['questions']))
+
+    async def test_400_search_questions(self):
+        """Failing Test for POST /questions/search, missing required fields"""
+        res = await self.client().post('/questions/search', json=self.INVALID_SEARCH_BODY)
+        data = await res.get_json()
+
+        self.assertEqual(res.status_code, 400)
+        self.assertError(data, 400)
+
+    async def test_category_specific_questions(self):
+        """Passing Test for GET /categories/<category_id>/questions"""
+        res = await self.client().get('/categories/1/questions')
+        data = await res.get_json()
+
+        self.assertEqual(res.status_code, 200)
+        self.assertIn('categories', data)
+        self.assertIn('current_category', data)
+        self.assertEqual(data['current_category'], '1')
+        self.assertIn('total_questions', data)
+        self.assertTrue(len(data['questions']))
+        self.assertEqual({question['category'] for question in data['questions']}, {'1'})
+
+    async def test_404_category_specific_questions(self):
+        """Failing Test for GET /categories/<category_id>/questions, invalid category id"""
+        res = await self.client().get('/categories/23/questions')
+        data = await res.get_json()
+
+        self.assertEqual(res.status_code, 404)
+        self.assertError(data, 404)
+
+    async def test_play_quizzes(self):
+        """Passing Test for POST /quizzes"""
+        res = await self.client().post('/quizzes', json=self.VALID_PLAY_QUIZ_BODY)
+        data = await res.get_json()
+
+        self.assertEqual(res.status_code, 200)
+        self.assertIn('question', data)
+        self.assertTrue(data['question'])
+        self.assertEqual(str(data['question']['category']), self.VALID_PLAY_QUIZ_BODY['quiz_category']['id'])
+        self.assertNotIn(data['question']['id'], self.VALID_PLAY_QUIZ_BODY['previous_questions'])
+
+    async def test_404_play_quizzes(self):
+        """Failing Test for POST /quizzes, missing required fields"""
+        res = await self.client().post('/quizzes', json=self.INVALID_PLAY_QUIZ_BODY)
+        data = await res.get_json()
+
+        self.assertEqual(res.status_code, 400)
+        self.assertError(data, 400)
+
+
+# Make the tests conveniently executable
+if __name__ == "__main__":
+    unittest.main()
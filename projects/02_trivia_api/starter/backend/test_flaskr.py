@@ -1,22 +1,28 @@
 import os
 import unittest
 import json
-from flask_sqlalchemy import SQLAlchemy
 
 from flaskr import create_app
-from models import setup_db, Question, Category
+from models import db_create_all, Question, Category
 
 
 class TriviaTestCase(unittest.TestCase):
     """This class represents the trivia test case"""
 
+    database_name = "trivia_test"
+    database_path = "postgres://{}:{}@{}/{}".format('postgres', 'root', 'localhost:5432', database_name)
+
+    @classmethod
+    def setUpClass(cls):
+        """Run the migration step once, the app itself does no DDL"""
+        app = create_app(database_path=cls.database_path)
+        with app.app_context():
+            db_create_all()
+
     def setUp(self):
         """Define test variables and initialize app."""
-        self.app = create_app()
+        self.app = create_app(database_path=self.database_path)
         self.client = self.app.test_client
-        self.database_name = "trivia_test"
-        self.database_path = "postgres://{}:{}@{}/{}".format('postgres', 'root', 'localhost:5432', self.database_name)
-        setup_db(self.app, self.database_path)
 
         self.VALID_NEW_QUESTION = {
             'question': 'Which is the test framework used in this project?',
@@ -52,13 +58,6 @@ class TriviaTestCase(unittest.TestCase):
             'previous_questions': [1, 2]
         }
 
-        # binds the app to the current context
-        with self.app.app_context():
-            self.db = SQLAlchemy()
-            self.db.init_app(self.app)
-            # create all tables
-            self.db.create_all()
-
     def tearDown(self):
         """Executed after reach test"""
         pass
@@ -0,0 +1,74 @@
+"""Auth overhead per request, with and without the verified-token cache
+
+Signs tokens with a locally generated RSA key and serves the matching key set
+from memory, so no Auth0 tenant or network is needed. From the /backend directory run:
+
+    python bench_auth.py --requests 2000 --clients 50
+"""
+import argparse
+import base64
+import time
+
+from Crypto.PublicKey import RSA
+from jose import jwt
+
+from auth_pipeline import AuthPipeline, JWKSCache, TokenCache
+from src.auth import auth
+
+
+def b64_int(value):
+    return base64.urlsafe_b64encode(value.to_bytes((value.bit_length() + 7) // 8, 'big')).rstrip(b'=').decode()
+
+
+def make_signing_key(kid='local'):
+    key = RSA.generate(2048)
+    jwks = {'keys': [{'kty': 'RSA', 'kid': kid, 'use': 'sig', 'n': b64_int(key.n), 'e': b64_int(key.e)}]}
+    return key.exportKey().decode(), jwks
+
+
+def make_token(private_pem, subject, kid='local', permissions=()):
+    claims = {
+        'iss': 'https://' + auth.AUTH0_DOMAIN + '/',
+        'aud': auth.API_AUDIENCE,
+        'sub': subject,
+        'iat': int(time.time()),
+        'exp': int(time.time()) + 3600,
+        'permissions': list(permissions),
+    }
+    return jwt.encode(claims, private_pem, algorithm='RS256', headers={'kid': kid})
+
+
+def run(jwks, tokens, requests, maxsize):
+    auth.pipeline = AuthPipeline(auth.AUTH0_DOMAIN, auth.API_AUDIENCE,
+                                 jwks_cache=JWKSCache(lambda: jwks),
+                                 token_cache=TokenCache(maxsize=maxsize))
+    start = time.perf_counter()
+    for i in range(requests):
+        auth.verify_decode_jwt(tokens[i % len(tokens)])
+    return (time.perf_counter() - start) / requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--clients', type=int, default=50, help='distinct bearer tokens in rotation')
+    args = parser.parse_args()
+
+    private_pem, jwks = make_signing_key()
+    tokens = [make_token(private_pem, 'client|{}'.format(i)) for i in range(args.clients)]
+
+    uncached = run(jwks, tokens, args.requests, maxsize=0)
+    uncached_timings = auth.pipeline.timings.snapshot()
+    cached = run(jwks, tokens, args.requests, maxsize=1024)
+    print('without token cache: {:8.1f} us/request'.format(uncached * 1e6))
+    print('with token cache:    {:8.1f} us/request ({} hits, {} misses)'.format(
+        cached * 1e6, auth.pipeline.token_cache.hits, auth.pipeline.token_cache.misses))
+    print('speedup:             {:8.1f}x'.format(uncached / cached))
+
+    for label, timings in (('without token cache', uncached_timings), ('with token cache', auth.pipeline.timings.snapshot())):
+        print('stages {}: '.format(label) + '  '.join(
+            '{} {:.1f} us'.format(stage, timing['avg_us']) for stage, timing in timings.items() if timing['calls']))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""Serialization cost of Drink.short()/long() over a large menu
+
+Loads N drinks from a scratch sqlite database and times serializing all of them,
+the way GET /drinks does, parsing every recipe blob (the old short()) against the
+cached recipe views. From the /backend directory run:
+
+    python bench_models.py --drinks 50000
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from flask import Flask
+
+from src.database.models import db, setup_db, Drink
+
+COLORS = ['white', 'brown', 'black', 'grey', 'beige']
+
+
+def legacy_short(drink):
+    short_recipe = [{'color': r['color'], 'parts': r['parts']} for r in json.loads(drink.recipe)]
+    return {
+        'id': drink.id,
+        'title': drink.title,
+        'recipe': short_recipe
+    }
+
+
+def timed(label, serialize):
+    # a fresh session per round, like one request per round
+    db.session.remove()
+    start = time.perf_counter()
+    drinks = Drink.query.all()
+    loaded = time.perf_counter()
+    menu = [serialize(drink) for drink in drinks]
+    done = time.perf_counter()
+    print('{:<28} load {:8.1f} ms  serialize {:8.1f} ms'.format(label, (loaded - start) * 1000, (done - loaded) * 1000))
+    return menu
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--drinks', type=int, default=50000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = Flask(__name__)
+        setup_db(app, 'sqlite:///{}'.format(os.path.join(tmp, 'bench.db')))
+
+        with app.app_context():
+            db.create_all()
+            db.session.execute(Drink.__table__.insert(), [{
+                'title': 'drink {}'.format(i),
+                'recipe': json.dumps([
+                    {'name': 'milk', 'color': COLORS[i % len(COLORS)], 'parts': 1 + i % 3},
+                    {'name': 'coffee', 'color': 'brown', 'parts': 1}
+                ])
+            } for i in range(args.drinks)])
+            db.session.commit()
+
+            expected = timed('legacy short() (json.loads)', legacy_short)
+            timed('short(), cold cache', Drink.short)
+            assert timed('short(), warm cache', Drink.short) == expected
+            timed('long(), warm cache', Drink.long)
+
+
+if __name__ == '__main__':
+    main()
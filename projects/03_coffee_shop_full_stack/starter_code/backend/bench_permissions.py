@@ -0,0 +1,34 @@
+"""Micro-benchmark of check_permissions with large permission lists
+
+Compares scanning the payload's `permissions` list on every call with the
+PermissionSet built once at verification time. From the /backend directory run:
+
+    python bench_permissions.py --sizes 10 1000 100000
+"""
+import argparse
+import timeit
+
+from auth_pipeline import VerifiedPayload
+from src.auth.auth import check_permissions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 1000, 100000])
+    parser.add_argument('--number', type=int, default=10000)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        # the checked permission sits at the end of the list, the worst case for a scan
+        permissions = ['get:resource-{}'.format(i) for i in range(size - 1)] + ['patch:drinks']
+        payload = {'permissions': permissions}
+        verified = VerifiedPayload(payload)
+
+        scan = timeit.timeit(lambda: 'patch:drinks' in payload['permissions'], number=args.number)
+        precomputed = timeit.timeit(lambda: check_permissions('patch:drinks', verified), number=args.number)
+        print('{:>7} permissions  list scan {:9.3f} us  permission set {:6.3f} us'.format(
+            size, scan / args.number * 1e6, precomputed / args.number * 1e6))
+
+
+if __name__ == '__main__':
+    main()
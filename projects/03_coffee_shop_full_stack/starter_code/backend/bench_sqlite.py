@@ -0,0 +1,82 @@
+"""Concurrency benchmark of the sqlite engine profile
+
+Runs N writer threads (insert + commit) and M reader threads (load the 50 newest drinks)
+against a scratch database, once with sqlite defaults and once with SQLITE_PRAGMAS,
+and reports throughput and `database is locked` errors. From the /backend directory run:
+
+    python bench_sqlite.py --writers 8 --readers 8 --seconds 5
+"""
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+
+from sqlalchemy import create_engine, event, exc
+
+from src.database.models import db, Drink, set_sqlite_pragmas
+
+RECIPE = json.dumps([{'name': 'milk', 'color': 'white', 'parts': 1}])
+
+
+def worker(engine, write, deadline, counts, prefix):
+    table = Drink.__table__
+    i = 0
+    while time.perf_counter() < deadline:
+        # closed explicitly, SQLAlchemy 1.3's engine.begin() leaks the connection when the commit fails
+        connection = engine.connect()
+        try:
+            with connection.begin():
+                if write:
+                    connection.execute(table.insert(), {'title': '{}-{}'.format(prefix, i), 'recipe': RECIPE})
+                else:
+                    connection.execute(table.select().order_by(table.c.id.desc()).limit(50)).fetchall()
+            counts['writes' if write else 'reads'] += 1
+        except exc.OperationalError as e:
+            if 'locked' not in str(e):
+                raise
+            counts['locked'] += 1
+        finally:
+            connection.close()
+        i += 1
+
+
+def run(path, tuned, writers, readers, seconds):
+    # timeout=0 leaves lock waits to the busy_timeout pragma, the sqlite3 module would otherwise retry for 5s
+    engine = create_engine('sqlite:///{}'.format(path), connect_args={'timeout': 0})
+    if tuned:
+        event.listen(engine, 'connect', set_sqlite_pragmas)
+    db.metadata.create_all(engine)
+
+    counts = {'writes': 0, 'reads': 0, 'locked': 0}
+    deadline = time.perf_counter() + seconds
+    threads = [threading.Thread(target=worker, args=(engine, True, deadline, counts, 'w{}'.format(n)))
+               for n in range(writers)]
+    threads += [threading.Thread(target=worker, args=(engine, False, deadline, counts, None))
+                for _ in range(readers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    engine.dispose()
+
+    print('{:<9} {:>8.1f} writes/s  {:>8.1f} reads/s  {:>7} locked errors'.format(
+        'tuned' if tuned else 'default', counts['writes'] / seconds, counts['reads'] / seconds, counts['locked']))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--writers', type=int, default=8)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for tuned in (False, True):
+            path = os.path.join(tmp, 'tuned.db' if tuned else 'default.db')
+            run(path, tuned, args.writers, args.readers, args.seconds)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,10 +1,10 @@
 import os
-from flask import Flask, request, jsonify, abort
+from flask import Flask, request, jsonify, abort, Response
 from sqlalchemy import exc
 import json
 from flask_cors import CORS
 
-from .database.models import db_drop_and_create_all, setup_db, Drink
+from .database.models import db_drop_and_create_all, db_migrate_ingredients, setup_db, Drink, menu_snapshot
 from .auth.auth import AuthError, requires_auth
 
 app = Flask(__name__)
@@ -18,15 +18,40 @@ CORS(app)
 '''
 # db_drop_and_create_all()
 
+'''
+flask migrate-ingredients
+    moves the recipes of an existing database into the indexed ingredient table
+'''
+@app.cli.command('migrate-ingredients')
+def migrate_ingredients():
+    print('migrated {} drinks'.format(db_migrate_ingredients()))
+
 ## ROUTES
 '''
-@TODO implement endpoint
-    GET /drinks
-        it should be a public endpoint
-        it should contain only the drink.short() data representation
+GET /drinks
+    it should be a public endpoint
+    it should contain only the drink.short() data representation
     returns status code 200 and json {"success": True, "drinks": drinks} where drinks is the list of drinks
         or appropriate status code indicating reason for failure
+    the body is a pre-serialized snapshot of the menu (see MenuSnapshot in models.py)
+        returned with a strong ETag, a matching If-None-Match gets 304 Not Modified
+    ?ingredient=<name> only lists the drinks containing that ingredient
+        resolved by the ingredient name index, served without the snapshot
 '''
+@app.route('/drinks')
+def get_drinks():
+    ingredient = request.args.get('ingredient')
+    if ingredient:
+        return jsonify({
+            'success': True,
+            'drinks': [drink.short() for drink in Drink.with_ingredient(ingredient).all()]
+        })
+
+    body, etag = menu_snapshot.get()
+    response = Response(body, mimetype='application/json')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
 
 
 '''
@@ -75,6 +100,67 @@ CORS(app)
 '''
 
 
+'''
+PATCH /drinks
+    batch form of PATCH /drinks/<id>, one request instead of one per drink
+    it should require the 'patch:drinks' permission
+    request body {"drinks": [{"id": 1, "title"?: string, "recipe"?: [ingredient]}, ...]}
+    every accepted change is written in one transaction (see Drink.update_many)
+    returns status code 200 and json {"success": True, "drinks": results} where results holds
+        one {"id", "status"} per change, and "drink" (long form) for each updated one
+        or status code 422 if the body is not a non-empty list of changes
+'''
+@app.route('/drinks', methods=['PATCH'])
+@requires_auth('patch:drinks')
+def patch_drinks(payload):
+    body = request.get_json(silent=True)
+    changes = body.get('drinks') if isinstance(body, dict) else None
+    if not isinstance(changes, list) or len(changes) == 0:
+        abort(422)
+
+    try:
+        results = Drink.update_many(changes)
+    except exc.SQLAlchemyError:
+        abort(422)
+
+    return jsonify({
+        'success': True,
+        'drinks': results
+    })
+
+
+'''
+DELETE /drinks
+    batch form of DELETE /drinks/<id>
+    it should require the 'delete:drinks' permission
+    ids come from the request body {"ids": [1, 2, 3]} or the query string ?ids=1,2,3
+        the body holds a list of integers, the query string comma separated digits
+    existing drinks are removed with one statement (see Drink.delete_many)
+    returns status code 200 and json {"success": True, "deleted": results} where results holds
+        one {"id", "status"} per id
+        or status code 422 if no ids or anything but ids are given, nothing is deleted then
+'''
+@app.route('/drinks', methods=['DELETE'])
+@requires_auth('delete:drinks')
+def delete_drinks(payload):
+    body = request.get_json(silent=True)
+    ids = body.get('ids') if isinstance(body, dict) else None
+    if ids is None and request.args.get('ids'):
+        ids = request.args['ids'].split(',')
+        if not all(id.isdecimal() for id in ids):
+            abort(422)
+        ids = [int(id) for id in ids]
+
+    # a JSON list of integers only, "32", 1.9 or true are not drink ids (bool is a subclass of int)
+    if not isinstance(ids, list) or len(ids) == 0 or any(type(id) is not int for id in ids):
+        abort(422)
+
+    return jsonify({
+        'success': True,
+        'deleted': Drink.delete_many(ids)
+    })
+
+
 ## Error Handling
 '''
 Example error handling for unprocessable entity
@@ -105,6 +191,13 @@ def unprocessable(error):
 
 
 '''
-@TODO implement error handler for AuthError
-    error handler should conform to general task above 
+error handler for AuthError
+    a missing or invalid token (401/400) or a missing permission (403) raised by requires_auth
 '''
+@app.errorhandler(AuthError)
+def auth_error(error):
+    return jsonify({
+                    "success": False,
+                    "error": error.status_code,
+                    "message": error.error
+                    }), error.status_code
@@ -1,29 +1,34 @@
 import json
 from flask import request, _request_ctx_stack
 from functools import wraps
-from jose import jwt
-from urllib.request import urlopen
+
+from auth_pipeline import AuthError, AuthPipeline
 
 
 AUTH0_DOMAIN = 'udacity-fsnd.auth0.com'
 ALGORITHMS = ['RS256']
 API_AUDIENCE = 'dev'
 
+'''
+pipeline
+    the shared Auth0 token checks (see /AuthPipeline): cached JWKS, a prebuilt verifier
+    per kid, a verified-token cache and per-stage timings (pipeline.timings.snapshot())
+    tests can swap it for a pipeline built on a local key set, e.g.
+        auth.pipeline = AuthPipeline(AUTH0_DOMAIN, API_AUDIENCE, jwks_cache=JWKSCache(file_fetcher('jwks.json')))
+'''
+pipeline = AuthPipeline(AUTH0_DOMAIN, API_AUDIENCE, algorithms=ALGORITHMS)
+
 ## AuthError Exception
 '''
 AuthError Exception
 A standardized way to communicate auth failure modes
+imported from auth_pipeline so every app raises and handles the same class
 '''
-class AuthError(Exception):
-    def __init__(self, error, status_code):
-        self.error = error
-        self.status_code = status_code
-
 
 ## Auth Header
 
 '''
-@TODO implement get_token_auth_header() method
+get_token_auth_header() method
     it should attempt to get the header from the request
         it should raise an AuthError if no header is present
     it should attempt to split bearer and the token
@@ -31,10 +36,10 @@ class AuthError(Exception):
     return the token part of the header
 '''
 def get_token_auth_header():
-   raise Exception('Not Implemented')
+    return pipeline.parse_header(request.headers.get('Authorization', None))
 
 '''
-@TODO implement check_permissions(permission, payload) method
+check_permissions(permission, payload) method
     @INPUTS
         permission: string permission (i.e. 'post:drink')
         payload: decoded jwt payload
@@ -42,26 +47,30 @@ def get_token_auth_header():
     it should raise an AuthError if permissions are not included in the payload
         !!NOTE check your RBAC settings in Auth0
     it should raise an AuthError if the requested permission string is not in the payload permissions array
+        the check runs against the PermissionSet built once in verify_decode_jwt,
+        wildcards like '*:drinks' are honoured (see auth_pipeline/permissions.py)
     return true otherwise
 '''
 def check_permissions(permission, payload):
-    raise Exception('Not Implemented')
+    return pipeline.check_permission(permission, payload)
 
 '''
-@TODO implement verify_decode_jwt(token) method
+verify_decode_jwt(token) method
     @INPUTS
         token: a json web token (string)
 
     it should be an Auth0 token with key id (kid)
     it should verify the token using Auth0 /.well-known/jwks.json
+        the key set is served from the pipeline's jwks_cache, not fetched per request
+        a token verified before is served from its token_cache until it expires
     it should decode the payload from the token
     it should validate the claims
-    return the decoded payload
+    return the decoded payload, as a VerifiedPayload carrying its permission set
 
     !!NOTE urlopen has a common certificate error described here: https://stackoverflow.com/questions/50236117/scraping-ssl-certificate-verify-failed-error-for-http-en-wikipedia-org
 '''
 def verify_decode_jwt(token):
-    raise Exception('Not Implemented')
+    return pipeline.verify(token)
 
 '''
 @TODO implement @requires_auth(permission) decorator method
@@ -1,5 +1,9 @@
 import os
-from sqlalchemy import Column, String, Integer
+import hashlib
+import math
+import threading
+from collections import Counter
+from sqlalchemy import Column, String, Integer, Float, Text, ForeignKey, event, inspect, text
 from flask_sqlalchemy import SQLAlchemy
 import json
 
@@ -9,16 +13,46 @@ database_path = "sqlite:///{}".format(os.path.join(project_dir, database_filenam
 
 db = SQLAlchemy()
 
+'''
+SQLITE_PRAGMAS
+    the sqlite engine profile, applied to every new connection, in this order
+    - busy_timeout (ms) makes a writer wait for the lock instead of failing with `database is locked`
+      it comes first so the other pragmas wait too, journal_mode needs the lock to switch to WAL
+    - WAL lets readers keep reading while a barista writes
+    - synchronous=NORMAL is durable across app crashes in WAL mode, fsyncs only at checkpoints
+    - mmap_size (bytes) and cache_size (negative = KiB) keep the hot pages in memory
+'''
+SQLITE_PRAGMAS = {
+    'busy_timeout': 5000,
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -16000,
+}
+
+
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for pragma, value in SQLITE_PRAGMAS.items():
+        cursor.execute('PRAGMA {} = {}'.format(pragma, value))
+    cursor.close()
+
+
 '''
 setup_db(app)
     binds a flask application and a SQLAlchemy service
+    sqlite databases get the SQLITE_PRAGMAS profile unless tune_sqlite is False
 '''
-def setup_db(app):
+def setup_db(app, database_path=database_path, tune_sqlite=True):
     app.config["SQLALCHEMY_DATABASE_URI"] = database_path
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
     db.app = app
     db.init_app(app)
 
+    if tune_sqlite and database_path.startswith('sqlite'):
+        with app.app_context():
+            event.listen(db.engine, 'connect', set_sqlite_pragmas)
+
 '''
 db_drop_and_create_all()
     drops the database tables and starts fresh
@@ -29,6 +63,32 @@ def db_drop_and_create_all():
     db.drop_all()
     db.create_all()
 
+'''
+db_migrate_ingredients()
+    migrates an existing database to structured ingredient storage
+    widens drink.recipe from the old varchar(180) to text (sqlite never enforced the length)
+    creates the ingredient and menu_version tables if they are missing and fills ingredient
+    from the recipe blob of every drink that has no ingredient rows yet, safe to run more than once
+    EXAMPLE
+        flask migrate-ingredients
+'''
+def db_migrate_ingredients():
+    if db.engine.dialect.name == 'postgresql' and db.engine.has_table('drink'):
+        db.session.execute(text('ALTER TABLE drink ALTER COLUMN recipe TYPE TEXT'))
+    db.create_all()
+    migrated = 0
+    for drink in Drink.query.filter(~Drink.ingredients.any()).all():
+        drink.sync_ingredients()
+        migrated += 1
+    db.session.commit()
+    return migrated
+
+'''
+_recipe_views_by_id
+    process wide cache of parsed recipes, {drink id: (recipe string, (long, short))}
+'''
+_recipe_views_by_id = {}
+
 '''
 Drink
 a persistent drink entity, extends the base SQLAlchemy Model
@@ -40,19 +100,66 @@ class Drink(db.Model):
     title = Column(String(80), unique=True)
     # the ingredients blob - this stores a lazy json blob
     # the required datatype is [{'color': string, 'name':string, 'parts':number}]
-    recipe =  Column(String(180), nullable=False)
+    recipe =  Column(Text, nullable=False)
+    # the same recipe, one indexed row per ingredient, kept in sync by insert() and update()
+    ingredients = db.relationship('Ingredient', backref='drink', lazy=True, cascade='all, delete-orphan')
+
+    '''
+    recipe_views()
+        the (long, short) parsed forms of the recipe blob
+        the blob is parsed once per drink and cached by id next to the string it came from,
+        so a drink loaded again in a later request is not re-parsed unless its recipe changed
+        assigning drink.recipe drops the cached views (see _invalidate_recipe_views)
+        !!NOTE the returned lists are shared, do not mutate them
+    '''
+    def recipe_views(self):
+        views = self.__dict__.get('_recipe_views')
+        if views is not None:
+            return views
+
+        cached = _recipe_views_by_id.get(self.id)
+        if cached is not None and cached[0] == self.recipe:
+            views = cached[1]
+        else:
+            long_recipe = json.loads(self.recipe)
+            short_recipe = [{'color': r['color'], 'parts': r['parts']} for r in long_recipe]
+            views = (long_recipe, short_recipe)
+            if self.id is not None:
+                _recipe_views_by_id[self.id] = (self.recipe, views)
+
+        self._recipe_views = views
+        return views
+
+    '''
+    sync_ingredients()
+        rebuilds the ingredient rows from the recipe blob
+    '''
+    def sync_ingredients(self):
+        self.ingredients = [
+            Ingredient(name=Ingredient.normalize(r['name']), color=r['color'], parts=r['parts'])
+            for r in self.recipe_views()[0]
+        ]
+
+    '''
+    with_ingredient(name)
+        query of the drinks containing the named ingredient, resolved by the ingredient name index
+        EXAMPLE
+            drinks = Drink.with_ingredient('milk').all()
+    '''
+    @classmethod
+    def with_ingredient(cls, name):
+        drink_ids = db.session.query(Ingredient.drink_id).filter(Ingredient.name == Ingredient.normalize(name))
+        return cls.query.filter(cls.id.in_(drink_ids)).order_by(cls.id)
 
     '''
     short()
         short form representation of the Drink model
     '''
     def short(self):
-        print(json.loads(self.recipe))
-        short_recipe = [{'color': r['color'], 'parts': r['parts']} for r in json.loads(self.recipe)]
         return {
             'id': self.id,
             'title': self.title,
-            'recipe': short_recipe
+            'recipe': self.recipe_views()[1]
         }
 
     '''
@@ -63,7 +170,7 @@ class Drink(db.Model):
         return {
             'id': self.id,
             'title': self.title,
-            'recipe': json.loads(self.recipe)
+            'recipe': self.recipe_views()[0]
         }
 
     '''
@@ -76,7 +183,9 @@ class Drink(db.Model):
             drink.insert()
     '''
     def insert(self):
+        self.sync_ingredients()
         db.session.add(self)
+        menu_snapshot.invalidate()
         db.session.commit()
 
     '''
@@ -89,7 +198,9 @@ class Drink(db.Model):
     '''
     def delete(self):
         db.session.delete(self)
+        menu_snapshot.invalidate()
         db.session.commit()
+        _recipe_views_by_id.pop(self.id, None)
 
     '''
     update()
@@ -101,7 +212,250 @@ class Drink(db.Model):
             drink.update()
     '''
     def update(self):
+        if inspect(self).attrs.recipe.history.has_changes() or not self.ingredients:
+            self.sync_ingredients()
+        menu_snapshot.invalidate()
         db.session.commit()
 
+    '''
+    valid_title(title)
+        True for a non-empty string that fits the title column
+    '''
+    @staticmethod
+    def valid_title(title):
+        return isinstance(title, str) and 0 < len(title) <= Drink.title.type.length
+
+    '''
+    update_many(changes)
+        batch form of update(), for menu resets touching dozens of drinks
+        changes is a list of {'id': int, 'title'?: string, 'recipe'?: [ingredient]}
+        all accepted changes are written in one transaction with set-based statements
+        returns one {'id', 'status'} per change, in order, plus 'drink' (long form) for updated ones
+            200 updated, 400 missing/invalid/repeated id or neither title nor recipe, 404 unknown id,
+            409 title taken, 422 invalid title or recipe (see valid_title() and Ingredient.valid())
+        a drink named by more than one change of the batch is refused for all of them, so every
+        updated drink gets exactly one row and its ingredients are rebuilt once
+        the whole batch is rolled back if the database rejects it
+        EXAMPLE
+            Drink.update_many([{'id': 1, 'title': 'Black Coffee'}, {'id': 2, 'recipe': [...]}])
+    '''
+    @classmethod
+    def update_many(cls, changes):
+        changes = [change if isinstance(change, dict) else {} for change in changes]
+        # bool is a subclass of int, but true is not drink 1
+        ids = [change['id'] for change in changes if type(change.get('id')) is int]
+        repeated_ids = {id for id, count in Counter(ids).items() if count > 1}
+        titles = [change['title'] for change in changes if isinstance(change.get('title'), str)]
+        existing_ids = {id for (id,) in db.session.query(cls.id).filter(cls.id.in_(ids))}
+        # titles already held by a drink, a title freed by a rename in this batch is not reused
+        title_owners = dict(db.session.query(cls.title, cls.id).filter(cls.title.in_(titles)))
+
+        results, drink_rows, ingredient_rows = [], [], []
+        for change in changes:
+            id = change.get('id')
+            result = {'id': id, 'status': 200}
+            results.append(result)
+            if type(id) is not int or id in repeated_ids or ('title' not in change and 'recipe' not in change):
+                result['status'] = 400
+                continue
+            if id not in existing_ids:
+                result['status'] = 404
+                continue
+
+            row = {'id': id}
+            if 'title' in change:
+                if not Drink.valid_title(change['title']):
+                    result['status'] = 422
+                    continue
+                if title_owners.get(change['title'], id) != id:
+                    result['status'] = 409
+                    continue
+                row['title'] = change['title']
+
+            if 'recipe' in change:
+                recipe = change['recipe']
+                if isinstance(recipe, dict):
+                    recipe = [recipe]
+                # checked here, a value the database rejects would fail the whole batch
+                if not isinstance(recipe, list) or not all(Ingredient.valid(r) for r in recipe):
+                    result['status'] = 422
+                    continue
+                row['recipe'] = json.dumps(recipe)
+                ingredient_rows.extend({
+                    'drink_id': id,
+                    'name': Ingredient.normalize(r['name']),
+                    'color': r['color'],
+                    'parts': r['parts']
+                } for r in recipe)
+
+            if 'title' in row:
+                title_owners[row['title']] = id
+            drink_rows.append(row)
+
+        recipe_ids = [row['id'] for row in drink_rows if 'recipe' in row]
+        try:
+            if drink_rows:
+                db.session.bulk_update_mappings(cls, drink_rows)
+            if recipe_ids:
+                Ingredient.query.filter(Ingredient.drink_id.in_(recipe_ids)).delete(synchronize_session=False)
+                db.session.bulk_insert_mappings(Ingredient, ingredient_rows)
+            if drink_rows:
+                menu_snapshot.invalidate()
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        for id in recipe_ids:
+            _recipe_views_by_id.pop(id, None)
+
+        updated = {drink.id: drink for drink in cls.query.filter(cls.id.in_([row['id'] for row in drink_rows]))}
+        for result in results:
+            if result['status'] == 200:
+                result['drink'] = updated[result['id']].long()
+        return results
+
+    '''
+    delete_many(ids)
+        batch form of delete(), removes every existing drink in ids with one statement
+        returns one {'id', 'status'} per id, in order, 200 deleted or 404 unknown id
+        EXAMPLE
+            Drink.delete_many([1, 2, 3])
+    '''
+    @classmethod
+    def delete_many(cls, ids):
+        existing_ids = {id for (id,) in db.session.query(cls.id).filter(cls.id.in_(ids))}
+        try:
+            if existing_ids:
+                Ingredient.query.filter(Ingredient.drink_id.in_(existing_ids)).delete(synchronize_session=False)
+                cls.query.filter(cls.id.in_(existing_ids)).delete(synchronize_session=False)
+                menu_snapshot.invalidate()
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        for id in existing_ids:
+            _recipe_views_by_id.pop(id, None)
+        return [{'id': id, 'status': 200 if id in existing_ids else 404} for id in ids]
+
+    def __repr__(self):
+        return json.dumps(self.short())
+
+
+'''
+Ingredient
+a single ingredient of a drink's recipe, mirrors one entry of Drink.recipe
+the name is stored normalized (see normalize()) and indexed for "drinks containing x" lookups
+'''
+class Ingredient(db.Model):
+    id = Column(Integer, primary_key=True)
+    drink_id = Column(Integer, ForeignKey('drink.id', ondelete='CASCADE'), nullable=False, index=True)
+    name = Column(String(80), nullable=False, index=True)
+    color = Column(String(80), nullable=False)
+    parts = Column(Float, nullable=False)
+
+    @staticmethod
+    def normalize(name):
+        return name.strip().lower()
+
+    '''
+    valid(entry)
+        True for a recipe entry {'name': string, 'color': string, 'parts': number}
+        whose strings are non-empty and fit their columns and whose parts is a finite number
+        (bool is a subclass of int but not a number of parts, sqlite stores NaN as NULL)
+    '''
+    @staticmethod
+    def valid(entry):
+        if not isinstance(entry, dict):
+            return False
+        name, color, parts = entry.get('name'), entry.get('color'), entry.get('parts')
+        return (isinstance(name, str) and 0 < len(name.strip()) <= Ingredient.name.type.length
+                and isinstance(color, str) and 0 < len(color) <= Ingredient.color.type.length
+                and isinstance(parts, (int, float)) and not isinstance(parts, bool) and math.isfinite(parts))
+
     def __repr__(self):
-        return json.dumps(self.short())
\ No newline at end of file
+        return '<Ingredient {} {} {}>'.format(self.drink_id, self.name, self.parts)
+
+
+'''
+MenuVersion
+a single row counting the writes to the menu, shared by every worker process
+'''
+class MenuVersion(db.Model):
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+
+'''
+MenuSnapshot
+    the public menu (every drink in short() form) serialized once and reused
+    the body is only rebuilt when the MenuVersion row has moved on, which Drink.insert(), update(),
+    delete() and their batch forms do in the same transaction as their write, so a write in any
+    worker process is picked up by all of them on their next request
+    each build carries a strong ETag (sha256 of the body) so clients can revalidate with 304s
+    EXAMPLE
+        body, etag = menu_snapshot.get()
+'''
+class MenuSnapshot:
+    def __init__(self):
+        self._snapshot = None
+        self._build_lock = threading.Lock()
+
+    def version(self):
+        return db.session.query(MenuVersion.version).filter(MenuVersion.id == 1).scalar() or 0
+
+    '''
+    invalidate()
+        bumps the shared version, call it before committing the write that changes the menu
+    '''
+    def invalidate(self):
+        table = MenuVersion.__table__
+        bumped = db.session.execute(table.update().where(table.c.id == 1).values(version=table.c.version + 1))
+        if bumped.rowcount == 0:
+            db.session.add(MenuVersion(id=1, version=1))
+
+    def get(self):
+        # the version is read before the drinks, a write committed in between is built into
+        # the snapshot of the older version and rebuilt on the next request
+        version = self.version()
+        snapshot = self._snapshot
+        if snapshot is None or snapshot[0] != version:
+            snapshot = self._build(version)
+        return snapshot[1], snapshot[2]
+
+    def _build(self, version):
+        with self._build_lock:
+            snapshot = self._snapshot
+            if snapshot is not None and snapshot[0] == version:
+                return snapshot
+            drinks = Drink.query.order_by(Drink.id).all()
+            body = json.dumps({
+                'success': True,
+                'drinks': [drink.short() for drink in drinks]
+            }).encode()
+            self._snapshot = (version, body, hashlib.sha256(body).hexdigest())
+            return self._snapshot
+
+
+menu_snapshot = MenuSnapshot()
+
+
+'''
+_invalidate_recipe_views
+    drops the parsed recipe cached on a drink whenever its recipe is assigned
+'''
+@event.listens_for(Drink.recipe, 'set')
+def _invalidate_recipe_views(target, value, oldvalue, initiator):
+    target.__dict__.pop('_recipe_views', None)
+
+
+'''
+_expire_recipe_views
+    a drink expired by a commit may be reloaded with a recipe written elsewhere
+    (e.g. by update_many), so its cached parse is dropped along with its attributes
+'''
+@event.listens_for(Drink, 'expire')
+def _expire_recipe_views(target, attrs):
+    if attrs is None or 'recipe' in attrs:
+        target.__dict__.pop('_recipe_views', None)
@@ -0,0 +1,312 @@
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from bench_auth import make_signing_key, make_token
+from src.api import app
+from src.auth import auth
+from auth_pipeline import AuthPipeline, JWKSCache, PermissionSet, TokenCache, VerifiedPayload, file_fetcher
+
+
+def make_jwks(*kids):
+    return {'keys': [{'kty': 'RSA', 'kid': kid, 'use': 'sig', 'n': 'n-' + kid, 'e': 'AQAB'} for kid in kids]}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+class CountingFetcher:
+    def __init__(self, jwks, delay=0):
+        self.jwks = jwks
+        self.delay = delay
+        self.calls = 0
+        self.fail = False
+
+    def __call__(self):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.fail:
+            raise OSError('jwks endpoint unreachable')
+        return self.jwks
+
+
+class JWKSCacheTestCase(unittest.TestCase):
+    """This class represents the JWKS cache test case"""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.fetcher = CountingFetcher(make_jwks('key-1'))
+        self.cache = JWKSCache(self.fetcher, ttl=600, refresh_ahead=60, min_refetch_interval=30, clock=self.clock)
+
+    def test_keys_are_fetched_once(self):
+        """Cached keys are served without refetching"""
+        for _ in range(10):
+            self.assertEqual(self.cache.get_key('key-1')['n'], 'n-key-1')
+
+        self.assertEqual(self.fetcher.calls, 1)
+
+    def test_file_fetcher(self):
+        """The cache can be pointed at a local jwks.json"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'jwks.json')
+            with open(path, 'w') as f:
+                json.dump(make_jwks('local'), f)
+
+            cache = JWKSCache(file_fetcher(path))
+            self.assertEqual(cache.get_key('local')['kid'], 'local')
+
+    def test_unknown_kid_refetches_once(self):
+        """A rotated key is picked up by one refetch, repeated misses are rate limited"""
+        self.cache.get_key('key-1')
+        self.fetcher.jwks = make_jwks('key-1', 'key-2')
+        self.clock.now = 31
+
+        self.assertIsNotNone(self.cache.get_key('key-2'))
+        self.assertIsNone(self.cache.get_key('unknown'))
+        self.assertEqual(self.fetcher.calls, 2)
+
+    def test_unknown_kid_single_flight(self):
+        """Concurrent misses share a single fetch"""
+        self.cache.get_key('key-1')
+        self.fetcher.jwks = make_jwks('key-1', 'key-2')
+        self.fetcher.delay = 0.2
+        self.clock.now = 31
+        results = []
+
+        threads = [threading.Thread(target=lambda: results.append(self.cache.get_key('key-2'))) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(self.fetcher.calls, 2)
+        self.assertTrue(all(results))
+
+    def test_background_refresh(self):
+        """Keys close to expiry are refreshed without blocking the caller"""
+        self.cache.get_key('key-1')
+        self.fetcher.jwks = make_jwks('key-1', 'key-2')
+        self.clock.now = 550
+        version = self.cache.version
+
+        self.assertIsNotNone(self.cache.get_key('key-1'))
+        for _ in range(50):
+            if self.cache.version > version:
+                break
+            time.sleep(0.01)
+
+        self.assertEqual(self.fetcher.calls, 2)
+        self.assertIsNotNone(self.cache.get_key('key-2'))
+
+    def test_stale_while_error(self):
+        """Cached keys keep working while the JWKS endpoint is down"""
+        self.cache.get_key('key-1')
+        self.fetcher.fail = True
+        self.clock.now = 1000
+
+        self.cache.refresh()
+        self.assertIsNotNone(self.cache.get_key('key-1'))
+
+    def test_first_fetch_error(self):
+        """With nothing cached a fetch error is raised"""
+        self.fetcher.fail = True
+
+        with self.assertRaises(OSError):
+            self.cache.get_key('key-1')
+
+
+class TokenCacheTestCase(unittest.TestCase):
+    """This class represents the verified-token cache test case"""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cache = TokenCache(maxsize=2, clock=self.clock)
+
+    def test_hit_until_exp(self):
+        """A cached payload is served until the token expires"""
+        self.cache.put('token', {'sub': 'a', 'exp': 100})
+
+        self.assertEqual(self.cache.get('token')['sub'], 'a')
+        self.clock.now = 100
+        self.assertIsNone(self.cache.get('token'))
+        self.assertEqual(len(self.cache), 0)
+
+    def test_lru_eviction(self):
+        """The least recently used payload is evicted first"""
+        self.cache.put('a', {'exp': 100})
+        self.cache.put('b', {'exp': 100})
+        self.cache.get('a')
+        self.cache.put('c', {'exp': 100})
+
+        self.assertIsNotNone(self.cache.get('a'))
+        self.assertIsNone(self.cache.get('b'))
+        self.assertIsNotNone(self.cache.get('c'))
+
+    def test_token_without_exp_not_cached(self):
+        """Tokens without an exp claim are always verified"""
+        self.cache.put('token', {'sub': 'a'})
+
+        self.assertIsNone(self.cache.get('token'))
+
+    def test_payload_is_not_shared(self):
+        """Mutating a payload does not change the cached one"""
+        payload = VerifiedPayload({'sub': 'a', 'exp': 100, 'permissions': ['get:drinks-detail']})
+        self.cache.put('token', payload)
+        payload['sub'] = 'b'
+
+        cached = self.cache.get('token')
+        cached['permissions'].append('delete:drinks')
+        again = self.cache.get('token')
+        self.assertEqual(again['sub'], 'a')
+        self.assertEqual(again['permissions'], ['get:drinks-detail'])
+        self.assertIsInstance(again, VerifiedPayload)
+        self.assertIs(again.permission_set, payload.permission_set)
+
+
+class CheckPermissionsTestCase(unittest.TestCase):
+    """This class represents the check_permissions test case"""
+
+    def test_exact_permission(self):
+        """A granted permission passes, any other is rejected with 403"""
+        payload = VerifiedPayload({'permissions': ['get:drinks-detail']})
+
+        self.assertTrue(auth.check_permissions('get:drinks-detail', payload))
+        with self.assertRaises(auth.AuthError) as context:
+            auth.check_permissions('post:drinks', payload)
+        self.assertEqual(context.exception.status_code, 403)
+
+    def test_wildcard_permissions(self):
+        """Wildcards grant every action or every resource"""
+        permission_set = PermissionSet(['*:drinks', 'get:*'])
+
+        self.assertTrue(permission_set.allows('patch:drinks'))
+        self.assertTrue(permission_set.allows('delete:drinks'))
+        self.assertTrue(permission_set.allows('get:drinks-detail'))
+        self.assertFalse(permission_set.allows('post:drinks-detail'))
+        self.assertTrue(PermissionSet(['*']).allows('delete:drinks'))
+
+    def test_missing_permissions_claim(self):
+        """A payload without a permissions claim is rejected with 400"""
+        with self.assertRaises(auth.AuthError) as context:
+            auth.check_permissions('get:drinks-detail', VerifiedPayload({'sub': 'barista'}))
+        self.assertEqual(context.exception.status_code, 400)
+
+    def test_plain_payload(self):
+        """A plain dict payload is still checked"""
+        self.assertTrue(auth.check_permissions('post:drinks', {'permissions': ['*:drinks']}))
+
+
+class VerifyDecodeJwtTestCase(unittest.TestCase):
+    """This class represents verify_decode_jwt against a local signing key"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.private_pem, cls.jwks = make_signing_key()
+
+    def setUp(self):
+        auth.pipeline = AuthPipeline(auth.AUTH0_DOMAIN, auth.API_AUDIENCE,
+                                     jwks_cache=JWKSCache(lambda: self.jwks),
+                                     token_cache=TokenCache(maxsize=16))
+
+    def test_verify_decode_jwt(self):
+        """A locally signed token is verified once and then served from the cache"""
+        token = make_token(self.private_pem, 'barista')
+
+        self.assertEqual(auth.verify_decode_jwt(token)['sub'], 'barista')
+        self.assertEqual(auth.verify_decode_jwt(token)['sub'], 'barista')
+        self.assertEqual(auth.pipeline.token_cache.hits, 1)
+
+    def test_permission_set_is_cached(self):
+        """The permission set is built at verification and served with the cached payload"""
+        token = make_token(self.private_pem, 'manager', permissions=['*:drinks'])
+
+        payload = auth.verify_decode_jwt(token)
+        self.assertIs(auth.verify_decode_jwt(token).permission_set, payload.permission_set)
+        self.assertTrue(auth.check_permissions('delete:drinks', payload))
+
+    def test_verifier_built_once_per_key_set(self):
+        """The jose key for a kid is reused until a new key set is loaded"""
+        verifier = auth.pipeline.get_verifier('local')
+
+        self.assertIs(auth.pipeline.get_verifier('local'), verifier)
+        auth.pipeline.jwks_cache.refresh()
+        self.assertIsNot(auth.pipeline.get_verifier('local'), verifier)
+
+    def test_verifier_not_labelled_with_a_newer_key_set(self):
+        """A key set loaded during a lookup makes the next lookup rebuild the verifier"""
+        get_key = auth.pipeline.jwks_cache.get_key
+
+        def get_key_then_reload(kid):
+            key = get_key(kid)
+            auth.pipeline.jwks_cache.refresh()
+            return key
+
+        auth.pipeline.jwks_cache.get_key = get_key_then_reload
+        verifier = auth.pipeline.get_verifier('local')
+        auth.pipeline.jwks_cache.get_key = get_key
+        self.assertIsNot(auth.pipeline.get_verifier('local'), verifier)
+
+    def test_stage_timings(self):
+        """Every stage of a request shows up in the pipeline timings"""
+        token = make_token(self.private_pem, 'manager', permissions=['post:drinks'])
+
+        payload = auth.pipeline.verify(auth.pipeline.parse_header('Bearer ' + token))
+        auth.pipeline.check_permission('post:drinks', payload)
+        timings = auth.pipeline.timings.snapshot()
+        for stage in ('header', 'key_lookup', 'verify', 'permission'):
+            self.assertEqual(timings[stage]['calls'], 1)
+
+    def test_unknown_kid(self):
+        """A token signed with an unknown key is rejected"""
+        token = make_token(self.private_pem, 'barista', kid='rotated-away')
+
+        with self.assertRaises(auth.AuthError) as context:
+            auth.verify_decode_jwt(token)
+        self.assertEqual(context.exception.status_code, 400)
+        self.assertEqual(len(auth.pipeline.token_cache), 0)
+
+
+class AuthErrorHandlerTestCase(unittest.TestCase):
+    """This class represents the AuthError responses of the protected endpoints"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.private_pem, cls.jwks = make_signing_key()
+
+    def setUp(self):
+        auth.pipeline = AuthPipeline(auth.AUTH0_DOMAIN, auth.API_AUDIENCE,
+                                     jwks_cache=JWKSCache(lambda: self.jwks),
+                                     token_cache=TokenCache(maxsize=16))
+        self.client = app.test_client()
+
+    def test_missing_token(self):
+        """The batch endpoints answer 401 without a token"""
+        for res in (self.client.patch('/drinks', json={'drinks': [{'id': 1, 'title': 'Mocha'}]}),
+                    self.client.delete('/drinks?ids=1')):
+            data = json.loads(res.data)
+
+            self.assertEqual(res.status_code, 401)
+            self.assertEqual(data['success'], False)
+            self.assertEqual(data['message']['code'], 'authorization_header_missing')
+
+    def test_missing_permission(self):
+        """The batch endpoints answer 403 to a token without their permission"""
+        headers = {'Authorization': 'Bearer ' + make_token(self.private_pem, 'barista', permissions=['get:drinks-detail'])}
+
+        for res in (self.client.patch('/drinks', json={'drinks': [{'id': 1, 'title': 'Mocha'}]}, headers=headers),
+                    self.client.delete('/drinks?ids=1', headers=headers)):
+            self.assertEqual(res.status_code, 403)
+            self.assertEqual(json.loads(res.data)['error'], 403)
+
+
+# Make the tests conveniently executable
+if __name__ == "__main__":
+    unittest.main()
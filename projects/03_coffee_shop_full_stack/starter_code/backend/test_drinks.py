@@ -0,0 +1,373 @@
+import json
+import os
+import tempfile
+import unittest
+
+from sqlalchemy import text
+
+from bench_auth import make_signing_key, make_token
+from src.api import app
+from src.auth import auth
+from src.database.models import db, db_migrate_ingredients, Drink, Ingredient
+from auth_pipeline import AuthPipeline, JWKSCache, TokenCache
+
+MOCHA = [{'name': 'espresso', 'color': 'brown', 'parts': 1}, {'name': 'milk', 'color': 'white', 'parts': 2}]
+LATTE = [{'name': 'espresso', 'color': 'brown', 'parts': 1}, {'name': 'steamed milk', 'color': 'grey', 'parts': 3}]
+WATER = [{'name': 'water', 'color': 'blue', 'parts': 1}]
+
+
+class DrinksTestCase(unittest.TestCase):
+    """Base of the endpoint test cases, three drinks in a temporary sqlite database"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.database_uri = app.config['SQLALCHEMY_DATABASE_URI']
+        # flask-sqlalchemy connects again when the configured URI changes
+        app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///{}'.format(os.path.join(cls.tmp.name, 'database.db'))
+        with app.app_context():
+            if not db.engine.url.database.startswith(cls.tmp.name):
+                raise RuntimeError('the tests would run against {}'.format(db.engine.url))
+            db.create_all()
+
+        cls.private_pem, cls.jwks = make_signing_key()
+        cls.headers = {'Authorization': 'Bearer ' + make_token(cls.private_pem, 'manager', permissions=['*:drinks'])}
+
+    @classmethod
+    def tearDownClass(cls):
+        with app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+        app.config['SQLALCHEMY_DATABASE_URI'] = cls.database_uri
+        cls.tmp.cleanup()
+
+    def setUp(self):
+        auth.pipeline = AuthPipeline(auth.AUTH0_DOMAIN, auth.API_AUDIENCE,
+                                     jwks_cache=JWKSCache(lambda: self.jwks),
+                                     token_cache=TokenCache(maxsize=16))
+        self.client = app.test_client()
+        self.context = app.app_context()
+        self.context.push()
+        # rows are deleted rather than the tables dropped, the menu version keeps counting up
+        Ingredient.query.delete()
+        Drink.query.delete()
+        db.session.commit()
+        self.ids = []
+        for title, recipe in [('Mocha', MOCHA), ('Latte', LATTE), ('Water', WATER)]:
+            drink = Drink(title=title, recipe=json.dumps(recipe))
+            drink.insert()
+            self.ids.append(drink.id)
+        db.session.remove()
+
+    def tearDown(self):
+        db.session.remove()
+        self.context.pop()
+
+    def titles(self):
+        db.session.remove()
+        return [title for (title,) in db.session.query(Drink.title).order_by(Drink.id)]
+
+    def patch(self, changes):
+        return self.client.patch('/drinks', json={'drinks': changes}, headers=self.headers)
+
+    def statuses(self, res):
+        self.assertEqual(res.status_code, 200)
+        return [result['status'] for result in json.loads(res.data)['drinks']]
+
+
+class UpdateManyTestCase(DrinksTestCase):
+    """PATCH /drinks, per-change statuses of Drink.update_many"""
+
+    def test_statuses(self):
+        """Every change gets its own status, only the valid ones are written"""
+        mocha, latte, water = self.ids
+        res = self.patch([
+            {'id': mocha, 'title': 'Cafe Mocha'},
+            {'id': 999, 'title': 'Ghost'},
+            {'id': 'x', 'title': 'Nobody'},
+            {'id': latte, 'title': 'Water'},
+            {'id': water, 'title': ''},
+        ])
+
+        self.assertEqual(self.statuses(res), [200, 404, 400, 409, 422])
+        self.assertEqual(json.loads(res.data)['drinks'][0]['drink']['title'], 'Cafe Mocha')
+        self.assertEqual(self.titles(), ['Cafe Mocha', 'Latte', 'Water'])
+
+    def test_recipe_is_replaced(self):
+        """An updated recipe replaces the blob and the ingredient rows"""
+        res = self.patch([{'id': self.ids[2], 'recipe': {'name': 'Sparkling Water', 'color': 'clear', 'parts': 2}}])
+
+        self.assertEqual(self.statuses(res), [200])
+        self.assertEqual(json.loads(res.data)['drinks'][0]['drink']['recipe'],
+                         [{'name': 'Sparkling Water', 'color': 'clear', 'parts': 2}])
+        names = db.session.query(Ingredient.name).filter(Ingredient.drink_id == self.ids[2]).all()
+        self.assertEqual(names, [('sparkling water',)])
+
+    def test_invalid_recipes(self):
+        """A recipe the database would reject is refused for its change only"""
+        recipes = [
+            [{'name': 'milk', 'color': None, 'parts': 1}],
+            [{'name': 'milk', 'color': 'white', 'parts': 'lots'}],
+            [{'name': 'milk', 'color': 'white', 'parts': True}],
+            [{'name': ' ', 'color': 'white', 'parts': 1}],
+            [{'name': 'milk', 'color': 'white'}],
+            [MOCHA[0], 'milk'],
+            'milk',
+        ]
+        for number, recipe in enumerate(recipes):
+            res = self.patch([{'id': self.ids[0], 'recipe': recipe},
+                              {'id': self.ids[1], 'title': 'Flat White {}'.format(number)}])
+            self.assertEqual(self.statuses(res), [422, 200], recipe)
+
+        self.assertEqual(Drink.query.get(self.ids[0]).long()['recipe'], MOCHA)
+        self.assertEqual(self.titles()[1], 'Flat White {}'.format(len(recipes) - 1))
+
+    def test_nothing_to_change(self):
+        """A change without a title or a recipe is refused and nothing is written"""
+        etag = self.client.get('/drinks').headers['ETag']
+
+        self.assertEqual(self.statuses(self.patch([{'id': self.ids[0]}])), [400])
+        self.assertEqual(self.client.get('/drinks').headers['ETag'], etag)
+
+    def test_repeated_and_boolean_ids(self):
+        """A drink named twice is refused for both changes, true is not drink 1"""
+        mocha = self.ids[0]
+        res = self.patch([
+            {'id': mocha, 'title': 'Mocha 1'},
+            {'id': mocha, 'title': 'Mocha 2'},
+            {'id': True, 'title': 'Mocha 3'},
+        ])
+
+        self.assertEqual(self.statuses(res), [400, 400, 400])
+        self.assertEqual(self.titles(), ['Mocha', 'Latte', 'Water'])
+
+    def test_title_clash(self):
+        """A title held by another drink is refused, even if that drink is renamed in the same batch"""
+        mocha, latte, water = self.ids
+        res = self.patch([{'id': mocha, 'title': 'Latte'}, {'id': latte, 'title': 'Cafe Latte'}])
+
+        self.assertEqual(self.statuses(res), [409, 200])
+        self.assertEqual(self.titles(), ['Mocha', 'Cafe Latte', 'Water'])
+
+    def test_database_error_rolls_back_the_batch(self):
+        """A change the database rejects leaves every drink of the batch unchanged"""
+        db.session.execute(text(
+            "CREATE TRIGGER reject_title BEFORE UPDATE ON drink WHEN NEW.title = 'Rejected' "
+            "BEGIN SELECT RAISE(ABORT, 'rejected'); END"))
+        db.session.commit()
+        try:
+            res = self.patch([{'id': self.ids[0], 'title': 'Cafe Mocha'},
+                              {'id': self.ids[1], 'recipe': WATER, 'title': 'Rejected'}])
+        finally:
+            db.session.execute(text('DROP TRIGGER reject_title'))
+            db.session.commit()
+
+        self.assertEqual(res.status_code, 422)
+        self.assertEqual(self.titles(), ['Mocha', 'Latte', 'Water'])
+        self.assertEqual(Drink.query.get(self.ids[1]).long()['recipe'], LATTE)
+        self.assertEqual(Drink.with_ingredient('water').count(), 1)
+
+    def test_not_a_list_of_changes(self):
+        """A body without a non-empty list of changes is refused"""
+        for body in [{'drinks': []}, {'drinks': {'id': 1}}, [{'id': 1}], 'drinks']:
+            res = self.client.patch('/drinks', json=body, headers=self.headers)
+            self.assertEqual(res.status_code, 422, body)
+
+
+class DeleteManyTestCase(DrinksTestCase):
+    """DELETE /drinks, Drink.delete_many"""
+
+    def deleted(self, res):
+        self.assertEqual(res.status_code, 200)
+        return [(result['id'], result['status']) for result in json.loads(res.data)['deleted']]
+
+    def test_body_ids(self):
+        """Existing drinks are deleted with their ingredients, unknown ids get 404"""
+        mocha = self.ids[0]
+        res = self.client.delete('/drinks', json={'ids': [mocha, 999]}, headers=self.headers)
+
+        self.assertEqual(self.deleted(res), [(mocha, 200), (999, 404)])
+        self.assertEqual(self.titles(), ['Latte', 'Water'])
+        self.assertEqual(Ingredient.query.filter(Ingredient.drink_id == mocha).count(), 0)
+
+    def test_query_string_ids(self):
+        """?ids= takes comma separated ids"""
+        latte, water = self.ids[1:]
+        res = self.client.delete('/drinks?ids={},{}'.format(latte, water), headers=self.headers)
+
+        self.assertEqual(self.deleted(res), [(latte, 200), (water, 200)])
+        self.assertEqual(self.titles(), ['Mocha'])
+
+    def test_anything_but_ids_deletes_nothing(self):
+        """Strings, floats, booleans or an empty list are refused before anything is deleted"""
+        digits = ''.join(str(id) for id in self.ids[:2])
+        for body in [{'ids': digits}, {'ids': [float(self.ids[0]) + 0.9]}, {'ids': [True]},
+                     {'ids': [str(self.ids[0])]}, {'ids': []}, {'ids': None}, [self.ids[0]]]:
+            res = self.client.delete('/drinks', json=body, headers=self.headers)
+            self.assertEqual(res.status_code, 422, body)
+        for ids in ['{},x'.format(self.ids[0]), '{},,'.format(self.ids[0]), '-1', ' {}'.format(self.ids[0]), '1.0']:
+            res = self.client.delete('/drinks', query_string={'ids': ids}, headers=self.headers)
+            self.assertEqual(res.status_code, 422, ids)
+
+        self.assertEqual(self.titles(), ['Mocha', 'Latte', 'Water'])
+
+
+class MenuSnapshotTestCase(DrinksTestCase):
+    """GET /drinks, the menu snapshot and its ETag"""
+
+    def menu(self):
+        res = self.client.get('/drinks')
+        self.assertEqual(res.status_code, 200)
+        return res.headers['ETag'], [drink['title'] for drink in json.loads(res.data)['drinks']]
+
+    def assertMenuChanged(self, etag, titles):
+        new_etag, new_titles = self.menu()
+        self.assertNotEqual(new_etag, etag)
+        self.assertEqual(new_titles, titles)
+        return new_etag
+
+    def test_short_form(self):
+        """The menu lists every drink in short form"""
+        res = self.client.get('/drinks')
+        data = json.loads(res.data)
+
+        self.assertEqual(res.mimetype, 'application/json')
+        self.assertEqual(data['success'], True)
+        self.assertEqual(data['drinks'][0], {'id': self.ids[0], 'title': 'Mocha', 'recipe': [
+            {'color': 'brown', 'parts': 1}, {'color': 'white', 'parts': 2}]})
+
+    def test_strong_etag_until_a_write(self):
+        """Reads and refused writes keep the ETag, a client holding it gets 304"""
+        etag, titles = self.menu()
+        self.patch([{'id': 999, 'title': 'Ghost'}, {'id': self.ids[0]}])
+        self.client.delete('/drinks?ids=999', headers=self.headers)
+
+        self.assertFalse(etag.startswith('W/'))
+        self.assertEqual(self.menu(), (etag, titles))
+        res = self.client.get('/drinks', headers={'If-None-Match': etag})
+        self.assertEqual(res.status_code, 304)
+        self.assertEqual(res.data, b'')
+
+    def test_etag_changes_after_each_write(self):
+        """Inserts, updates and deletes, single or batched, rebuild the menu"""
+        mocha, latte, water = self.ids
+        etag, titles = self.menu()
+
+        Drink(title='Cortado', recipe=json.dumps(MOCHA)).insert()
+        etag = self.assertMenuChanged(etag, ['Mocha', 'Latte', 'Water', 'Cortado'])
+        drink = Drink.query.get(mocha)
+        drink.title = 'Cafe Mocha'
+        drink.update()
+        etag = self.assertMenuChanged(etag, ['Cafe Mocha', 'Latte', 'Water', 'Cortado'])
+        Drink.query.get(water).delete()
+        etag = self.assertMenuChanged(etag, ['Cafe Mocha', 'Latte', 'Cortado'])
+        self.patch([{'id': latte, 'title': 'Cafe Latte'}])
+        etag = self.assertMenuChanged(etag, ['Cafe Mocha', 'Cafe Latte', 'Cortado'])
+        self.client.delete('/drinks', json={'ids': [mocha]}, headers=self.headers)
+        etag = self.assertMenuChanged(etag, ['Cafe Latte', 'Cortado'])
+
+        self.assertEqual(self.client.get('/drinks', headers={'If-None-Match': etag}).status_code, 304)
+
+    def test_write_by_another_process(self):
+        """A write committed on another connection, with its version bump, is picked up"""
+        etag, titles = self.menu()
+        with db.engine.begin() as connection:
+            connection.execute(text('UPDATE drink SET title = :title WHERE id = :id'), title='Cold Brew', id=self.ids[2])
+            connection.execute(text('UPDATE menu_version SET version = version + 1 WHERE id = 1'))
+
+        self.assertMenuChanged(etag, ['Mocha', 'Latte', 'Cold Brew'])
+
+
+class RecipeViewsTestCase(DrinksTestCase):
+    """Drink.recipe_views, each recipe parsed once and reused until it changes"""
+
+    def load(self, id):
+        db.session.remove()
+        return Drink.query.get(id)
+
+    def test_parsed_once_across_sessions(self):
+        """A drink loaded again in a later session reuses the parsed recipe"""
+        views = self.load(self.ids[0]).recipe_views()
+
+        self.assertIs(self.load(self.ids[0]).recipe_views(), views)
+        self.assertEqual(views, (MOCHA, [{'color': 'brown', 'parts': 1}, {'color': 'white', 'parts': 2}]))
+
+    def test_assigned_recipe_is_parsed_again(self):
+        """Assigning a recipe drops the parsed one, before and after the update"""
+        drink = self.load(self.ids[0])
+        drink.long()
+        drink.recipe = json.dumps(WATER)
+
+        self.assertEqual(drink.long()['recipe'], WATER)
+        drink.update()
+        self.assertEqual(self.load(self.ids[0]).long()['recipe'], WATER)
+
+    def test_batch_update_is_parsed_again(self):
+        """A recipe written by update_many is seen by drinks loaded before and after"""
+        drink = self.load(self.ids[1])
+        drink.short()
+        Drink.update_many([{'id': self.ids[1], 'recipe': WATER}])
+
+        self.assertEqual(drink.long()['recipe'], WATER)
+        self.assertEqual(self.load(self.ids[1]).short()['recipe'], [{'color': 'blue', 'parts': 1}])
+
+    def test_reused_id(self):
+        """A new drink that gets the id of a deleted one is not served its recipe"""
+        water = self.load(self.ids[2])
+        water.long()
+        water.delete()
+        drink = Drink(title='Tea', recipe=json.dumps(LATTE))
+        drink.insert()
+
+        self.assertEqual(drink.id, self.ids[2])
+        self.assertEqual(self.load(drink.id).long()['recipe'], LATTE)
+
+
+class IngredientFilterTestCase(DrinksTestCase):
+    """GET /drinks?ingredient= and db_migrate_ingredients"""
+
+    def with_ingredient(self, name):
+        res = self.client.get('/drinks', query_string={'ingredient': name})
+        self.assertEqual(res.status_code, 200)
+        return [drink['title'] for drink in json.loads(res.data)['drinks']]
+
+    def test_filter(self):
+        """Ingredient names are matched whole, ignoring case and surrounding spaces"""
+        self.assertEqual(self.with_ingredient('milk'), ['Mocha'])
+        self.assertEqual(self.with_ingredient('  Espresso '), ['Mocha', 'Latte'])
+        self.assertEqual(self.with_ingredient('steamed milk'), ['Latte'])
+        self.assertEqual(self.with_ingredient('sugar'), [])
+
+    def test_filter_short_form(self):
+        """The filtered drinks are listed in short form"""
+        res = self.client.get('/drinks?ingredient=water')
+
+        self.assertEqual(json.loads(res.data), {'success': True, 'drinks': [
+            {'id': self.ids[2], 'title': 'Water', 'recipe': [{'color': 'blue', 'parts': 1}]}]})
+
+    def test_filter_follows_recipe_changes(self):
+        """Updated and deleted drinks are found by their current ingredients"""
+        self.patch([{'id': self.ids[2], 'recipe': MOCHA}])
+        self.assertEqual(self.with_ingredient('milk'), ['Mocha', 'Water'])
+        self.assertEqual(self.with_ingredient('water'), [])
+
+        self.client.delete('/drinks', json={'ids': [self.ids[0]]}, headers=self.headers)
+        self.assertEqual(self.with_ingredient('milk'), ['Water'])
+
+    def test_migrate_ingredients(self):
+        """Drinks of a database without the ingredient table get their rows, once"""
+        Ingredient.__table__.drop(db.engine)
+        db.session.execute(text("INSERT INTO drink (title, recipe) VALUES ('Cocoa', :recipe)"),
+                           {'recipe': json.dumps([{'name': 'Milk ', 'color': 'white', 'parts': 3}])})
+        db.session.commit()
+
+        self.assertEqual(db_migrate_ingredients(), 4)
+        self.assertEqual(self.with_ingredient('milk'), ['Mocha', 'Cocoa'])
+        self.assertEqual(self.with_ingredient('espresso'), ['Mocha', 'Latte'])
+        self.assertEqual(db_migrate_ingredients(), 0)
+        self.assertEqual(Ingredient.query.count(), 6)
+
+
+# Make the tests conveniently executable
+if __name__ == "__main__":
+    unittest.main()
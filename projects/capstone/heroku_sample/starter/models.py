@@ -1,21 +1,26 @@
-from sqlalchemy import Column, String, create_engine
+import os
+from sqlalchemy import Column, String, Integer, create_engine
 from flask_sqlalchemy import SQLAlchemy
+from flask_migrate import Migrate
 import json
 
 database_path = os.environ['DATABASE_URL']
 
 db = SQLAlchemy()
+migrate = Migrate()
 
 '''
 setup_db(app)
     binds a flask application and a SQLAlchemy service
+    no DDL and no database round trips, the schema is managed by the migrations
+    in ./migrations (`flask db upgrade`, run in the heroku release phase)
 '''
 def setup_db(app, database_path=database_path):
     app.config["SQLALCHEMY_DATABASE_URI"] = database_path
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
     db.app = app
     db.init_app(app)
-    db.create_all()
+    migrate.init_app(app, db)
 
 
 '''